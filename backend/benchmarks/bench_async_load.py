@@ -0,0 +1,190 @@
+"""Opterećenje s mnogo paralelnih requestova: sinkrone rute, async + run_sync i trenutna podjela.
+
+Pokretanje iz backend/ (PostgreSQL; radi u zasebnoj shemi koju na kraju briše):
+
+    python -m benchmarks.bench_async_load --database-url postgresql://... --concurrency 200 --requests 4000
+
+Korisnik ima --trips tripova s velikim JSON stupcima (bench_serialization).
+Radnici šalju mješavinu teških requestova (GET /api/trips/?limit=200:
+hidracija ORM objekata i serijalizacija velikog odgovora) i laganih
+(GET /api/trips/stats, jedan redak). Tri varijante istih helpera iz
+routers/trips.py:
+
+- sync:     obje rute `def` + Session (threadpool, ~40 slotova)
+- async:    obje rute `async def` + `await db.run_sync(...)` (sav Python na event loopu)
+- current:  pravi router - čitanja (obje ove rute) `def`, upisi async
+
+Requestovi idu kroz ASGI (httpx.ASGITransport) na istom event loopu, pa se
+blokiranje loopa vidi kao latencija laganih requestova. Ispisuje
+requestove/s i p50/p99 po vrsti requesta.
+"""
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import time
+from types import SimpleNamespace
+
+import httpx
+from fastapi import Depends, FastAPI, Request, Response
+from sqlalchemy import create_engine, make_url, text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session, sessionmaker
+
+import models  # noqa: F401 - registrira tablice na Base.metadata
+from benchmarks.bench_serialization import build_trips
+from database import Base, get_async_db, get_db
+from routers import trips
+from routers.auth import get_current_user
+
+SCHEMA = "bench_async_load"
+USER = SimpleNamespace(id=1, username="user1")
+HEAVY = "/api/trips/?limit=200"
+LIGHT = "/api/trips/stats"
+POOL_SIZE, MAX_OVERFLOW = 20, 20
+
+
+def _setup(engine, count: int):
+    with engine.begin() as conn:
+        conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+        conn.execute(text(f"CREATE SCHEMA {SCHEMA}"))
+    Base.metadata.create_all(engine)
+    with engine.begin() as conn:
+        conn.execute(models.User.__table__.insert(), [{"id": 1, "username": "user1", "email": "u1@example.com", "hashed_password": "x"}])
+        conn.execute(models.Trip.__table__.insert(), [
+            {column: getattr(trip, column) for column in (
+                "id", "user_id", "name", "start_date", "end_date", "transport_type",
+                "transport_option", "accommodation", "flight", "total_cost",
+            )}
+            for trip in build_trips(count)
+        ])
+        conn.execute(text("ANALYZE"))
+
+
+def _sync_app() -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/api/trips/")
+    def heavy(request: Request, response: Response, limit: int = 50, db: Session = Depends(get_db)):
+        return trips._get_my_trips(db, request, response, None, limit, None, USER)
+
+    @app.get("/api/trips/stats")
+    def light(request: Request, response: Response, db: Session = Depends(get_db)):
+        return trips._get_my_trip_stats(db, request, response, USER)
+
+    return app
+
+
+def _async_app() -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/api/trips/")
+    async def heavy(request: Request, response: Response, limit: int = 50, db: AsyncSession = Depends(get_async_db)):
+        return await db.run_sync(trips._get_my_trips, request, response, None, limit, None, USER)
+
+    @app.get("/api/trips/stats")
+    async def light(request: Request, response: Response, db: AsyncSession = Depends(get_async_db)):
+        return await db.run_sync(trips._get_my_trip_stats, request, response, USER)
+
+    return app
+
+
+def _current_app() -> FastAPI:
+    app = FastAPI()
+    app.include_router(trips.router, prefix="/api")
+
+    # async kao pravi get_current_user; sinkroni override bi zauzeo slot threadpoola
+    async def current_user():
+        return USER
+
+    app.dependency_overrides[get_current_user] = current_user
+    return app
+
+
+async def _run(app: FastAPI, concurrency: int, requests: int, heavy_share: float) -> dict:
+    rng = random.Random(1)
+    plan = [HEAVY if rng.random() < heavy_share else LIGHT for _ in range(requests)]
+    timings = {HEAVY: [], LIGHT: []}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+
+        async def worker():
+            while plan:
+                url = plan.pop()
+                start = time.perf_counter()
+                response = await client.get(url)
+                timings[url].append((time.perf_counter() - start) * 1000)
+                assert response.status_code == 200, response.text
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+    return {"elapsed": elapsed, "timings": timings}
+
+
+def _percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--database-url", default=os.getenv("TEST_DATABASE_URL"))
+    parser.add_argument("--trips", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--requests", type=int, default=4000)
+    parser.add_argument("--heavy-share", type=float, default=0.1, help="udio teških requestova")
+    args = parser.parse_args()
+    if not args.database_url:
+        parser.error("--database-url ili TEST_DATABASE_URL")
+
+    url = make_url(args.database_url)
+    engine = create_engine(
+        url, pool_size=POOL_SIZE, max_overflow=MAX_OVERFLOW,
+        connect_args={"options": f"-csearch_path={SCHEMA}"},
+    )
+    async_engine = create_async_engine(
+        url.set(drivername="postgresql+asyncpg"), pool_size=POOL_SIZE, max_overflow=MAX_OVERFLOW,
+        connect_args={"server_settings": {"search_path": SCHEMA}},
+    )
+    _setup(engine, args.trips)
+    session_factory = sessionmaker(bind=engine, autoflush=False)
+    async_session_factory = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+    def override_db():
+        db = session_factory()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    async def override_async_db():
+        async with async_session_factory() as db:
+            yield db
+
+    async def run_all():
+        for name, app in (("sync", _sync_app()), ("async", _async_app()), ("current", _current_app())):
+            app.dependency_overrides[get_db] = override_db
+            app.dependency_overrides[get_async_db] = override_async_db
+            # Zagrijavanje: konekcije, katalog, kompajlirani upiti
+            await _run(app, 10, 50, args.heavy_share)
+            result = await _run(app, args.concurrency, args.requests, args.heavy_share)
+            timings = result["timings"]
+            print(
+                f"{name.ljust(8)} concurrency={args.concurrency} requests_per_second={args.requests / result['elapsed']:.0f}"
+                f" light_p50_ms={statistics.median(timings[LIGHT]):.1f} light_p99_ms={_percentile(timings[LIGHT], 0.99):.1f}"
+                f" heavy_p50_ms={statistics.median(timings[HEAVY]):.1f} heavy_p99_ms={_percentile(timings[HEAVY], 0.99):.1f}"
+            )
+        await async_engine.dispose()
+
+    try:
+        asyncio.run(run_all())
+    finally:
+        with engine.begin() as conn:
+            conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
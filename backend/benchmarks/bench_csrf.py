@@ -0,0 +1,144 @@
+"""CSRF provjera: stari @app.middleware("http") vs. csrf.CSRFMiddleware (čisti ASGI).
+
+Pokretanje iz backend/:
+
+    python -m benchmarks.bench_csrf --requests 20000
+
+Obje aplikacije imaju istu praznu rutu; requestovi se šalju izravno kroz ASGI
+sučelje (bez mreže i servera), pa je razlika samo trošak middlewarea.
+Mjeri GET (sigurna metoda) i POST s ispravnim tokenom i ispisuje
+requestove/s i µs po requestu.
+"""
+import argparse
+import asyncio
+import logging
+import os
+import time
+
+from fastapi import FastAPI, Request
+from fastapi_csrf_protect import CsrfProtect
+from pydantic import BaseModel
+from starlette.responses import JSONResponse
+
+from csrf import CSRF_COOKIE_NAME, CSRFMiddleware
+
+TOKEN = "bench-token"
+logger = logging.getLogger("bench_csrf")
+
+
+class CsrfSettings(BaseModel):
+    secret_key: str = "bench_secret_key"
+
+
+def _old_app() -> FastAPI:
+    app = FastAPI()
+
+    @CsrfProtect.load_config
+    def get_csrf_config():
+        return CsrfSettings()
+
+    # Prije: middleware iz main.py (BaseHTTPMiddleware, Request po requestu)
+    @app.middleware("http")
+    async def csrf_protect_middleware(request: Request, call_next):
+        logger.info(f"Request method: {request.method}, URL: {request.url}")
+        if request.method in ["POST", "PUT", "DELETE"]:
+            csrf_protect = CsrfProtect()  # noqa: F841
+            csrf_header = request.headers.get("X-CSRF-Token")
+            csrf_cookie = request.cookies.get("fastapi-csrf-token")
+            logger.debug(f"CSRF token from header: {csrf_header}")
+            logger.debug(f"CSRF token from cookie: {csrf_cookie}")
+            if not csrf_header:
+                return JSONResponse(status_code=403, content={"detail": "CSRF token is missing in header"})
+            if csrf_header and ',' in csrf_header:
+                csrf_header = csrf_header.split(',')[0]
+            if csrf_cookie and ',' in csrf_cookie:
+                csrf_cookie = csrf_cookie.split(',')[0]
+            if csrf_header != csrf_cookie:
+                return JSONResponse(status_code=403, content={"detail": "CSRF token validation failed"})
+            logger.info("CSRF token validated successfully")
+        return await call_next(request)
+
+    _add_routes(app)
+    return app
+
+
+def _new_app() -> FastAPI:
+    app = FastAPI()
+    app.add_middleware(CSRFMiddleware)
+    _add_routes(app)
+    return app
+
+
+def _add_routes(app: FastAPI):
+    @app.get("/ping")
+    async def ping_get():
+        return {"ok": True}
+
+    @app.post("/ping")
+    async def ping_post():
+        return {"ok": True}
+
+
+def _scope(method: str) -> dict:
+    return {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": method,
+        "scheme": "http",
+        "path": "/ping",
+        "raw_path": b"/ping",
+        "query_string": b"",
+        "root_path": "",
+        "headers": [
+            (b"host", b"localhost:8000"),
+            (b"x-csrf-token", TOKEN.encode()),
+            (b"cookie", f"{CSRF_COOKIE_NAME}={TOKEN}; other=1".encode()),
+        ],
+        "client": ("127.0.0.1", 12345),
+        "server": ("127.0.0.1", 8000),
+    }
+
+
+async def _call(app, scope: dict) -> int:
+    status = None
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+
+    await app(scope, receive, send)
+    return status
+
+
+async def _measure(app, method: str, requests: int) -> float:
+    scope = _scope(method)
+    assert await _call(app, dict(scope)) == 200
+    start = time.perf_counter()
+    for _ in range(requests):
+        await _call(app, dict(scope))
+    return time.perf_counter() - start
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--log-level", default="INFO", help="razina logiranja kao u produkciji")
+    args = parser.parse_args()
+    # Logovi idu u /dev/null: mjeri se formatiranje i handler, ne terminal
+    logging.basicConfig(level=args.log_level, stream=open(os.devnull, "w"))
+
+    for name, app in (("http_middleware", _old_app()), ("asgi_middleware", _new_app())):
+        for method in ("GET", "POST"):
+            elapsed = await _measure(app, method, args.requests)
+            print(name.ljust(16), method.ljust(5),
+                  f"requests_per_second={args.requests / elapsed:.0f}",
+                  f"us_per_request={elapsed / args.requests * 1e6:.1f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,97 @@
+"""Propusnost logina: bcrypt inline / u threadpoolu (prije) vs. process pool (password_service).
+
+Pokretanje iz backend/:
+
+    python -m benchmarks.bench_login --requests 200 --concurrency 50
+
+Mjeri samo dio koji se mijenjao - provjeru lozinke i njen utjecaj na event
+loop - bez baze i HTTP-a: `concurrency` istovremenih "loginova" radi verify,
+a usporedno ticker mjeri kašnjenje event loopa (koliko bi čekali svi ostali
+requesti). Ispisuje logine/s, p50/p99 trajanje logina i najveće kašnjenje loopa.
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+from fastapi import HTTPException
+from fastapi.concurrency import run_in_threadpool
+
+from password_service import PASSWORD_HASH_WORKERS, PasswordHasher, pwd_context
+
+PASSWORD = "correct horse battery staple"
+TICK_SECONDS = 0.005
+
+
+async def _loop_lag(stop: asyncio.Event, samples: list):
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(TICK_SECONDS)
+        samples.append(time.perf_counter() - start - TICK_SECONDS)
+
+
+async def _run(verify, requests: int, concurrency: int):
+    hashed = pwd_context.hash(PASSWORD)
+    semaphore = asyncio.Semaphore(concurrency)
+    durations, rejected = [], 0
+
+    async def login():
+        nonlocal rejected
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                assert await verify(PASSWORD, hashed)
+            except HTTPException:
+                rejected += 1
+                return
+            durations.append(time.perf_counter() - start)
+
+    stop, lag = asyncio.Event(), []
+    ticker = asyncio.create_task(_loop_lag(stop, lag))
+    start = time.perf_counter()
+    await asyncio.gather(*(login() for _ in range(requests)))
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await ticker
+    durations.sort()
+    return {
+        "logins_per_second": len(durations) / elapsed,
+        "p50_ms": statistics.median(durations) * 1000 if durations else None,
+        "p99_ms": durations[int(len(durations) * 0.99) - 1] * 1000 if durations else None,
+        "max_loop_lag_ms": max(lag, default=0) * 1000,
+        "rejected_503": rejected,
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--workers", type=int, default=PASSWORD_HASH_WORKERS)
+    args = parser.parse_args()
+
+    async def inline(plain, hashed):
+        # Prije: register je zvao bcrypt izravno u async ruti
+        return pwd_context.verify(plain, hashed)
+
+    async def threadpool(plain, hashed):
+        # Prije: login je radio verify u AnyIO threadpoolu (dijeli ga sa sync rutama)
+        return await run_in_threadpool(pwd_context.verify, plain, hashed)
+
+    hasher = PasswordHasher(workers=args.workers, max_pending=args.concurrency)
+    hasher.start()
+    # Zagrijavanje: spawn workera i import passliba nisu dio mjerenja
+    await asyncio.gather(*(hasher.verify(PASSWORD, pwd_context.hash(PASSWORD)) for _ in range(args.workers)))
+    try:
+        for name, verify in (("inline", inline), ("threadpool", threadpool), ("process_pool", hasher.verify)):
+            result = await _run(verify, args.requests, args.concurrency)
+            print(name.ljust(14), "  ".join(
+                f"{key}={value:.1f}" if isinstance(value, float) else f"{key}={value}"
+                for key, value in result.items()
+            ))
+    finally:
+        hasher.shutdown()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
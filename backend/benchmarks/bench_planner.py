@@ -0,0 +1,64 @@
+"""Planer paketa (trip_planner.plan_bundles) na velikom sintetičkom katalogu.
+
+Pokretanje iz backend/:
+
+    python -m benchmarks.bench_planner --options 20000 --requests 200
+
+Katalog ima --options stavki po nozi (prijevoz, let u oba smjera, smještaj)
+na istoj relaciji. Mjeri prvi upit (gradnja 2D fronti, keširano na indeksu)
+i ponovljene upite s različitim budžetima i noćenjima. Na --baseline-options
+stavki uspoređuje s pretragom svih parova i provjerava da je fronta ista.
+"""
+import argparse
+import random
+import statistics
+import time
+
+from tests.reference import DESTINATION, ORIGIN, brute_force, planner_catalog
+from trip_planner import plan_bundles
+
+
+def _vectors(bundles) -> set:
+    return {(bundle["total_price"], bundle["duration_minutes"], bundle["rating"] or 0) for bundle in bundles}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--options", type=int, default=20000, help="stavki po nozi")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--baseline-options", type=int, default=300)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    index = planner_catalog(args.options)
+    print(f"catalog options_per_leg={args.options} build_ms={(time.perf_counter() - start) * 1000:.0f}")
+
+    start = time.perf_counter()
+    bundles = plan_bundles(index, ORIGIN, DESTINATION, 3, 1500)
+    print(f"planner cold bundles={len(bundles)} ms={(time.perf_counter() - start) * 1000:.1f}")
+
+    rng = random.Random(2)
+    timings = []
+    for _ in range(args.requests):
+        nights, budget = rng.randint(1, 14), rng.randint(200, 6000)
+        start = time.perf_counter()
+        plan_bundles(index, ORIGIN, DESTINATION, nights, budget, limit=10 ** 6)
+        timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+    print(f"planner warm requests={args.requests} median_ms={statistics.median(timings):.2f}"
+          f" p99_ms={timings[int(len(timings) * 0.99) - 1]:.2f}")
+
+    small = planner_catalog(args.baseline_options, seed=3)
+    start = time.perf_counter()
+    expected = brute_force(small, 4, 2500)
+    brute_ms = (time.perf_counter() - start) * 1000
+    start = time.perf_counter()
+    actual = _vectors(plan_bundles(small, ORIGIN, DESTINATION, 4, 2500, limit=10 ** 6))
+    planner_ms = (time.perf_counter() - start) * 1000
+    assert actual == expected, "planner front differs from brute force"
+    print(f"baseline options_per_leg={args.baseline_options} brute_force_ms={brute_ms:.0f}"
+          f" planner_cold_ms={planner_ms:.1f} front={len(actual)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""Pretraga ruta (route_search.find_route): latencija upita na sintetičkom katalogu.
+
+Pokretanje iz backend/:
+
+    python -m benchmarks.bench_route_search --cities 300 --legs 20000 --queries 2000
+
+Katalog ima --legs dionica (prijevoz, letovi, prijevoz do aerodroma) između
+--cities gradova. Ispisuje vrijeme gradnje grafa i p50/p99 upita u dva
+prolaza: prvi uključuje lijeno računanje donjih granica po odredištu, drugi
+je s toplim cacheom. Na --check upita uspoređuje rezultat s običnim
+Dijkstrom bez heuristike (cijena, odnosno vrijeme dolaska).
+"""
+import argparse
+import random
+import time
+
+from route_search import MINUTES_PER_DAY, OPTIMIZE_CHEAPEST, OPTIMIZE_FASTEST, find_route, route_graph
+from tests.reference import dijkstra, route_catalog
+
+
+def _percentile(timings, fraction):
+    return timings[min(len(timings) - 1, int(len(timings) * fraction))]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--cities", type=int, default=300)
+    parser.add_argument("--legs", type=int, default=20000)
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--check", type=int, default=200, help="upita uspoređenih s običnim Dijkstrom")
+    args = parser.parse_args()
+
+    index = route_catalog(args.cities, args.legs)
+    start = time.perf_counter()
+    route_graph(index)
+    print(f"graph cities={args.cities} legs={args.legs} build_ms={(time.perf_counter() - start) * 1000:.0f}")
+
+    rng = random.Random(2)
+    queries = [
+        (*rng.sample([f"city{i}" for i in range(args.cities)], 2), rng.randrange(0, MINUTES_PER_DAY, 15),
+         rng.choice((OPTIMIZE_CHEAPEST, OPTIMIZE_FASTEST)))
+        for _ in range(args.queries)
+    ]
+    for name in ("first_pass", "warm"):
+        timings = {OPTIMIZE_CHEAPEST: [], OPTIMIZE_FASTEST: []}
+        found = 0
+        for origin, destination, depart_after, optimize in queries:
+            start = time.perf_counter()
+            route = find_route(index, origin, destination, depart_after, optimize)
+            timings[optimize].append((time.perf_counter() - start) * 1000)
+            found += route is not None
+        for optimize, values in timings.items():
+            values.sort()
+            print(f"{name.ljust(10)} optimize={optimize.ljust(8)} queries={len(values)}"
+                  f" p50_ms={_percentile(values, 0.5):.3f} p99_ms={_percentile(values, 0.99):.3f}"
+                  f" max_ms={values[-1]:.3f}")
+        print(f"{name.ljust(10)} found={found}/{len(queries)}")
+
+    for origin, destination, depart_after, optimize in queries[:args.check]:
+        route = find_route(index, origin, destination, depart_after, optimize)
+        expected = dijkstra(index, origin, destination, depart_after, optimize)
+        actual = None if route is None else route["total_minutes" if optimize == OPTIMIZE_FASTEST else "total_price"]
+        assert actual == expected, (origin, destination, depart_after, optimize, actual, expected)
+    print(f"check queries={min(args.check, len(queries))} matches_dijkstra=True")
+
+
+if __name__ == "__main__":
+    main()
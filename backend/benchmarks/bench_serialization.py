@@ -0,0 +1,117 @@
+"""Serijalizacija 1.000 tripova s velikim JSON stupcima: FastAPI encoder vs. fast_json.
+
+Pokretanje iz backend/:
+
+    python -m benchmarks.bench_serialization --trips 1000 --rounds 20
+
+Isti sadržaj se serijalizira kao u rutama prije i poslije fast_json:
+
+- orm:  ORM objekti Trip kroz `response_model=List[TripOut]` (FastAPI-jev
+        serialize_response + JSONResponse) vs. TypeAdapter(List[TripOut])
+        s from_attributes (json_response s adapterom);
+- dict: hidrirani rječnici kroz `response_model=List[dict]` vs. to_json
+        (json_response bez adaptera).
+
+Ispisuje medijan ms po payloadu i veličinu tijela; provjerava da oba
+puta daju isti JSON.
+"""
+import argparse
+import asyncio
+import datetime
+import json
+import random
+import statistics
+import time
+from typing import List
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_model_field
+from pydantic import TypeAdapter
+
+from fast_json import json_response
+from models import Trip
+from routers.trips import TRIP_FIELDS, TripOut
+
+
+def _accommodation(rng, i):
+    return {
+        "id": f"acc{i}", "name": f"Hotel {i}", "type": "hotel", "price": rng.randint(40, 400),
+        "destination": "Split", "location": "Riva 1", "image": f"/images/hotel{i}.jpg",
+        "images": [f"/images/hotel{i}_{n}.jpg" for n in range(12)],
+        "description": "Mirna soba s pogledom na more. " * 10,
+        "bookingLink": f"https://example.com/book/{i}",
+        "reviews": [
+            {"user": f"guest{n}", "rating": rng.randint(1, 5), "comment": "Odlično, preporučujem. " * 3}
+            for n in range(15)
+        ],
+    }
+
+
+def _leg(rng, i, departure, destination):
+    return {
+        "id": f"flight{i}", "airline": "Croatia Airlines", "departure": departure, "destination": destination,
+        "price": rng.randint(50, 500), "departure_time": "10:00 AM", "arrival_time": "11:05 AM",
+        "image": "/images/flight.jpg", "bookingLink": f"https://example.com/flight/{i}",
+    }
+
+
+def build_trips(count: int, seed: int = 1) -> list:
+    rng = random.Random(seed)
+    start = datetime.date(2030, 1, 1)
+    return [
+        Trip(
+            id=i, user_id=1, name=f"Trip {i}",
+            start_date=start + datetime.timedelta(days=i), end_date=start + datetime.timedelta(days=i + 5),
+            transport_type="air",
+            transport_option={
+                "id": f"bus{i}", "name": "Shuttle", "currLocation": "Dubrovnik", "departure": "Split",
+                "price": rng.randint(5, 40), "departure_time": "6:00 AM", "arrival_time": "9:00 AM",
+                "image": "/images/bus.jpg", "bookingLink": "https://example.com/bus",
+            },
+            accommodation=_accommodation(rng, i),
+            flight={"departure": _leg(rng, i, "Split", "Zagreb"), "return": _leg(rng, i, "Zagreb", "Split")},
+            total_cost=float(rng.randint(200, 3000)),
+        )
+        for i in range(1, count + 1)
+    ]
+
+
+def _median_ms(fn, rounds: int) -> float:
+    timings = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--trips", type=int, default=1000)
+    parser.add_argument("--rounds", type=int, default=20)
+    args = parser.parse_args()
+
+    trips = build_trips(args.trips)
+    dicts = [{field: getattr(trip, field) for field in TRIP_FIELDS} for trip in trips]
+    orm_field = create_model_field("Response_trips", List[TripOut], mode="serialization")
+    dict_field = create_model_field("Response_trips", List[dict], mode="serialization")
+    trip_list = TypeAdapter(List[TripOut])
+
+    def encoder(field, content):
+        # Što FastAPI radi za response_model: validacija, jsonable_encoder, json.dumps
+        return JSONResponse(asyncio.run(serialize_response(field=field, response_content=content))).body
+
+    cases = {
+        "orm": (lambda: encoder(orm_field, trips), lambda: json_response(trips, adapter=trip_list).body),
+        "dict": (lambda: encoder(dict_field, dicts), lambda: json_response(dicts).body),
+    }
+    for name, (old, new) in cases.items():
+        assert json.loads(old()) == json.loads(new()), f"{name}: payloads differ"
+        old_ms, new_ms = _median_ms(old, args.rounds), _median_ms(new, args.rounds)
+        print(f"{name.ljust(5)} trips={args.trips} body_kb={len(new()) // 1024}"
+              f" encoder_ms={old_ms:.1f} fast_json_ms={new_ms:.1f} speedup={old_ms / new_ms:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""Pretraga korisnika nad velikom tablicom: stari upit (ILIKE bez limita) vs. find_users.
+
+Pokretanje iz backend/ (PostgreSQL; radi u zasebnoj shemi koju na kraju briše):
+
+    python -m benchmarks.bench_user_search --database-url postgresql://... --users 1000000
+
+Puni tablicu users s `--users` redova (generate_series), primijeni indekse iz
+migrations/v0002_user_search_indexes.py i za nekoliko upita ispiše medijan
+trajanja starog upita, prve stranice find_users i stranice dohvaćene preko
+cursora. Ako pg_trgm nije dostupan, podniz se traži bez GIN indeksa i to
+se vidi u ispisu.
+"""
+import argparse
+import os
+import statistics
+import time
+
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.orm import sessionmaker
+
+from migrations import v0002_user_search_indexes
+from models import User
+from user_search import find_users
+
+SCHEMA = "bench_user_search"
+QUERIES = ("user0000042", "user00001", "00042", "99999", "nobody")
+
+
+def _setup(engine, users: int):
+    with engine.begin() as conn:
+        conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+        conn.execute(text(f"CREATE SCHEMA {SCHEMA}"))
+    with engine.begin() as conn:
+        User.__table__.create(conn)
+        conn.execute(text(
+            "INSERT INTO users (username, email, hashed_password, role, is_active, is_email_verified, created_at) "
+            "SELECT 'User' || lpad(i::text, 7, '0'), 'user' || i || '@example.com', 'x', 'user', true, true, now() "
+            "FROM generate_series(1, :users) AS i"
+        ), {"users": users})
+    try:
+        with engine.begin() as conn:
+            v0002_user_search_indexes.upgrade(conn)
+    except Exception as e:
+        print(f"pg_trgm nije dostupan ({type(e).__name__}), samo ix_users_username_lower")
+        with engine.begin() as conn:
+            conn.execute(text("CREATE INDEX ix_users_username_lower ON users (lower(username))"))
+    with engine.begin() as conn:
+        conn.execute(text("ANALYZE users"))
+
+
+def _median_ms(fn, repeat: int) -> float:
+    fn()
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--database-url", default=os.getenv("TEST_DATABASE_URL"))
+    parser.add_argument("--users", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    if not args.database_url:
+        parser.error("--database-url ili TEST_DATABASE_URL")
+
+    engine = create_engine(args.database_url)
+
+    @event.listens_for(engine, "connect")
+    def set_search_path(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute(f"SET search_path TO {SCHEMA}")
+        cursor.close()
+
+    start = time.perf_counter()
+    _setup(engine, args.users)
+    print(f"seed {args.users} users: {time.perf_counter() - start:.1f}s")
+
+    Session = sessionmaker(bind=engine)
+    try:
+        with Session() as db:
+            for query in QUERIES:
+                def old():
+                    # Prije: svi pogoci kao ORM objekti, bez ranga i limita
+                    return db.query(User).filter(User.username.ilike(f"%{query}%")).all()
+
+                first_page = find_users(db, query)
+                cursor = first_page["next_cursor"]
+                matches = len(old())
+                print(query.ljust(12), f"matches={matches:<8}",
+                      f"old_ms={_median_ms(old, args.repeat):.1f}",
+                      f"first_page_ms={_median_ms(lambda: find_users(db, query), args.repeat):.1f}",
+                      f"next_page_ms={_median_ms(lambda: find_users(db, query, cursor), args.repeat):.1f}" if cursor else "next_page_ms=-")
+    finally:
+        with engine.begin() as conn:
+            conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
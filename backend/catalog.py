@@ -0,0 +1,337 @@
+"""Katalog prijevoza, smještaja i letova s indeksima u memoriji.
+
+Izvor su JSON datoteke iz frontend/data (CATALOG_DATA_DIR). Indeks se gradi
+jednom pri učitavanju i više se ne mijenja: svaka lista je sortirana po
+(cijena, id), pa je filter po cijeni bisect, a stranica keyset kursorom
+isječak liste. Kad se datoteke promijene, gradi se novi indeks i zamjenjuje
+stari jednom dodjelom - request koji je već uzeo `catalog.index` radi do
+kraja sa starim, konzistentnim indeksom.
+"""
+import asyncio
+import bisect
+import hashlib
+import json
+import logging
+import os
+import threading
+
+from fastapi.concurrency import run_in_threadpool
+
+logger = logging.getLogger(__name__)
+
+CATALOG_DATA_DIR = os.getenv(
+    "CATALOG_DATA_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "frontend", "data"),
+)
+CATALOG_RELOAD_INTERVAL_SECONDS = 10
+
+KIND_ACCOMMODATION = "accommodation"
+KIND_FLIGHT = "flight"
+KIND_TRANSPORT = "transport"
+KIND_TRANSPORT_FLIGHT = "transport_flight"  # prijevoz do aerodroma
+
+# kind -> (datoteka, polje polazišta, polje odredišta)
+CATALOG_SOURCES = {
+    KIND_ACCOMMODATION: ("accommodationData.json", None, "destination"),
+    KIND_FLIGHT: ("flightsData.json", "departure", "destination"),
+    KIND_TRANSPORT: ("transportData.json", "departure", "destination"),
+    KIND_TRANSPORT_FLIGHT: ("transportFlightData.json", "currLocation", "departure"),
+}
+
+SORT_OPTIONS = ("price", "-price", "duration", "rating")
+
+
+def parse_clock(value: str):
+    """"10:00 AM" -> minute od ponoći; None ako vrijeme nije zadano."""
+    try:
+        clock, period = value.strip().split()
+        hours, minutes = (int(part) for part in clock.split(":"))
+    except (AttributeError, ValueError):
+        return None
+    hours %= 12
+    if period.upper() == "PM":
+        hours += 12
+    return hours * 60 + minutes
+
+
+def format_clock(minutes: int) -> str:
+    """Minute od ponoći -> "10:00 AM" (format iz kataloga)."""
+    hours, minutes = divmod(minutes, 60)
+    period = "AM" if hours < 12 else "PM"
+    return f"{hours % 12 or 12}:{minutes:02d} {period}"
+
+
+def parse_duration(value: str):
+    """"18h", "2h 30m", "45m" -> minute."""
+    if not isinstance(value, str):
+        return None
+    total = 0
+    for part in value.lower().split():
+        try:
+            if part.endswith("h"):
+                total += int(part[:-1]) * 60
+            elif part.endswith("m"):
+                total += int(part[:-1])
+            else:
+                return None
+        except ValueError:
+            return None
+    return total or None
+
+
+def duration_minutes(item: dict):
+    """Trajanje iz polja `duration` ili iz razlike polaska i dolaska (preko ponoći)."""
+    duration = parse_duration(item.get("duration"))
+    if duration is not None:
+        return duration
+    departure, arrival = parse_clock(item.get("departure_time")), parse_clock(item.get("arrival_time"))
+    if departure is None or arrival is None:
+        return None
+    return (arrival - departure) % (24 * 60)
+
+
+def average_rating(item: dict):
+    ratings = [review["rating"] for review in item.get("reviews") or () if review.get("rating") is not None]
+    return sum(ratings) / len(ratings) if ratings else None
+
+
+def _place(value):
+    return value.strip().lower() if isinstance(value, str) and value.strip() else None
+
+
+class PriceList:
+    """Stavke sortirane po (cijena, id) + paralelne liste ključeva za bisect."""
+
+    def __init__(self, items):
+        self.items = items
+        self.keys = [(item["price"], item["id"]) for item in items]
+        self.prices = [key[0] for key in self.keys]
+
+    def price_range(self, min_price=None, max_price=None):
+        lo = 0 if min_price is None else bisect.bisect_left(self.prices, min_price)
+        hi = len(self.prices) if max_price is None else bisect.bisect_right(self.prices, max_price)
+        return lo, hi
+
+
+EMPTY = PriceList([])
+
+
+class CatalogIndex:
+    """Nepromjenjivi indeks jedne verzije kataloga."""
+
+    def __init__(self, sources: dict, version: str = None):
+        self.version = version
+        self.by_id = {}
+        self.all = {}
+        self.routes = {}
+        self.origins = {}
+        self.destinations = {}
+        # Izračunato jednom po stavci: trajanje u minutama i prosječna ocjena
+        self.duration = {}
+        self.rating = {}
+        # Izvedene strukture (planer, graf ruta) vezane uz ovu verziju kataloga
+        self.derived = {}
+        for kind, items in sources.items():
+            _, origin_field, destination_field = CATALOG_SOURCES[kind]
+            items = sorted(
+                (item for item in items if item.get("id") is not None and isinstance(item.get("price"), (int, float))),
+                key=lambda item: (item["price"], str(item["id"])),
+            )
+            for item in items:
+                item["id"] = str(item["id"])
+            self.by_id[kind] = {item["id"]: item for item in items}
+            self.duration[kind] = {item["id"]: duration_minutes(item) for item in items}
+            self.rating[kind] = {item["id"]: average_rating(item) for item in items}
+
+            routes, origins, destinations = {}, {}, {}
+            for item in items:
+                origin = _place(item.get(origin_field)) if origin_field else None
+                destination = _place(item.get(destination_field))
+                origins.setdefault(origin, []).append(item)
+                destinations.setdefault(destination, []).append(item)
+                routes.setdefault((origin, destination), []).append(item)
+            self.all[kind] = PriceList(items)
+            self.routes[kind] = {key: PriceList(group) for key, group in routes.items()}
+            self.origins[kind] = {key: PriceList(group) for key, group in origins.items()}
+            self.destinations[kind] = {key: PriceList(group) for key, group in destinations.items()}
+
+    def derive(self, key, build):
+        """Izgradi izvedenu strukturu jednom po verziji indeksa; reload je odbacuje s indeksom."""
+        if key not in self.derived:
+            # Utrka dva requesta samo dvaput izgradi istu vrijednost
+            self.derived[key] = build()
+        return self.derived[key]
+
+    def get(self, kind: str, item_id: str):
+        return self.by_id.get(kind, {}).get(item_id)
+
+    def candidates(self, kind: str, origin=None, destination=None) -> PriceList:
+        """Najuža lista za zadane filtre (ruta, polazište, odredište ili sve)."""
+        origin, destination = _place(origin), _place(destination)
+        if origin and destination:
+            return self.routes.get(kind, {}).get((origin, destination), EMPTY)
+        if origin:
+            return self.origins.get(kind, {}).get(origin, EMPTY)
+        if destination:
+            return self.destinations.get(kind, {}).get(destination, EMPTY)
+        return self.all.get(kind, EMPTY)
+
+    def _sort_key(self, kind: str, sort: str):
+        if sort == "-price":
+            return lambda item: (-item["price"], item["id"])
+        if sort == "duration":
+            durations = self.duration[kind]
+            # Stavke bez trajanja idu na kraj
+            return lambda item: (durations[item["id"]] is None, durations[item["id"]] or 0, item["id"])
+        if sort == "rating":
+            ratings = self.rating[kind]
+            return lambda item: (ratings[item["id"]] is None, -(ratings[item["id"]] or 0), item["id"])
+        return lambda item: (item["price"], item["id"])
+
+    def search(
+        self,
+        kind: str,
+        origin: str = None,
+        destination: str = None,
+        min_price: float = None,
+        max_price: float = None,
+        type: str = None,
+        sort: str = "price",
+        after=None,
+        limit: int = 20,
+    ):
+        """Vrati (stavke, ključ zadnje stavke ili None ako nema sljedeće stranice).
+
+        `after` je ključ zadnje stavke prethodne stranice (keyset) u istom
+        sortiranju. Za sortiranja osim cijene redoslijed se kešira (`_sorted`),
+        a filtri po cijeni i tipu se primjenjuju dok se stranica ne napuni.
+        """
+        candidates = self.candidates(kind, origin, destination)
+        if sort == "price":
+            # Lista je već sortirana po (cijena, id): kursor je bisect, nema sortiranja
+            lo, hi = candidates.price_range(min_price, max_price)
+            if after is not None:
+                lo = max(lo, bisect.bisect_right(candidates.keys, after, lo, hi))
+            items, start = candidates.items, lo
+        else:
+            keys, items = self._sorted(kind, origin, destination, sort, candidates)
+            start, hi = 0, len(items)
+            if after is not None:
+                start = bisect.bisect_right(keys, after)
+        page = []
+        for position in range(start, hi):
+            item = items[position]
+            if type and item.get("type") != type:
+                continue
+            if sort != "price" and (
+                (min_price is not None and item["price"] < min_price)
+                or (max_price is not None and item["price"] > max_price)
+            ):
+                continue
+            page.append(item)
+            if len(page) > limit:
+                break
+        if len(page) > limit:
+            page = page[:limit]
+            return page, self._sort_key(kind, sort)(page[-1])
+        return page, None
+
+    def _sorted(self, kind: str, origin, destination, sort: str, candidates: PriceList):
+        """(ključevi, stavke) liste sortirane po `sort`, jednom po verziji indeksa.
+
+        Prazna lista (nepoznati grad) se ne kešira, pa `derived` raste najviše
+        do broja postojećih lista puta broj sortiranja.
+        """
+        if not candidates.items:
+            return [], []
+
+        def build():
+            key = self._sort_key(kind, sort)
+            items = sorted(candidates.items, key=key)
+            return [key(item) for item in items], items
+
+        return self.derive(("sorted", kind, _place(origin), _place(destination), sort), build)
+
+
+def load_sources(data_dir: str) -> dict:
+    sources = {}
+    for kind, (filename, _, _) in CATALOG_SOURCES.items():
+        path = os.path.join(data_dir, filename)
+        if not os.path.exists(path):
+            logger.warning("Catalog file %s not found, %s catalog is empty", path, kind)
+            sources[kind] = []
+            continue
+        with open(path, encoding="utf-8") as f:
+            sources[kind] = json.load(f)
+    return sources
+
+
+class CatalogService:
+    """Drži trenutni CatalogIndex i ponovno ga gradi kad se izvorne datoteke promijene."""
+
+    def __init__(self, data_dir: str = CATALOG_DATA_DIR, reload_interval: float = CATALOG_RELOAD_INTERVAL_SECONDS):
+        self.data_dir = data_dir
+        self.reload_interval = reload_interval
+        self._index = None
+        self._mtimes = None
+        self._lock = threading.Lock()
+        self._task = None
+
+    def _source_mtimes(self):
+        mtimes = []
+        for filename, _, _ in CATALOG_SOURCES.values():
+            try:
+                mtimes.append(os.stat(os.path.join(self.data_dir, filename)).st_mtime_ns)
+            except FileNotFoundError:
+                mtimes.append(None)
+        return tuple(mtimes)
+
+    @property
+    def index(self) -> CatalogIndex:
+        if self._index is None:
+            self.reload_if_changed()
+        return self._index
+
+    def reload_if_changed(self) -> bool:
+        with self._lock:
+            mtimes = self._source_mtimes()
+            if self._index is not None and mtimes == self._mtimes:
+                return False
+            try:
+                index = CatalogIndex(load_sources(self.data_dir), version=hashlib.sha1(repr(mtimes).encode()).hexdigest()[:12])
+            except (OSError, ValueError):
+                # Npr. datoteka upravo djelomično zapisana - ostaje stari indeks,
+                # sljedeća provjera pokušava ponovno
+                logger.exception("Catalog reload failed, keeping previous index")
+                if self._index is None:
+                    self._index = CatalogIndex({kind: [] for kind in CATALOG_SOURCES})
+                return False
+            # Atomarna zamjena: jedna dodjela reference
+            self._index, self._mtimes = index, mtimes
+            logger.info("Catalog loaded from %s (version %s)", self.data_dir, index.version)
+            return True
+
+    async def run(self):
+        while True:
+            await asyncio.sleep(self.reload_interval)
+            try:
+                await run_in_threadpool(self.reload_if_changed)
+            except Exception:
+                logger.exception("Catalog reload check failed")
+
+    async def start(self):
+        await run_in_threadpool(self.reload_if_changed)
+        if self._task is None:
+            self._task = asyncio.create_task(self.run())
+
+    async def stop(self):
+        task, self._task = self._task, None
+        if task is not None:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+
+
+catalog = CatalogService()
@@ -0,0 +1,68 @@
+import logging
+
+from starlette.requests import cookie_parser
+from starlette.responses import JSONResponse
+
+logger = logging.getLogger(__name__)
+
+CSRF_COOKIE_NAME = "fastapi-csrf-token"
+CSRF_HEADER_NAME = b"x-csrf-token"
+CSRF_PROTECTED_METHODS = frozenset({"POST", "PUT", "DELETE"})
+CSRF_EXEMPT_PREFIXES = ("/media/",)
+
+
+def _cookie_value(raw_cookie: bytes, name: str):
+    # Isti parser koji koristi Request.cookies
+    return cookie_parser(raw_cookie.decode("latin-1")).get(name)
+
+
+def _first_token(value):
+    # Token zna doći kao "tuple" string odvojen zarezom; uzmi prvi element
+    if value and "," in value:
+        return value.split(",")[0]
+    return value
+
+
+class CSRFMiddleware:
+    """Double-submit CSRF provjera kao čisti ASGI middleware.
+
+    Sigurne metode i statičke putanje prolaze odmah, bez gradnje Request
+    objekta; za POST/PUT/DELETE header X-CSRF-Token mora odgovarati cookieju.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if (
+            scope["type"] != "http"
+            or scope["method"] not in CSRF_PROTECTED_METHODS
+            or scope["path"].startswith(CSRF_EXEMPT_PREFIXES)
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        csrf_header = None
+        raw_cookie = None
+        for name, value in scope["headers"]:
+            if name == CSRF_HEADER_NAME:
+                # Kod ponovljenog headera vrijedi prvi, kao Request.headers.get
+                if csrf_header is None:
+                    csrf_header = value.decode("latin-1")
+            elif name == b"cookie":
+                raw_cookie = value if raw_cookie is None else raw_cookie + b"; " + value
+
+        if not csrf_header:
+            logger.error("CSRF token is missing in header")
+            response = JSONResponse(status_code=403, content={"detail": "CSRF token is missing in header"})
+            await response(scope, receive, send)
+            return
+
+        csrf_cookie = _cookie_value(raw_cookie, CSRF_COOKIE_NAME) if raw_cookie else None
+        if _first_token(csrf_header) != _first_token(csrf_cookie):
+            logger.error("CSRF token validation failed. Header token does not match cookie token.")
+            response = JSONResponse(status_code=403, content={"detail": "CSRF token validation failed"})
+            await response(scope, receive, send)
+            return
+
+        await self.app(scope, receive, send)
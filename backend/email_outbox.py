@@ -0,0 +1,240 @@
+import asyncio
+import datetime
+import logging
+from email.message import EmailMessage
+
+import aiosmtplib
+from fastapi.concurrency import run_in_threadpool
+
+from database import SessionLocal
+from models import EmailOutbox, EmailStatus
+from utils import conf, render_outbox_body
+
+logger = logging.getLogger(__name__)
+
+OUTBOX_BATCH_SIZE = 50
+OUTBOX_POLL_INTERVAL_SECONDS = 5
+OUTBOX_MAX_ATTEMPTS = 6
+OUTBOX_BACKOFF_BASE_SECONDS = 30
+OUTBOX_BACKOFF_MAX_SECONDS = 3600
+# Koliko dugo je preuzeta poruka "zaključana" za ostale workere
+OUTBOX_LEASE_SECONDS = 300
+
+
+def _claim_batch(batch_size: int) -> list:
+    """Preuzmi poruke spremne za slanje i pomakni im next_attempt_at za lease.
+
+    Pokušaj se broji već pri preuzimanju: ako worker padne prije
+    _record_results, poruka se nakon isteka leasea ponovno šalje, ali ne
+    beskonačno - nakon OUTBOX_MAX_ATTEMPTS ide u dead letter.
+    Na PostgreSQL-u SKIP LOCKED omogućuje više procesa bez duplog slanja.
+    """
+    db = SessionLocal()
+    try:
+        now = datetime.datetime.utcnow()
+        rows = (
+            db.query(EmailOutbox)
+            .filter(EmailOutbox.status == EmailStatus.pending, EmailOutbox.next_attempt_at <= now)
+            .order_by(EmailOutbox.next_attempt_at, EmailOutbox.id)
+            .limit(batch_size)
+            .with_for_update(skip_locked=True)
+            .all()
+        )
+        lease_until = now + datetime.timedelta(seconds=OUTBOX_LEASE_SECONDS)
+        batch = []
+        for row in rows:
+            if row.attempts >= OUTBOX_MAX_ATTEMPTS:
+                # Zadnji pokušaj je preuzet, ali ishod nikad nije upisan
+                row.status = EmailStatus.dead
+                row.last_error = row.last_error or "Sender stopped before recording the result"
+                logger.error("Outbox message %s moved to dead letter after %s attempts", row.id, row.attempts)
+                continue
+            row.attempts += 1
+            row.next_attempt_at = lease_until
+            batch.append({
+                "id": row.id,
+                "recipient": row.recipient,
+                "subject": row.subject,
+                "body": row.body,
+                "attempts": row.attempts,
+            })
+        db.commit()
+        return batch
+    finally:
+        db.close()
+
+
+def _record_results(results: list):
+    """Upiši ishode slanja jednog batcha u jednoj transakciji.
+
+    `results` je lista (message, error); error je None za uspješno poslane.
+    """
+    db = SessionLocal()
+    try:
+        now = datetime.datetime.utcnow()
+        for message, error in results:
+            row = db.get(EmailOutbox, message["id"])
+            if row is None:
+                continue
+            if error is None:
+                row.status = EmailStatus.sent
+                row.sent_at = now
+                row.last_error = None
+                continue
+            row.last_error = error[:1000]
+            if row.attempts >= OUTBOX_MAX_ATTEMPTS:
+                row.status = EmailStatus.dead
+                logger.error("Outbox message %s moved to dead letter after %s attempts: %s", row.id, row.attempts, error)
+            else:
+                delay = min(OUTBOX_BACKOFF_BASE_SECONDS * 2 ** (row.attempts - 1), OUTBOX_BACKOFF_MAX_SECONDS)
+                row.next_attempt_at = now + datetime.timedelta(seconds=delay)
+                logger.warning("Outbox message %s failed (attempt %s), retrying in %ss: %s", row.id, row.attempts, delay, error)
+        db.commit()
+    finally:
+        db.close()
+
+
+class OutboxSender:
+    """Pozadinski worker koji prazni email_outbox u batchevima.
+
+    Cijeli batch (i sljedeći, dok ima posla) šalje se preko jedne SMTP
+    konekcije; kad outbox ostane prazan konekcija se zatvara.
+    Za testove se može usmjeriti na lokalni SMTP (npr. aiosmtpd)
+    preko hostname/port argumenata.
+    """
+
+    def __init__(
+        self,
+        hostname: str,
+        port: int,
+        sender: str,
+        username: str = None,
+        password: str = None,
+        start_tls: bool = False,
+        use_tls: bool = False,
+        validate_certs: bool = True,
+        batch_size: int = OUTBOX_BATCH_SIZE,
+        poll_interval: float = OUTBOX_POLL_INTERVAL_SECONDS,
+    ):
+        self.hostname = hostname
+        self.port = port
+        self.sender = sender
+        self.username = username
+        self.password = password
+        self.start_tls = start_tls
+        self.use_tls = use_tls
+        self.validate_certs = validate_certs
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self._smtp = None
+        self._wakeup = None
+        self._task = None
+
+    @classmethod
+    def from_config(cls, config=conf, **kwargs):
+        password = config.MAIL_PASSWORD
+        if hasattr(password, "get_secret_value"):
+            password = password.get_secret_value()
+        return cls(
+            hostname=config.MAIL_SERVER,
+            port=config.MAIL_PORT,
+            sender=config.MAIL_FROM,
+            username=config.MAIL_USERNAME if config.USE_CREDENTIALS else None,
+            password=password if config.USE_CREDENTIALS else None,
+            start_tls=config.MAIL_STARTTLS,
+            use_tls=config.MAIL_SSL_TLS,
+            validate_certs=config.VALIDATE_CERTS,
+            **kwargs,
+        )
+
+    async def _connection(self) -> aiosmtplib.SMTP:
+        if self._smtp is not None and self._smtp.is_connected:
+            return self._smtp
+        smtp = aiosmtplib.SMTP(
+            hostname=self.hostname,
+            port=self.port,
+            use_tls=self.use_tls,
+            start_tls=self.start_tls,
+            validate_certs=self.validate_certs,
+        )
+        await smtp.connect()
+        if self.username:
+            await smtp.login(self.username, self.password)
+        self._smtp = smtp
+        return smtp
+
+    async def close(self):
+        smtp, self._smtp = self._smtp, None
+        if smtp is not None and smtp.is_connected:
+            try:
+                await smtp.quit()
+            except aiosmtplib.SMTPException:
+                smtp.close()
+
+    def _build_message(self, message: dict) -> EmailMessage:
+        email = EmailMessage()
+        email["From"] = self.sender
+        email["To"] = message["recipient"]
+        email["Subject"] = message["subject"]
+        email.set_content(render_outbox_body(message["recipient"], message["body"]), subtype="html")
+        return email
+
+    async def drain_once(self) -> int:
+        """Pošalji jedan batch; vraća broj obrađenih poruka."""
+        batch = await run_in_threadpool(_claim_batch, self.batch_size)
+        if not batch:
+            return 0
+        results = []
+        for message in batch:
+            try:
+                smtp = await self._connection()
+                await smtp.send_message(self._build_message(message))
+                results.append((message, None))
+            except (aiosmtplib.SMTPException, OSError) as e:
+                results.append((message, f"{type(e).__name__}: {e}"))
+                # Pokvarenu konekciju odbaci, sljedeća poruka otvara novu
+                if isinstance(e, (aiosmtplib.SMTPServerDisconnected, aiosmtplib.SMTPConnectError, OSError)):
+                    await self.close()
+        await run_in_threadpool(_record_results, results)
+        return len(batch)
+
+    def wake(self):
+        # Pozovi nakon commita nove poruke da ne čeka poll interval
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def run(self):
+        self._wakeup = asyncio.Event()
+        while True:
+            try:
+                processed = await self.drain_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Email outbox drain failed")
+                processed = 0
+            if processed >= self.batch_size:
+                continue
+            await self.close()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self.run())
+
+    async def stop(self):
+        task, self._task = self._task, None
+        if task is not None:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        await self.close()
+
+
+outbox_sender = OutboxSender.from_config()
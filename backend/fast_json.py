@@ -0,0 +1,46 @@
+"""Brzi JSON odgovori: serijalizacija u pydantic-core umjesto jsonable_encoder-a.
+
+Ruta koja vrati običan dict/listu (ili ima `response_model=List[dict]`)
+prolazi validaciju izlaza pa FastAPI-jev generički encoder, rekurzivno u
+Pythonu, za svaki čvor velikih JSON stupaca tripa - pa tek onda json.dumps.
+
+Ovdje se podaci serijaliziraju jednim prolazom u Rustu izravno u bytes:
+fiksni oblici kroz unaprijed kompajlirane TypeAdaptere (modeli s
+`from_attributes`, čitaju ORM objekte i redove upita), slobodni rječnici
+(hidrirani tripovi) kroz `to_json`. Vraćeni Response preskače response_model,
+pa `json_response` prenosi headere postavljene na injektirani `response`
+(ETag, Cache-Control).
+"""
+from typing import Any, Optional
+
+from fastapi import Response
+from pydantic import TypeAdapter
+from pydantic_core import to_json
+
+
+class FastJSONResponse(Response):
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        if isinstance(content, bytes):
+            return content
+        return to_json(content)
+
+
+def json_response(
+    content: Any,
+    response: Optional[Response] = None,
+    adapter: Optional[TypeAdapter] = None,
+    status_code: int = 200,
+) -> FastJSONResponse:
+    """Serijaliziraj `content` (kroz `adapter` ako je zadan) i prenesi headere iz `response`."""
+    if adapter is not None:
+        body = adapter.dump_json(adapter.validate_python(content, from_attributes=True))
+    else:
+        body = to_json(content)
+    result = FastJSONResponse(body, status_code=status_code)
+    if response is not None:
+        result.raw_headers.extend(
+            (name, value) for name, value in response.raw_headers if name != b"content-length"
+        )
+    return result
@@ -0,0 +1,128 @@
+import heapq
+import itertools
+import threading
+from collections import Counter
+
+from sqlalchemy import exists, or_
+from sqlalchemy.orm import Session
+
+from models import Friend, FriendshipStatus
+
+# Granice BFS-a za prijedloge (prijatelji prijatelja)
+SUGGESTION_MAX_FRIENDS_SCANNED = 500
+SUGGESTION_MAX_EDGES_SCANNED = 100000
+SUGGESTION_LIMIT = 20
+
+
+class FriendGraph:
+    """Simetrični indeks prihvaćenih prijateljstava u memoriji procesa.
+
+    Puni se iz baze pri prvom korištenju, a rute ga ažuriraju nakon commita
+    (prihvaćanje, odbijanje, brisanje). Svaki proces ima svoj indeks, a
+    promjene iz drugih workera ne vidi, pa služi samo za prijedloge; provjere
+    prava idu u bazu (`are_friends`).
+    """
+
+    def __init__(self):
+        self._adjacency = {}
+        # Broj prihvaćenih redaka po paru (oba smjera mogu postojati zasebno)
+        self._edge_rows = Counter()
+        self._lock = threading.Lock()
+        self._loaded = False
+        self._generation = 0
+
+    @staticmethod
+    def _key(a: int, b: int):
+        return (a, b) if a < b else (b, a)
+
+    def ensure_loaded(self, db: Session):
+        # Upit ide bez locka: u async sesiji (run_sync) čekanje na bazu prepušta
+        # event loop drugim requestima, a jedan od njih bi tada čekao na lock
+        # i blokirao cijeli loop; iz threadpoola bi lock serijalizirao rute.
+        # Promjena bridova tijekom upita -> ponovi.
+        while not self._loaded:
+            generation = self._generation
+            rows = (
+                db.query(Friend.user_id, Friend.friend_id)
+                .filter(Friend.status == FriendshipStatus.accepted)
+                .all()
+            )
+            with self._lock:
+                if self._loaded or generation != self._generation:
+                    continue
+                for user_id, friend_id in rows:
+                    self._add(user_id, friend_id)
+                self._loaded = True
+
+    def _add(self, a: int, b: int):
+        key = self._key(a, b)
+        self._edge_rows[key] += 1
+        if self._edge_rows[key] == 1:
+            self._adjacency.setdefault(a, set()).add(b)
+            self._adjacency.setdefault(b, set()).add(a)
+
+    def _remove(self, a: int, b: int):
+        key = self._key(a, b)
+        if self._edge_rows[key] <= 0:
+            return
+        self._edge_rows[key] -= 1
+        if self._edge_rows[key] == 0:
+            del self._edge_rows[key]
+            self._adjacency.get(a, set()).discard(b)
+            self._adjacency.get(b, set()).discard(a)
+
+    def add_edge(self, a: int, b: int):
+        with self._lock:
+            self._generation += 1
+            if self._loaded:
+                self._add(a, b)
+
+    def remove_edge(self, a: int, b: int):
+        with self._lock:
+            self._generation += 1
+            if self._loaded:
+                self._remove(a, b)
+
+    def friends_of(self, db: Session, user_id: int) -> frozenset:
+        self.ensure_loaded(db)
+        return frozenset(self._adjacency.get(user_id, ()))
+
+    def suggestions(self, db: Session, user_id: int, limit: int = SUGGESTION_LIMIT, exclude=()):
+        """Prijatelji prijatelja rangirani po broju zajedničkih prijatelja.
+
+        BFS do dubine 2, ograničen brojem skeniranih prijatelja i bridova, pa
+        je trošak neovisan o veličini grafa. Vraća listu (user_id, mutual).
+        """
+        self.ensure_loaded(db)
+        friends = self._adjacency.get(user_id, set())
+        excluded = set(exclude)
+        excluded.add(user_id)
+        mutual = Counter()
+        edges_scanned = 0
+        for friend_id in itertools.islice(list(friends), SUGGESTION_MAX_FRIENDS_SCANNED):
+            neighbours = list(self._adjacency.get(friend_id, ()))
+            for candidate in neighbours:
+                if candidate not in friends and candidate not in excluded:
+                    mutual[candidate] += 1
+            edges_scanned += len(neighbours)
+            if edges_scanned >= SUGGESTION_MAX_EDGES_SCANNED:
+                break
+        return heapq.nlargest(limit, mutual.items(), key=lambda item: (item[1], -item[0]))
+
+
+friend_graph = FriendGraph()
+
+
+def are_friends(db: Session, a: int, b: int) -> bool:
+    """Prihvaćeno prijateljstvo u bilo kojem smjeru, uvijek iz baze.
+
+    Svaki EXISTS je jedan pogled u uq_friends_user_id_friend_id.
+    """
+    def accepted(user_id, friend_id):
+        return exists().where(
+            Friend.user_id == user_id,
+            Friend.friend_id == friend_id,
+            Friend.status == FriendshipStatus.accepted,
+        )
+
+    return db.query(or_(accepted(a, b), accepted(b, a))).scalar()
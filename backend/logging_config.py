@@ -0,0 +1,136 @@
+import atexit
+import contextvars
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+# Udio DEBUG zapisa koji se ipak zapisuju kad DEBUG nije uključen (0 = nijedan).
+# Uzorkovanje znači da se svaki logger.debug poziv mora izgraditi, pa je isključeno
+LOG_DEBUG_SAMPLE_RATE = float(os.getenv("LOG_DEBUG_SAMPLE_RATE", "0"))
+# Header X-Debug-Log s ovom vrijednošću uključuje sve DEBUG zapise za taj request;
+# ako varijabla nije postavljena, override je isključen
+LOG_DEBUG_TOKEN = os.getenv("LOG_DEBUG_TOKEN")
+LOG_DEBUG_HEADER = b"x-debug-log"
+LOG_QUEUE_SIZE = 10000
+LOG_FORMAT = "%(asctime)s %(levelname)s %(name)s: %(message)s"
+# Biblioteke koje na DEBUG razini pišu po svakom pozivu
+NOISY_LOGGERS = ("multipart", "python_multipart", "PIL", "sqlalchemy", "asyncio", "passlib", "aiosmtplib", "httpx")
+
+_request_debug = contextvars.ContextVar("request_debug", default=False)
+_listener = None
+_base_level = logging.INFO
+# Broj requestova s debug overrideom u tijeku; samo event loop ga mijenja
+_debug_requests = 0
+
+
+class _NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """Samo stavlja zapis u red; formatiranje i pisanje radi listener thread.
+
+    Kad je red pun zapis se odbacuje (i broji) umjesto da blokira request.
+    """
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record):
+        # Isti proces, nema potrebe za ranim formatiranjem (QueueHandler to inače radi)
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class _SamplingFilter(logging.Filter):
+    """Propušta zapise >= osnovne razine, sve zapise requesta s debug
+    overrideom, i uzorak ostalih DEBUG zapisa; ostalo ispod osnovne razine odbacuje."""
+
+    def __init__(self, level: int, sample_rate: float):
+        super().__init__()
+        self.level = level
+        self.sample_rate = sample_rate
+
+    def filter(self, record):
+        if record.levelno >= self.level or _request_debug.get():
+            return True
+        if record.levelno == logging.DEBUG:
+            return random.random() < self.sample_rate
+        return False
+
+
+def _root_level() -> int:
+    # DEBUG samo dok ga netko može propustiti (uzorak ili request s overrideom);
+    # inače logger.debug() staje na isEnabledFor bez gradnje zapisa
+    if LOG_DEBUG_SAMPLE_RATE > 0 or _debug_requests > 0:
+        return min(_base_level, logging.DEBUG)
+    return _base_level
+
+
+def setup_logging():
+    global _listener, _base_level
+    if _listener is not None:
+        return
+    base_level = logging.getLevelName(LOG_LEVEL)
+    if not isinstance(base_level, int):
+        base_level = logging.INFO
+    _base_level = base_level
+
+    stream_handler = logging.StreamHandler(sys.stderr)
+    stream_handler.setFormatter(logging.Formatter(LOG_FORMAT))
+
+    log_queue = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+    queue_handler = _NonBlockingQueueHandler(log_queue)
+    queue_handler.addFilter(_SamplingFilter(base_level, LOG_DEBUG_SAMPLE_RATE))
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(queue_handler)
+    root.setLevel(_root_level())
+    for name in NOISY_LOGGERS:
+        logging.getLogger(name).setLevel(max(base_level, logging.INFO))
+
+    _listener = logging.handlers.QueueListener(log_queue, stream_handler, respect_handler_level=True)
+    _listener.start()
+    atexit.register(shutdown_logging)
+
+
+def shutdown_logging():
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+class RequestDebugMiddleware:
+    """ASGI middleware: `X-Debug-Log: <LOG_DEBUG_TOKEN>` uključuje DEBUG za jedan request."""
+
+    def __init__(self, app):
+        self.app = app
+        self.token = LOG_DEBUG_TOKEN.encode() if LOG_DEBUG_TOKEN else None
+
+    async def __call__(self, scope, receive, send):
+        if self.token is None or scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        enabled = any(name == LOG_DEBUG_HEADER and value == self.token for name, value in scope["headers"])
+        if not enabled:
+            await self.app(scope, receive, send)
+            return
+        global _debug_requests
+        reset_token = _request_debug.set(True)
+        _debug_requests += 1
+        logging.getLogger().setLevel(_root_level())
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _debug_requests -= 1
+            logging.getLogger().setLevel(_root_level())
+            _request_debug.reset(reset_token)
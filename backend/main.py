@@ -1,5 +1,5 @@
 import logging
-from fastapi import FastAPI, Request, Depends, Response
+from fastapi import FastAPI, Depends, Response
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi_csrf_protect import CsrfProtect
 from pydantic import BaseModel
@@ -10,6 +10,18 @@ from fastapi.staticfiles import StaticFiles
 from routers import auth  # Ensure your auth router is imported correctly
 from routers import friends
 from routers import trips
+from routers import catalog as catalog_router
+from routers import planner
+import media_variants
+from csrf import CSRFMiddleware
+from logging_config import setup_logging, shutdown_logging, RequestDebugMiddleware
+from password_service import password_hasher
+from email_outbox import outbox_sender
+from catalog import catalog
+from migrations import run_migrations
+from database import async_engine, engine
+import metrics
+from metrics import MetricsMiddleware
 
 
 # Define CSRF configuration
@@ -19,8 +31,8 @@ class CsrfSettings(BaseModel):
 # Initialize FastAPI app
 app = FastAPI()
 
-# Configure logging at DEBUG level
-logging.basicConfig(level=logging.DEBUG)
+# Logging ide kroz QueueHandler/QueueListener (vidi logging_config.py)
+setup_logging()
 logger = logging.getLogger(__name__)
 
 # Add CORS middleware – allow requests from your frontend
@@ -32,8 +44,19 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag"],
 )
 
+# CSRF zaštita (čisti ASGI middleware, vidi csrf.py); dodan nakon CORS-a,
+# pa je vanjski sloj kao i prijašnji @app.middleware("http")
+app.add_middleware(CSRFMiddleware)
+
+# X-Debug-Log header uključuje DEBUG logove za jedan request
+app.add_middleware(RequestDebugMiddleware)
+
+# Vanjski sloj: latencija po ruti uključuje i CSRF/CORS obradu (vidi metrics.py)
+app.add_middleware(MetricsMiddleware)
+
 # Load CSRF settings using fastapi-csrf-protect
 @CsrfProtect.load_config
 def get_csrf_config():
@@ -43,8 +66,43 @@ def get_csrf_config():
 app.include_router(auth.router, prefix="/api/auth")
 app.include_router(friends.router, prefix="/api/friends", tags=["friends"])
 app.include_router(trips.router, prefix="/api", tags=["trips"])
+app.include_router(catalog_router.router, prefix="/api/catalog", tags=["catalog"])
+app.include_router(planner.router, prefix="/api/planner", tags=["planner"])
+# Prometheus metrike (/metrics, vidi metrics.py)
+app.include_router(metrics.router)
+# Slike profila (i varijante ?w=&fmt=) prije generičkog /media mounta
+app.include_router(media_variants.router)
 app.mount("/media", StaticFiles(directory="media"), name="media")
 
+# Bcrypt process pool (spawn) se pravi pri startupu, ne na prvom loginu
+@app.on_event("startup")
+def start_password_hasher():
+    password_hasher.start()
+
+# Shema baze se održava migracijama (vidi migrations/)
+@app.on_event("startup")
+def apply_migrations():
+    run_migrations(engine)
+
+# Pokreni worker koji šalje emailove iz outboxa
+@app.on_event("startup")
+async def start_outbox_sender():
+    outbox_sender.start()
+
+# Učitaj katalog i pokreni provjeru promjena izvornih datoteka (hot-reload)
+@app.on_event("startup")
+async def start_catalog():
+    await catalog.start()
+
+# Ugasi bcrypt process pool, pozadinske workere i async pool konekcija pri gašenju aplikacije
+@app.on_event("shutdown")
+async def shutdown_workers():
+    password_hasher.shutdown()
+    await outbox_sender.stop()
+    await catalog.stop()
+    await async_engine.dispose()
+    shutdown_logging()
+
 # CSRF token endpoint: generate token and set it in a cookie manually
 @app.get("/api/csrf-token")
 def get_csrf_token(response: Response, csrf_protect: CsrfProtect = Depends()):
@@ -53,7 +111,7 @@ def get_csrf_token(response: Response, csrf_protect: CsrfProtect = Depends()):
     # Generate tokens (this returns a tuple)
     tokens = csrf_protect.generate_csrf_tokens()
     csrf_token = tokens[0]  # Extract the first token from the tuple
-    logger.debug(f"Generated CSRF tokens: {tokens}")
+    logger.debug("Generated CSRF token pair")
     
     # Create a JSONResponse and manually set the cookie.
     json_response = JSONResponse(content={"csrf_token": csrf_token})
@@ -67,38 +125,3 @@ def get_csrf_token(response: Response, csrf_protect: CsrfProtect = Depends()):
     
     return json_response
 
-# CSRF protection middleware
-@app.middleware("http")
-async def csrf_protect_middleware(request: Request, call_next):
-    logger.info(f"Request method: {request.method}, URL: {request.url}")
-    
-    # For state-changing methods, check the CSRF token.
-    if request.method in ["POST", "PUT", "DELETE"]:
-        csrf_protect = CsrfProtect()  # Initialize CSRF protection
-        csrf_header = request.headers.get("X-CSRF-Token")
-        csrf_cookie = request.cookies.get("fastapi-csrf-token")
-        
-        # Log tokens for debugging.
-        logger.debug(f"CSRF token from header: {csrf_header}")
-        logger.debug(f"CSRF token from cookie: {csrf_cookie}")
-        
-        if not csrf_header:
-            logger.error("CSRF token is missing in header")
-            return JSONResponse(status_code=403, content={"detail": "CSRF token is missing in header"})
-        
-        # If tokens are in a comma-separated (tuple-like) string, extract the first element.
-        if csrf_header and ',' in csrf_header:
-            csrf_header = csrf_header.split(',')[0]
-            logger.debug(f"Extracted header token: {csrf_header}")
-        if csrf_cookie and ',' in csrf_cookie:
-            csrf_cookie = csrf_cookie.split(',')[0]
-            logger.debug(f"Extracted cookie token: {csrf_cookie}")
-        
-        if csrf_header != csrf_cookie:
-            logger.error("CSRF token validation failed. Header token does not match cookie token.")
-            return JSONResponse(status_code=403, content={"detail": "CSRF token validation failed"})
-        
-        logger.info("CSRF token validated successfully")
-    
-    response = await call_next(request)
-    return response
\ No newline at end of file
@@ -0,0 +1,235 @@
+import hashlib
+import os
+import tempfile
+
+from fastapi import HTTPException, Request, status
+from fastapi.concurrency import run_in_threadpool
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+try:
+    from python_multipart.exceptions import MultipartParseError
+    from python_multipart.multipart import MultipartParser, parse_options_header
+except ModuleNotFoundError:  # starija imena paketa python-multipart
+    from multipart.exceptions import MultipartParseError
+    from multipart.multipart import MultipartParser, parse_options_header
+
+MEDIA_ROOT = "media"
+# Privremene datoteke (upload, kodiranje, varijante) su izvan MEDIA_ROOT-a pa
+# ih /media mount nikad ne posluži; mora biti na istom disku zbog os.replace
+MEDIA_TMP_DIR = os.getenv("MEDIA_TMP_DIR", "media_tmp")
+PROFILE_IMAGE_DIR = os.path.join(MEDIA_ROOT, "profile_images")
+PROFILE_IMAGE_URL_PREFIX = "/media/profile_images/"
+PROFILE_IMAGE_FIELD = "image"
+PROFILE_IMAGE_MAX_BYTES = 5 * 1024 * 1024
+PROFILE_IMAGE_MAX_PIXELS = 4096 * 4096
+PROFILE_IMAGE_ALLOWED_FORMATS = {"JPEG", "PNG", "WEBP", "GIF"}
+PROFILE_IMAGE_JPEG_QUALITY = 88
+# /upload-profile-image čita tijelo sam (Request), pa polje opisujemo ručno
+PROFILE_IMAGE_UPLOAD_OPENAPI = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            "multipart/form-data": {
+                "schema": {
+                    "type": "object",
+                    "required": [PROFILE_IMAGE_FIELD],
+                    "properties": {PROFILE_IMAGE_FIELD: {"type": "string", "format": "binary"}},
+                }
+            }
+        },
+    }
+}
+# Rezerva za multipart zaglavlja i granice oko same datoteke
+MULTIPART_OVERHEAD_BYTES = 16 * 1024
+
+# Zaštita od "decompression bomb" slika
+Image.MAX_IMAGE_PIXELS = PROFILE_IMAGE_MAX_PIXELS
+
+
+def _too_large() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+        detail=f"Image is larger than {PROFILE_IMAGE_MAX_BYTES // (1024 * 1024)} MB",
+    )
+
+
+def _invalid_image() -> HTTPException:
+    return HTTPException(status_code=400, detail="Uploaded file is not a supported image")
+
+
+class _UploadTarget:
+    """Privremena datoteka u koju se sprema dio forme s imenom `image`."""
+
+    def __init__(self):
+        self.file = None
+        self.size = 0
+
+    async def open(self):
+        await run_in_threadpool(os.makedirs, MEDIA_TMP_DIR, exist_ok=True)
+        self.file = await run_in_threadpool(
+            tempfile.NamedTemporaryFile, dir=MEDIA_TMP_DIR, prefix="upload-", delete=False
+        )
+
+    async def write(self, data: bytes):
+        self.size += len(data)
+        if self.size > PROFILE_IMAGE_MAX_BYTES:
+            raise _too_large()
+        await run_in_threadpool(self.file.write, data)
+
+    async def close(self):
+        if self.file is not None and not self.file.closed:
+            await run_in_threadpool(self.file.close)
+
+    async def discard(self):
+        await self.close()
+        if self.file is not None:
+            await run_in_threadpool(_remove_quietly, self.file.name)
+
+
+def _remove_quietly(path: str):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def _sha256_file(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _reencode_image(source_path: str) -> str:
+    """Provjeri sliku, ponovno je kodiraj (bez EXIF-a) i spremi pod sha256 kodiranog sadržaja.
+
+    Ime je hash onoga što se stvarno poslužuje, pa ista slika uvijek dobije
+    istu datoteku, a sadržaj datoteke uvijek odgovara imenu.
+    """
+    os.makedirs(MEDIA_TMP_DIR, exist_ok=True)
+    encoded = None
+    try:
+        try:
+            with Image.open(source_path) as img:
+                if img.format not in PROFILE_IMAGE_ALLOWED_FORMATS:
+                    raise _invalid_image()
+                width, height = img.size
+                if width * height > PROFILE_IMAGE_MAX_PIXELS:
+                    raise _invalid_image()
+                img.verify()
+            # verify() ostavlja sliku neupotrebljivom, pa je otvaramo ponovno
+            with Image.open(source_path) as img:
+                img = ImageOps.exif_transpose(img)
+                has_alpha = img.mode in ("RGBA", "LA") or (img.mode == "P" and "transparency" in img.info)
+                if has_alpha:
+                    img = img.convert("RGBA")
+                    ext, save_kwargs = ".png", {"format": "PNG", "optimize": True}
+                else:
+                    img = img.convert("RGB")
+                    ext, save_kwargs = ".jpg", {
+                        "format": "JPEG", "quality": PROFILE_IMAGE_JPEG_QUALITY, "optimize": True,
+                    }
+                with tempfile.NamedTemporaryFile(dir=MEDIA_TMP_DIR, prefix="encode-", delete=False) as out:
+                    encoded = out.name
+                    img.save(out, **save_kwargs)
+        except (UnidentifiedImageError, Image.DecompressionBombError, OSError, SyntaxError, ValueError):
+            raise _invalid_image()
+        filename = _sha256_file(encoded) + ext
+        os.makedirs(PROFILE_IMAGE_DIR, exist_ok=True)
+        # Atomski: /media nikad ne vidi napola zapisanu datoteku; ako ista
+        # slika već postoji, zamjena je istim sadržajem
+        os.replace(encoded, os.path.join(PROFILE_IMAGE_DIR, filename))
+        encoded = None
+    finally:
+        if encoded is not None:
+            _remove_quietly(encoded)
+    return filename
+
+
+async def save_profile_image(request: Request) -> str:
+    """Streaming upload slike profila; vraća URL pod /media.
+
+    Tijelo zahtjeva čita se u komadima i parsira usput, veličina se provjerava
+    odmah (Content-Length i brojanjem bajtova), a pisanje na disk i Pillow rade
+    izvan event loopa. Iste slike dijele jednu datoteku (ime = sha256 kodirane slike).
+    """
+    content_length = request.headers.get("content-length")
+    if content_length and content_length.isdigit() and int(content_length) > PROFILE_IMAGE_MAX_BYTES + MULTIPART_OVERHEAD_BYTES:
+        raise _too_large()
+
+    content_type, params = parse_options_header(request.headers.get("content-type", ""))
+    boundary = params.get(b"boundary")
+    if content_type != b"multipart/form-data" or not boundary:
+        raise HTTPException(status_code=400, detail="Expected multipart/form-data")
+
+    # Callbackovi parsera su sinkroni; skupljamo događaje pa ih obrađujemo async
+    events = []
+    header_field = bytearray()
+    header_value = bytearray()
+    part_headers = {}
+
+    def on_header_field(data, start, end):
+        header_field.extend(data[start:end])
+
+    def on_header_value(data, start, end):
+        header_value.extend(data[start:end])
+
+    def on_header_end():
+        part_headers[bytes(header_field).lower()] = bytes(header_value)
+        header_field.clear()
+        header_value.clear()
+
+    def on_headers_finished():
+        events.append(("begin", dict(part_headers)))
+        part_headers.clear()
+
+    def on_part_data(data, start, end):
+        events.append(("data", bytes(data[start:end])))
+
+    def on_part_end():
+        events.append(("end", None))
+
+    parser = MultipartParser(boundary, {
+        "on_header_field": on_header_field,
+        "on_header_value": on_header_value,
+        "on_header_end": on_header_end,
+        "on_headers_finished": on_headers_finished,
+        "on_part_data": on_part_data,
+        "on_part_end": on_part_end,
+    })
+
+    target = _UploadTarget()
+    in_image_part = False
+    found = False
+    received = 0
+    try:
+        # Neispravno tijelo (pogrešna granica, prekinut zapis) je greška klijenta
+        try:
+            async for chunk in request.stream():
+                received += len(chunk)
+                if received > PROFILE_IMAGE_MAX_BYTES + MULTIPART_OVERHEAD_BYTES:
+                    raise _too_large()
+                parser.write(chunk)
+                for kind, payload in events:
+                    if kind == "begin":
+                        _, disposition = parse_options_header(payload.get(b"content-disposition", b""))
+                        in_image_part = not found and disposition.get(b"name") == PROFILE_IMAGE_FIELD.encode()
+                        if in_image_part:
+                            await target.open()
+                    elif kind == "data" and in_image_part:
+                        await target.write(payload)
+                    elif kind == "end" and in_image_part:
+                        in_image_part = False
+                        found = True
+                events.clear()
+            parser.finalize()
+        except MultipartParseError:
+            raise HTTPException(status_code=400, detail="Malformed multipart body")
+        if not found or target.size == 0:
+            raise HTTPException(status_code=400, detail="No image uploaded")
+        await target.close()
+        filename = await run_in_threadpool(_reencode_image, target.file.name)
+    finally:
+        await target.discard()
+    return PROFILE_IMAGE_URL_PREFIX + filename
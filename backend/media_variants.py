@@ -0,0 +1,188 @@
+import asyncio
+import hashlib
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+from fastapi import APIRouter, HTTPException, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import FileResponse
+from PIL import Image, ImageOps
+
+from media_storage import MEDIA_ROOT, MEDIA_TMP_DIR, PROFILE_IMAGE_DIR
+
+VARIANT_DIR = os.path.join(MEDIA_ROOT, "variants")
+VARIANT_CACHE_MAX_BYTES = 256 * 1024 * 1024
+# Dopuštene širine, da se cache ne može napuniti proizvoljnim veličinama
+VARIANT_WIDTHS = (32, 48, 64, 96, 128, 256, 512)
+VARIANT_FORMATS = {
+    "webp": ("WEBP", "image/webp", {"quality": 80, "method": 4}),
+    "jpeg": ("JPEG", "image/jpeg", {"quality": 85, "optimize": True}),
+    "png": ("PNG", "image/png", {"optimize": True}),
+}
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+router = APIRouter()
+
+
+class VariantCache:
+    """LRU evidencija generiranih varijanti na disku, ograničena ukupnom veličinom."""
+
+    def __init__(self, directory: str = VARIANT_DIR, max_bytes: int = VARIANT_CACHE_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self._entries = None
+        self._lock = threading.Lock()
+
+    def _load(self):
+        # Pri prvom korištenju preuzmi postojeće datoteke, najstarije prve
+        os.makedirs(self.directory, exist_ok=True)
+        files = []
+        for entry in os.scandir(self.directory):
+            if entry.is_file() and not entry.name.startswith("."):
+                stat = entry.stat()
+                files.append((stat.st_mtime, entry.path, stat.st_size))
+        files.sort()
+        self._entries = OrderedDict((path, size) for _, path, size in files)
+        self.total_bytes = sum(self._entries.values())
+
+    def lookup(self, path: str) -> bool:
+        with self._lock:
+            if self._entries is None:
+                self._load()
+            if path not in self._entries:
+                return False
+            self._entries.move_to_end(path)
+        try:
+            # mtime služi kao redoslijed korištenja nakon restarta
+            os.utime(path)
+        except FileNotFoundError:
+            with self._lock:
+                self.total_bytes -= self._entries.pop(path, 0)
+            return False
+        return True
+
+    def add(self, path: str, size: int):
+        evicted = []
+        with self._lock:
+            if self._entries is None:
+                self._load()
+            self.total_bytes -= self._entries.pop(path, 0)
+            self._entries[path] = size
+            self.total_bytes += size
+            while self.total_bytes > self.max_bytes and len(self._entries) > 1:
+                old_path, old_size = self._entries.popitem(last=False)
+                self.total_bytes -= old_size
+                evicted.append(old_path)
+        for old_path in evicted:
+            try:
+                os.remove(old_path)
+            except FileNotFoundError:
+                pass
+
+
+variant_cache = VariantCache()
+# target -> [Lock, broj requestova koji ga drže ili čekaju]; unos se briše tek
+# kad ga nitko ne koristi, inače bi novi request dobio drugi lock i generirao paralelno
+_generation_locks = {}
+
+
+def _source_path(filename: str) -> str:
+    if os.path.basename(filename) != filename or filename.startswith("."):
+        raise HTTPException(status_code=404, detail="Not found")
+    return os.path.join(PROFILE_IMAGE_DIR, filename)
+
+
+def _digest(*parts) -> str:
+    return hashlib.sha1(":".join(str(part) for part in parts).encode()).hexdigest()
+
+
+def _not_modified(request: Request, etag: str) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return False
+    return if_none_match.strip() == "*" or etag in [tag.strip() for tag in if_none_match.split(",")]
+
+
+def _render_variant(source: str, target: str, width: Optional[int], fmt: str) -> int:
+    pil_format, _, save_kwargs = VARIANT_FORMATS[fmt]
+    with Image.open(source) as img:
+        img = ImageOps.exif_transpose(img)
+        if width and img.width > width:
+            height = max(1, round(img.height * width / img.width))
+            img = img.resize((width, height), Image.LANCZOS)
+        if pil_format == "JPEG":
+            img = img.convert("RGB")
+        elif img.mode not in ("RGB", "RGBA"):
+            img = img.convert("RGBA")
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        os.makedirs(MEDIA_TMP_DIR, exist_ok=True)
+        with tempfile.NamedTemporaryFile(dir=MEDIA_TMP_DIR, prefix="variant-", delete=False) as out:
+            try:
+                img.save(out, format=pil_format, **save_kwargs)
+            except BaseException:
+                out.close()
+                os.remove(out.name)
+                raise
+    os.replace(out.name, target)
+    return os.path.getsize(target)
+
+
+async def _ensure_variant(source: str, target: str, width: Optional[int], fmt: str):
+    if variant_cache.lookup(target):
+        return
+    # Jedan generator po varijanti; ostali čekaju isti rezultat
+    entry = _generation_locks.get(target)
+    if entry is None:
+        entry = _generation_locks[target] = [asyncio.Lock(), 0]
+    entry[1] += 1
+    try:
+        async with entry[0]:
+            if variant_cache.lookup(target):
+                return
+            size = await run_in_threadpool(_render_variant, source, target, width, fmt)
+            variant_cache.add(target, size)
+    finally:
+        entry[1] -= 1
+        if entry[1] == 0:
+            del _generation_locks[target]
+
+
+@router.get("/media/profile_images/{filename}")
+async def get_profile_image(filename: str, request: Request, w: Optional[int] = None, fmt: Optional[str] = None):
+    """Slika profila u originalu ili kao smanjena/WebP varijanta (?w=64&fmt=webp)."""
+    if w is not None and w not in VARIANT_WIDTHS:
+        raise HTTPException(status_code=400, detail=f"Width must be one of {list(VARIANT_WIDTHS)}")
+    if fmt is not None and fmt not in VARIANT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Format must be one of {list(VARIANT_FORMATS)}")
+
+    source = _source_path(filename)
+    try:
+        stat = await run_in_threadpool(os.stat, source)
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="Not found")
+    headers = {"Cache-Control": IMMUTABLE_CACHE_CONTROL}
+
+    if w is None and fmt is None:
+        etag = f'"{_digest(filename, stat.st_size, stat.st_mtime_ns)}"'
+        headers["ETag"] = etag
+        if _not_modified(request, etag):
+            return Response(status_code=304, headers=headers)
+        return FileResponse(source, headers=headers)
+
+    fmt = fmt or "webp"
+    digest = _digest(filename, stat.st_size, stat.st_mtime_ns, w or "orig", fmt)
+    etag = f'"{digest}"'
+    headers["ETag"] = etag
+    if _not_modified(request, etag):
+        return Response(status_code=304, headers=headers)
+
+    target = os.path.join(VARIANT_DIR, f"{filename}.{digest[:16]}.w{w or 0}.{fmt}")
+    try:
+        await _ensure_variant(source, target, w, fmt)
+    except (OSError, ValueError):
+        raise HTTPException(status_code=415, detail="Image cannot be converted")
+    return FileResponse(target, media_type=VARIANT_FORMATS[fmt][1], headers=headers)
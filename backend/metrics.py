@@ -0,0 +1,279 @@
+"""Prometheus metrike procesa u tekstualnom formatu (/metrics), bez vanjske biblioteke.
+
+- latencija i broj requestova po ruti: labela je predložak putanje
+  (/api/trips/{trip_id}), ne stvarna putanja, pa je broj serija ograničen
+  brojem ruta; sve što ne pogodi rutu (404, /media) ide pod OTHER_ROUTE;
+- broj i trajanje SQL naredbi po requestu: engine eventi zbrajaju u objekt
+  trenutnog requesta (contextvar - prenosi se i u run_sync i u threadpool);
+- checkout konekcije iz poola (TimedQueuePool/TimedAsyncQueuePool) i
+  zauzeće poolova i AnyIO threadpoola u trenutku scrapea.
+
+Endpoint je `router` (main.py); s METRICS_TOKEN traži Bearer token.
+
+Vrući put po requestu su dva perf_counter() i bisect po granicama; po SQL
+naredbi dva perf_counter() i par zbrajanja. Svaki uvicorn worker ima svoje
+brojače (kao principal_cache) - Prometheus mora scrapeati svaki proces.
+"""
+import bisect
+import contextvars
+import hmac
+import os
+import threading
+import time
+
+import anyio.to_thread
+from fastapi import APIRouter, HTTPException, Request
+from sqlalchemy import event
+from starlette.responses import PlainTextResponse
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+METRICS_PATH = "/metrics"
+# Ako je postavljen, /metrics traži "Authorization: Bearer <METRICS_TOKEN>"
+METRICS_TOKEN = os.getenv("METRICS_TOKEN")
+CONTENT_TYPE = "text/plain; version=0.0.4"
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+SQL_STATEMENT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+SQL_TIME_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5)
+POOL_CHECKOUT_BUCKETS = (0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5, 30)
+
+OTHER_ROUTE = "<other>"
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names, values, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Counter:
+    def __init__(self, name: str, help: str, labels=()):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, labels=()):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self, lines: list):
+        lines.append(f"# HELP {self.name} {self.help}")
+        lines.append(f"# TYPE {self.name} counter")
+        with self._lock:
+            values = sorted(self._values.items())
+        for labels, value in values:
+            lines.append(f"{self.name}{_format_labels(self.labels, labels)} {value}")
+
+
+class Histogram:
+    """Fiksne granice; po seriji labela brojač po bucketu (+Inf zadnji) i zbroj."""
+
+    def __init__(self, name: str, help: str, buckets, labels=()):
+        self.name = name
+        self.help = help
+        self.buckets = tuple(float(bound) for bound in buckets)
+        self.labels = labels
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, labels=()):
+        # Prvi bucket s granicom >= value (Prometheus "le")
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    def render(self, lines: list):
+        lines.append(f"# HELP {self.name} {self.help}")
+        lines.append(f"# TYPE {self.name} histogram")
+        with self._lock:
+            series = sorted((labels, list(counts), total) for labels, (counts, total) in self._series.items())
+        bounds = [repr(bound) for bound in self.buckets] + ["+Inf"]
+        for labels, counts, total in series:
+            cumulative = 0
+            for bound, count in zip(bounds, counts):
+                cumulative += count
+                le = 'le="' + bound + '"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labels, labels, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labels, labels)} {total}")
+            lines.append(f"{self.name}_count{_format_labels(self.labels, labels)} {cumulative}")
+
+
+REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds", "HTTP request latency by route.", LATENCY_BUCKETS, ("method", "route")
+)
+REQUESTS_TOTAL = Counter("http_requests_total", "HTTP requests by route and status.", ("method", "route", "status"))
+REQUEST_SQL_STATEMENTS = Histogram(
+    "http_request_sql_statements", "SQL statements executed per request.", SQL_STATEMENT_BUCKETS, ("method", "route")
+)
+REQUEST_SQL_SECONDS = Histogram(
+    "http_request_sql_seconds", "Time spent in SQL statements per request.", SQL_TIME_BUCKETS, ("method", "route")
+)
+SQL_STATEMENTS_TOTAL = Counter("db_sql_statements_total", "SQL statements executed (including background work).")
+SQL_SECONDS_TOTAL = Counter("db_sql_seconds_total", "Time spent in SQL statements (including background work).")
+POOL_CHECKOUT_SECONDS = Histogram(
+    "db_pool_checkout_seconds", "Time to check out a pooled connection (wait, new connection, pre-ping).",
+    POOL_CHECKOUT_BUCKETS, ("pool",),
+)
+THREADPOOL_SATURATED_TOTAL = Counter(
+    "threadpool_saturated_requests_total", "Requests that started while all AnyIO worker threads were busy."
+)
+
+# Samo event loop mijenja ovu vrijednost (middleware), lock nije potreban
+_in_flight = 0
+_request_stats = contextvars.ContextVar("request_sql_stats", default=None)
+_engines = {}
+
+
+class _RequestStats:
+    __slots__ = ("statements", "sql_seconds")
+
+    def __init__(self):
+        self.statements = 0
+        self.sql_seconds = 0.0
+
+
+# Konekcija izvršava jednu naredbu u isto vrijeme; naredba koja pukne samo
+# ne bude izbrojena (after_cursor_execute se tada ne zove)
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info["metrics_query_start"] = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info.pop("metrics_query_start")
+    SQL_STATEMENTS_TOTAL.inc()
+    SQL_SECONDS_TOTAL.inc(elapsed)
+    stats = _request_stats.get()
+    if stats is not None:
+        stats.statements += 1
+        stats.sql_seconds += elapsed
+
+
+def instrument_engine(engine, name: str):
+    """Brojanje SQL naredbi i zauzeće poola za Engine (async: `async_engine.sync_engine`)."""
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    _engines[name] = engine
+
+
+class TimedQueuePool(QueuePool):
+    """QueuePool koji mjeri checkout; `poolclass=` u database.py."""
+
+    metrics_name = "sync"
+
+    def connect(self):
+        start = time.perf_counter()
+        try:
+            return super().connect()
+        finally:
+            POOL_CHECKOUT_SECONDS.observe(time.perf_counter() - start, (self.metrics_name,))
+
+
+class TimedAsyncQueuePool(AsyncAdaptedQueuePool):
+    """Isto za async engine; connect() se izvršava u greenletu, vrijeme uključuje await."""
+
+    metrics_name = "async"
+
+    def connect(self):
+        start = time.perf_counter()
+        try:
+            return super().connect()
+        finally:
+            POOL_CHECKOUT_SECONDS.observe(time.perf_counter() - start, (self.metrics_name,))
+
+
+class MetricsMiddleware:
+    """ASGI middleware: latencija, status, in-flight i SQL po requestu."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        global _in_flight
+        if scope["type"] != "http" or scope["path"] == METRICS_PATH:
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        limiter = anyio.to_thread.current_default_thread_limiter()
+        if limiter.borrowed_tokens >= limiter.total_tokens:
+            THREADPOOL_SATURATED_TOTAL.inc()
+        stats = _RequestStats()
+        reset_token = _request_stats.set(stats)
+        _in_flight += 1
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            _in_flight -= 1
+            _request_stats.reset(reset_token)
+            # Router upisuje pogođenu rutu u isti scope (FastAPI APIRoute)
+            route = getattr(scope.get("route"), "path", None) or OTHER_ROUTE
+            method = scope["method"]
+            REQUEST_SECONDS.observe(elapsed, (method, route))
+            REQUESTS_TOTAL.inc(labels=(method, route, str(status_code)))
+            REQUEST_SQL_STATEMENTS.observe(stats.statements, (method, route))
+            REQUEST_SQL_SECONDS.observe(stats.sql_seconds, (method, route))
+
+
+def _gauge(lines: list, name: str, help: str, samples):
+    lines.append(f"# HELP {name} {help}")
+    lines.append(f"# TYPE {name} gauge")
+    for labels, value in samples:
+        lines.append(f"{name}{labels} {value}")
+
+
+def render_metrics() -> str:
+    """Tekst za /metrics; zove se iz event loopa (AnyIO limiter je vezan uz loop)."""
+    lines = []
+    for metric in (
+        REQUEST_SECONDS, REQUESTS_TOTAL, REQUEST_SQL_STATEMENTS, REQUEST_SQL_SECONDS,
+        SQL_STATEMENTS_TOTAL, SQL_SECONDS_TOTAL, POOL_CHECKOUT_SECONDS, THREADPOOL_SATURATED_TOTAL,
+    ):
+        metric.render(lines)
+    _gauge(lines, "http_requests_in_flight", "Requests currently being handled.", [("", _in_flight)])
+
+    # engine.pool je uvijek trenutni pool (i nakon dispose/recreate)
+    pools = [(_format_labels(("pool",), (name,)), engine.pool) for name, engine in sorted(_engines.items())]
+    pools = [(labels, pool) for labels, pool in pools if isinstance(pool, QueuePool)]
+    _gauge(lines, "db_pool_size", "Configured pool size.", [(labels, pool.size()) for labels, pool in pools])
+    _gauge(lines, "db_pool_checked_out", "Connections currently checked out.", [(labels, pool.checkedout()) for labels, pool in pools])
+    _gauge(lines, "db_pool_checked_in", "Idle connections in the pool.", [(labels, pool.checkedin()) for labels, pool in pools])
+    _gauge(lines, "db_pool_overflow", "Overflow connections (negative while below pool size).", [(labels, pool.overflow()) for labels, pool in pools])
+
+    statistics = anyio.to_thread.current_default_thread_limiter().statistics()
+    _gauge(lines, "threadpool_threads_total", "AnyIO worker thread limit.", [("", statistics.total_tokens)])
+    _gauge(lines, "threadpool_threads_busy", "AnyIO worker threads in use.", [("", statistics.borrowed_tokens)])
+    _gauge(lines, "threadpool_tasks_waiting", "Tasks waiting for an AnyIO worker thread.", [("", statistics.tasks_waiting)])
+    return "\n".join(lines) + "\n"
+
+
+router = APIRouter()
+
+
+# Prometheus metrike (tekstualni format); s METRICS_TOKEN traži Bearer token
+@router.get(METRICS_PATH, include_in_schema=False)
+async def get_metrics(request: Request):
+    if METRICS_TOKEN and not hmac.compare_digest(
+        request.headers.get("authorization", ""), f"Bearer {METRICS_TOKEN}"
+    ):
+        raise HTTPException(status_code=401, detail="Not authenticated")
+    return PlainTextResponse(render_metrics(), media_type=CONTENT_TYPE)
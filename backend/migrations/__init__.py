@@ -0,0 +1,52 @@
+"""Verzionirane migracije sheme.
+
+Svaka migracija je modul `vNNNN_<ime>.py` u ovom paketu s funkcijom
+`upgrade(conn)`. Primijenjene verzije bilježe se u tablici schema_migrations;
+pokreće se pri startu aplikacije ili ručno s `python -m migrations`.
+"""
+import datetime
+import importlib
+import logging
+import pkgutil
+import re
+
+from sqlalchemy import text
+
+logger = logging.getLogger(__name__)
+
+# Ključ za pg_advisory_xact_lock, da dva procesa ne migriraju istovremeno
+MIGRATION_LOCK_KEY = 80420001
+
+_MODULE_NAME = re.compile(r"^v(\d{4})_(\w+)$")
+
+
+def discover():
+    migrations = []
+    for module_info in pkgutil.iter_modules(__path__):
+        match = _MODULE_NAME.match(module_info.name)
+        if match:
+            module = importlib.import_module(f"{__name__}.{module_info.name}")
+            migrations.append((int(match.group(1)), match.group(2), module))
+    migrations.sort(key=lambda migration: migration[0])
+    return migrations
+
+
+def run_migrations(engine):
+    """Primijeni sve migracije koje još nisu primijenjene, u jednoj transakciji."""
+    with engine.begin() as conn:
+        if conn.dialect.name == "postgresql":
+            conn.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": MIGRATION_LOCK_KEY})
+        conn.execute(text(
+            "CREATE TABLE IF NOT EXISTS schema_migrations ("
+            "version INTEGER PRIMARY KEY, name VARCHAR(255) NOT NULL, applied_at TIMESTAMP NOT NULL)"
+        ))
+        applied = {row[0] for row in conn.execute(text("SELECT version FROM schema_migrations"))}
+        for version, name, module in discover():
+            if version in applied:
+                continue
+            logger.info("Applying migration %04d_%s", version, name)
+            module.upgrade(conn)
+            conn.execute(
+                text("INSERT INTO schema_migrations (version, name, applied_at) VALUES (:version, :name, :applied_at)"),
+                {"version": version, "name": name, "applied_at": datetime.datetime.utcnow()},
+            )
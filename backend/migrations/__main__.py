@@ -0,0 +1,7 @@
+import logging
+
+from database import engine
+from migrations import run_migrations
+
+logging.basicConfig(level=logging.INFO)
+run_migrations(engine)
@@ -0,0 +1,87 @@
+"""Početna shema, zamrznuta kakva je bila prije migracija (postojeće tablice se preskaču).
+
+Tablice su ovdje prepisane umjesto da se uzimaju iz models.py: kasnije
+migracije (indeksi, kaskade, Date stupci...) pretpostavljaju ovo stanje, a
+modeli se s vremenom mijenjaju. email_outbox je dio početne sheme jer ga je
+import-time create_all kreirao prije uvođenja migracija.
+"""
+from sqlalchemy import (
+    Boolean, Column, DateTime, Enum, Float, ForeignKey, Index, Integer, MetaData, String, Table, Text,
+)
+from sqlalchemy.dialects.postgresql import JSON
+
+metadata = MetaData()
+
+Table(
+    "users", metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("username", String(255), unique=True, index=True, nullable=False),
+    Column("email", String(255), unique=True, index=True, nullable=False),
+    Column("hashed_password", String(255), nullable=False),
+    Column("role", String(50)),
+    Column("is_active", Boolean),
+    Column("is_email_verified", Boolean),
+    Column("created_at", DateTime),
+    Column("otp_secret", String(255), nullable=True),
+    Column("profile_image", String(255), nullable=True),
+)
+
+Table(
+    "friends", metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("user_id", Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False),
+    Column("friend_id", Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False),
+    Column("status", Enum("pending", "accepted", "rejected", name="friendshipstatus"), nullable=False),
+    Column("created_at", DateTime),
+)
+
+Table(
+    "trips", metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("user_id", Integer, ForeignKey("users.id")),
+    Column("name", String),
+    Column("start_date", String),
+    Column("end_date", String),
+    Column("transport_type", String),
+    Column("transport_option", JSON),
+    Column("accommodation", JSON, nullable=True),
+    Column("flight", JSON, nullable=True),
+    Column("total_cost", Float, nullable=False),
+)
+
+Table(
+    "shared_trips", metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("trip_id", Integer, ForeignKey("trips.id")),
+    Column("shared_with_id", Integer, ForeignKey("users.id")),
+    Column("shared_by_id", Integer, ForeignKey("users.id")),
+    Column("shared_at", DateTime),
+)
+
+Table(
+    "shared_trip_feedback", metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("shared_trip_id", Integer, ForeignKey("shared_trips.id")),
+    Column("rating", Integer),
+    Column("comment", String),
+    Column("created_by_id", Integer, ForeignKey("users.id")),
+)
+
+Table(
+    "email_outbox", metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("recipient", String(255), nullable=False),
+    Column("subject", String(255), nullable=False),
+    Column("body", Text, nullable=False),
+    Column("status", Enum("pending", "sent", "dead", name="emailstatus"), nullable=False),
+    Column("attempts", Integer, nullable=False),
+    Column("next_attempt_at", DateTime, nullable=False),
+    Column("last_error", String(1000), nullable=True),
+    Column("created_at", DateTime),
+    Column("sent_at", DateTime, nullable=True),
+    Index("ix_email_outbox_status_next_attempt_at", "status", "next_attempt_at"),
+)
+
+
+def upgrade(conn):
+    metadata.create_all(bind=conn, checkfirst=True)
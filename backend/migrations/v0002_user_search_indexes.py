@@ -0,0 +1,25 @@
+"""Indeksi za pretragu po username-u.
+
+PostgreSQL: pg_trgm GIN indeks nad lower(username) pokriva LIKE '%x%'.
+Ostali dijalekti (i PostgreSQL bez contrib paketa): obični indeks nad
+lower(username) (exact match), podniz se tamo traži skeniranjem, ali uz LIMIT.
+"""
+import logging
+
+from sqlalchemy import text
+
+logger = logging.getLogger(__name__)
+
+
+def upgrade(conn):
+    if conn.dialect.name == "postgresql":
+        available = conn.execute(text("SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm'")).scalar()
+        if available:
+            conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+            conn.execute(text(
+                "CREATE INDEX IF NOT EXISTS ix_users_username_trgm "
+                "ON users USING gin (lower(username) gin_trgm_ops)"
+            ))
+        else:
+            logger.warning("pg_trgm is not available; substring user search will scan users")
+    conn.execute(text("CREATE INDEX IF NOT EXISTS ix_users_username_lower ON users (lower(username))"))
@@ -0,0 +1,57 @@
+"""Kompozitni indeksi i unique ograničenja za upite u friends.py i trips.py.
+
+Prije unique indeksa uklanjaju se duplikati, inače CREATE UNIQUE INDEX ne
+bi uspio:
+- friends: ostaje najjači status (accepted > pending > rejected), pa najnoviji;
+- shared_trips: ostaje prvo dijeljenje, a feedback s duplikata se prebacuje na
+  njega (ništa se ne gubi);
+- shared_trip_feedback: po korisniku i dijeljenju ostaje najnoviji feedback.
+Redovi s NULL ključem nisu duplikati za unique indeks pa se ne diraju.
+"""
+from sqlalchemy import text
+
+# id -> id preživjelog retka u istoj grupi (trip_id, shared_with_id)
+_SHARE_SURVIVOR = (
+    "SELECT id, MIN(id) OVER (PARTITION BY trip_id, shared_with_id) AS survivor_id"
+    " FROM shared_trips WHERE trip_id IS NOT NULL AND shared_with_id IS NOT NULL"
+)
+
+DEDUPLICATE = [
+    "DELETE FROM friends WHERE id IN ("
+    " SELECT id FROM ("
+    "  SELECT id, ROW_NUMBER() OVER ("
+    "   PARTITION BY user_id, friend_id"
+    "   ORDER BY CASE status WHEN 'accepted' THEN 0 WHEN 'pending' THEN 1 ELSE 2 END,"
+    "   created_at IS NULL, created_at DESC, id DESC) AS position"
+    "  FROM friends) ranked"
+    " WHERE position > 1)",
+    # Feedback s duplikata na preživjelo dijeljenje, prije brisanja (FK)
+    "UPDATE shared_trip_feedback SET shared_trip_id = ("
+    " SELECT survivor_id FROM (" + _SHARE_SURVIVOR + ") shares"
+    " WHERE shares.id = shared_trip_feedback.shared_trip_id)"
+    " WHERE shared_trip_id IN ("
+    " SELECT id FROM (" + _SHARE_SURVIVOR + ") shares WHERE id <> survivor_id)",
+    "DELETE FROM shared_trips WHERE id IN ("
+    " SELECT id FROM (" + _SHARE_SURVIVOR + ") shares WHERE id <> survivor_id)",
+    "DELETE FROM shared_trip_feedback WHERE id IN ("
+    " SELECT id FROM ("
+    "  SELECT id, ROW_NUMBER() OVER (PARTITION BY shared_trip_id, created_by_id ORDER BY id DESC) AS position"
+    "  FROM shared_trip_feedback"
+    "  WHERE shared_trip_id IS NOT NULL AND created_by_id IS NOT NULL) ranked"
+    " WHERE position > 1)",
+]
+
+INDEXES = [
+    "CREATE UNIQUE INDEX IF NOT EXISTS uq_friends_user_id_friend_id ON friends (user_id, friend_id)",
+    "CREATE INDEX IF NOT EXISTS ix_friends_friend_id_status ON friends (friend_id, status)",
+    "CREATE UNIQUE INDEX IF NOT EXISTS uq_shared_trips_trip_id_shared_with_id ON shared_trips (trip_id, shared_with_id)",
+    "CREATE INDEX IF NOT EXISTS ix_shared_trips_shared_with_id ON shared_trips (shared_with_id)",
+    "CREATE UNIQUE INDEX IF NOT EXISTS uq_shared_trip_feedback_shared_trip_id_created_by_id "
+    "ON shared_trip_feedback (shared_trip_id, created_by_id)",
+    "CREATE INDEX IF NOT EXISTS ix_trips_user_id ON trips (user_id)",
+]
+
+
+def upgrade(conn):
+    for statement in DEDUPLICATE + INDEXES:
+        conn.execute(text(statement))
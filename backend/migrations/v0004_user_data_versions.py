@@ -0,0 +1,17 @@
+"""Tablica verzija podataka po korisniku (ETag / If-None-Match)."""
+from sqlalchemy import Column, ForeignKey, Integer, MetaData, String, Table
+
+metadata = MetaData()
+# users samo za FK; ne kreira se ovdje
+Table("users", metadata, Column("id", Integer, primary_key=True))
+
+user_data_versions = Table(
+    "user_data_versions", metadata,
+    Column("user_id", Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True),
+    Column("scope", String(20), primary_key=True),
+    Column("version", Integer, nullable=False),
+)
+
+
+def upgrade(conn):
+    user_data_versions.create(bind=conn, checkfirst=True)
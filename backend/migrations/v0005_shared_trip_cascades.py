@@ -0,0 +1,35 @@
+"""ON DELETE CASCADE na shared_trips.trip_id i shared_trip_feedback.shared_trip_id.
+
+Na PostgreSQL-u se postojeći FK mijenja na mjestu (isto ime). SQLite ne
+podržava izmjenu ograničenja pa se tamo preskače (bez PRAGMA foreign_keys
+SQLite ionako ne provodi FK).
+"""
+import logging
+
+from sqlalchemy import inspect, text
+
+logger = logging.getLogger(__name__)
+
+FOREIGN_KEYS = [
+    ("shared_trips", "trip_id", "trips"),
+    ("shared_trip_feedback", "shared_trip_id", "shared_trips"),
+]
+
+
+def upgrade(conn):
+    if conn.dialect.name != "postgresql":
+        logger.info("Skipping FK cascade migration on %s", conn.dialect.name)
+        return
+    inspector = inspect(conn)
+    for table, column, referred_table in FOREIGN_KEYS:
+        for fk in inspector.get_foreign_keys(table):
+            if fk["constrained_columns"] != [column]:
+                continue
+            if (fk.get("options") or {}).get("ondelete", "").upper() == "CASCADE":
+                continue
+            name = fk["name"]
+            conn.execute(text(
+                f'ALTER TABLE {table} DROP CONSTRAINT "{name}", '
+                f'ADD CONSTRAINT "{name}" FOREIGN KEY ({column}) '
+                f"REFERENCES {referred_table} (id) ON DELETE CASCADE"
+            ))
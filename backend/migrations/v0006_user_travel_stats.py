@@ -0,0 +1,122 @@
+"""Tablica zbirne statistike putovanja, popunjena iz postojećih tripova.
+
+Tablice i izračun su prepisani ovdje (stanje sheme u trenutku ove migracije),
+ne uvoze se iz models.py / travel_stats.py koji se kasnije mijenjaju.
+Za ponovni izračun na trenutnoj shemi služi `python -m travel_stats`.
+"""
+from sqlalchemy import Column, Float, ForeignKey, Integer, MetaData, String, Table, func, select
+from sqlalchemy.dialects.postgresql import JSON
+
+BATCH_SIZE = 1000
+
+metadata = MetaData()
+
+users = Table("users", metadata, Column("id", Integer, primary_key=True))
+
+trips = Table(
+    "trips", metadata,
+    Column("id", Integer, primary_key=True),
+    Column("user_id", Integer),
+    Column("start_date", String),
+    Column("transport_option", JSON),
+    Column("accommodation", JSON),
+    Column("flight", JSON),
+    Column("total_cost", Float),
+)
+
+shared_trips = Table(
+    "shared_trips", metadata,
+    Column("id", Integer, primary_key=True),
+    Column("trip_id", Integer),
+    Column("shared_with_id", Integer),
+)
+
+shared_trip_feedback = Table(
+    "shared_trip_feedback", metadata,
+    Column("id", Integer, primary_key=True),
+    Column("shared_trip_id", Integer),
+    Column("rating", Integer),
+)
+
+user_travel_stats = Table(
+    "user_travel_stats", metadata,
+    Column("user_id", Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True),
+    Column("trip_count", Integer, nullable=False),
+    Column("total_cost", Float, nullable=False),
+    Column("trips_per_month", JSON, nullable=False),
+    Column("destinations", JSON, nullable=False),
+    Column("shares_sent", Integer, nullable=False),
+    Column("shares_received", Integer, nullable=False),
+    Column("feedback_count", Integer, nullable=False),
+    Column("feedback_rating_sum", Integer, nullable=False),
+)
+
+
+def _destination(transport_option, accommodation, flight):
+    candidates = [transport_option, accommodation]
+    if flight:
+        candidates.append(flight.get("departure") if "departure" in flight else flight)
+    for option in candidates:
+        if isinstance(option, dict) and option.get("destination"):
+            return str(option["destination"]).lower()
+    return None
+
+
+def _count(counts: dict, key):
+    if key is not None:
+        counts[key] = counts.get(key, 0) + 1
+
+
+def upgrade(conn):
+    user_travel_stats.create(bind=conn, checkfirst=True)
+    rows = {}
+
+    def row(user_id):
+        if user_id not in rows:
+            rows[user_id] = {
+                "user_id": user_id, "trip_count": 0, "total_cost": 0, "trips_per_month": {}, "destinations": {},
+                "shares_sent": 0, "shares_received": 0, "feedback_count": 0, "feedback_rating_sum": 0,
+            }
+        return rows[user_id]
+
+    result = conn.execute(
+        select(
+            trips.c.user_id, trips.c.start_date, trips.c.total_cost,
+            trips.c.transport_option, trips.c.accommodation, trips.c.flight,
+        )
+        .where(trips.c.user_id.is_not(None))
+        .execution_options(yield_per=BATCH_SIZE)
+    )
+    for trip in result:
+        stats = row(trip.user_id)
+        stats["trip_count"] += 1
+        stats["total_cost"] += trip.total_cost or 0
+        _count(stats["trips_per_month"], str(trip.start_date)[:7] if trip.start_date else None)
+        _count(stats["destinations"], _destination(trip.transport_option, trip.accommodation, trip.flight))
+
+    shares = shared_trips.join(trips, shared_trips.c.trip_id == trips.c.id)
+    for owner_id, count in conn.execute(
+        select(trips.c.user_id, func.count(shared_trips.c.id)).select_from(shares).group_by(trips.c.user_id)
+    ):
+        row(owner_id)["shares_sent"] = count
+    for recipient_id, count in conn.execute(
+        select(shared_trips.c.shared_with_id, func.count(shared_trips.c.id))
+        .where(shared_trips.c.shared_with_id.is_not(None))
+        .group_by(shared_trips.c.shared_with_id)
+    ):
+        row(recipient_id)["shares_received"] = count
+    for owner_id, count, rating_sum in conn.execute(
+        select(
+            trips.c.user_id, func.count(shared_trip_feedback.c.id),
+            func.coalesce(func.sum(shared_trip_feedback.c.rating), 0),
+        )
+        .select_from(shares.join(shared_trip_feedback, shared_trip_feedback.c.shared_trip_id == shared_trips.c.id))
+        .group_by(trips.c.user_id)
+    ):
+        row(owner_id)["feedback_count"] = count
+        row(owner_id)["feedback_rating_sum"] = rating_sum
+
+    rows.pop(None, None)
+    conn.execute(user_travel_stats.delete())
+    if rows:
+        conn.execute(user_travel_stats.insert(), list(rows.values()))
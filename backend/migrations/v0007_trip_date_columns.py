@@ -0,0 +1,73 @@
+"""start_date/end_date iz String u Date + indeksi za kalendarske upite.
+
+Na PostgreSQL-u se stupci pretvaraju na mjestu. Vrijednosti koje nisu
+ispravan "YYYY-MM-DD" datum (i nemogući datumi poput 2024-02-30, koje bi
+`::date` odbio i srušio cijelu migraciju) provjeravaju se u Pythonu, postaju
+NULL i broje se u logu (frontend uvijek šalje ISO datum iz <input type="date">).
+SQLite nema strogi tip stupca - ISO stringovi se već čitaju kao Date.
+(user_id, start_date) pokriva i upite samo po user_id, pa ix_trips_user_id
+više nije potreban.
+"""
+import datetime
+import logging
+import re
+
+from sqlalchemy import text
+
+logger = logging.getLogger(__name__)
+
+DATE_COLUMNS = ("start_date", "end_date")
+BATCH_SIZE = 5000
+
+_ISO_DATE = re.compile(r"^\d{4}-\d{2}-\d{2}$")
+
+POSTGRES_CONVERT = (
+    "ALTER TABLE trips"
+    " ALTER COLUMN start_date TYPE DATE USING start_date::date,"
+    " ALTER COLUMN end_date TYPE DATE USING end_date::date"
+)
+
+INDEXES = [
+    "CREATE INDEX IF NOT EXISTS ix_trips_user_id_start_date ON trips (user_id, start_date)",
+    "CREATE INDEX IF NOT EXISTS ix_trips_user_id_end_date ON trips (user_id, end_date)",
+    "DROP INDEX IF EXISTS ix_trips_user_id",
+]
+
+
+def _valid_date(value: str) -> bool:
+    if not _ISO_DATE.match(value):
+        return False
+    try:
+        datetime.date.fromisoformat(value)
+    except ValueError:
+        return False
+    return True
+
+
+def _null_invalid_dates(conn):
+    invalid = {column: [] for column in DATE_COLUMNS}
+    rows = conn.execute(text(
+        "SELECT id, start_date, end_date FROM trips WHERE start_date IS NOT NULL OR end_date IS NOT NULL"
+    ).execution_options(yield_per=BATCH_SIZE))
+    for row in rows:
+        for column in DATE_COLUMNS:
+            value = getattr(row, column)
+            if value is not None and not _valid_date(value):
+                invalid[column].append({"id": row.id})
+    for column, ids in invalid.items():
+        if ids:
+            conn.execute(text(f"UPDATE trips SET {column} = NULL WHERE id = :id"), ids)
+            logger.warning("v0007: %d trips had an invalid %s, set to NULL", len(ids), column)
+
+
+def upgrade(conn):
+    if conn.dialect.name == "postgresql":
+        column_type = conn.execute(text(
+            "SELECT data_type FROM information_schema.columns"
+            " WHERE table_name = 'trips' AND column_name = 'start_date'"
+        )).scalar()
+        if column_type != "date":
+            _null_invalid_dates(conn)
+            conn.execute(text(POSTGRES_CONVERT))
+    for statement in INDEXES:
+        conn.execute(text(statement))
@@ -0,0 +1,162 @@
+"""Tablica catalog_items; postojeći tripovi dobivaju reference umjesto kopija.
+
+Isti JSON objekt (npr. hotel odabran u tisuću tripova) sprema se jednom, a
+trip zadržava catalog_id i snapshot (vidi trip_catalog.py). Tripovi se
+obrađuju u serijama po id-u da se ne učitaju svi odjednom; po seriji jedan
+prolaz kroz katalog i jedan executemany UPDATE.
+
+Format reference i hash sadržaja su prepisani ovdje kakvi su bili uz ovu
+migraciju; trip_catalog.py se kasnije smije mijenjati.
+"""
+import datetime
+import hashlib
+import json
+import logging
+
+from sqlalchemy import Column, DateTime, Index, Integer, MetaData, String, Table, bindparam, insert, select, update
+from sqlalchemy.dialects.postgresql import JSON
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 500
+
+KIND_TRANSPORT = "transport"
+KIND_ACCOMMODATION = "accommodation"
+KIND_FLIGHT = "flight"
+FLIGHT_LEGS = ("departure", "return")
+SNAPSHOT_FIELDS = ("id", "price", "departure", "destination", "currLocation", "departure_time", "arrival_time")
+
+metadata = MetaData()
+
+trips = Table(
+    "trips", metadata,
+    Column("id", Integer, primary_key=True),
+    Column("transport_option", JSON),
+    Column("accommodation", JSON),
+    Column("flight", JSON),
+)
+
+catalog_items = Table(
+    "catalog_items", metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("kind", String(20), nullable=False),
+    Column("external_id", String(100), nullable=True),
+    Column("content_hash", String(64), nullable=False),
+    Column("data", JSON, nullable=False),
+    Column("created_at", DateTime),
+    Index("uq_catalog_items_kind_content_hash", "kind", "content_hash", unique=True),
+)
+
+
+def _content_hash(data: dict) -> str:
+    raw = json.dumps(data, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+def _is_reference(value) -> bool:
+    return isinstance(value, dict) and "catalog_id" in value
+
+
+def _catalog_ids(conn, items) -> list:
+    keys = [(kind, _content_hash(data)) for kind, data in items]
+    if not keys:
+        return []
+    hashes = {key[1] for key in keys}
+
+    def load():
+        return {
+            (row.kind, row.content_hash): row.id
+            for row in conn.execute(
+                select(catalog_items.c.id, catalog_items.c.kind, catalog_items.c.content_hash)
+                .where(catalog_items.c.content_hash.in_(hashes))
+            )
+        }
+
+    found = load()
+    missing = {}
+    now = datetime.datetime.utcnow()
+    for (kind, data), key in zip(items, keys):
+        if key not in found and key not in missing:
+            missing[key] = {
+                "kind": kind,
+                "external_id": str(data["id"]) if data.get("id") is not None else None,
+                "content_hash": key[1],
+                "data": data,
+                "created_at": now,
+            }
+    if missing:
+        # Migracija drži advisory lock i radi u jednoj transakciji: nema paralelnih upisa
+        conn.execute(insert(catalog_items), list(missing.values()))
+        found = load()
+    return [found[key] for key in keys]
+
+
+def _plan_references(transport_option, accommodation, flight):
+    """Mjesta za reference u tripu i objekti koje treba pronaći/upisati u katalog."""
+    flight = dict(flight) if isinstance(flight, dict) else flight
+    slots = [(KIND_TRANSPORT, transport_option), (KIND_ACCOMMODATION, accommodation)]
+    if isinstance(flight, dict):
+        slots += [(KIND_FLIGHT, flight.get(leg)) for leg in FLIGHT_LEGS]
+    pending = [
+        (index, kind, data) for index, (kind, data) in enumerate(slots)
+        if isinstance(data, dict) and data and not _is_reference(data)
+    ]
+    return flight, slots, pending
+
+
+def _apply_references(flight, slots, pending, ids):
+    refs = [data for _, data in slots]
+    for (index, _, data), catalog_id in zip(pending, ids):
+        snapshot = {field: data[field] for field in SNAPSHOT_FIELDS if field in data}
+        snapshot["catalog_id"] = catalog_id
+        refs[index] = snapshot
+    if isinstance(flight, dict):
+        for leg, ref in zip(FLIGHT_LEGS, refs[2:]):
+            if leg in flight:
+                flight[leg] = ref
+    return refs[0], refs[1], flight
+
+
+def upgrade(conn):
+    catalog_items.create(bind=conn, checkfirst=True)
+    # Jedan executemany po seriji; imena parametara ne smiju biti imena stupaca
+    update_trip = (
+        update(trips).where(trips.c.id == bindparam("trip_id"))
+        .values(
+            transport_option=bindparam("new_transport_option"),
+            accommodation=bindparam("new_accommodation"),
+            flight=bindparam("new_flight"),
+        )
+    )
+    last_id, converted = 0, 0
+    while True:
+        rows = conn.execute(
+            select(trips.c.id, trips.c.transport_option, trips.c.accommodation, trips.c.flight)
+            .where(trips.c.id > last_id)
+            .order_by(trips.c.id)
+            .limit(BATCH_SIZE)
+        ).all()
+        if not rows:
+            break
+        # Svi objekti serije razrješavaju se jednim _catalog_ids (SELECT, INSERT, SELECT)
+        plans, items = [], []
+        for row in rows:
+            flight, slots, pending = _plan_references(row.transport_option, row.accommodation, row.flight)
+            plans.append((row, flight, slots, pending, len(items)))
+            items += [(kind, data) for _, kind, data in pending]
+        ids = _catalog_ids(conn, items)
+        updates = []
+        for row, flight, slots, pending, offset in plans:
+            refs = _apply_references(flight, slots, pending, ids[offset:offset + len(pending)])
+            if refs != (row.transport_option, row.accommodation, row.flight):
+                updates.append({
+                    "trip_id": row.id,
+                    "new_transport_option": refs[0],
+                    "new_accommodation": refs[1],
+                    "new_flight": refs[2],
+                })
+        if updates:
+            conn.execute(update_trip, updates)
+            converted += len(updates)
+        last_id = rows[-1].id
+    logger.info("Converted %s trips to catalog references", converted)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, Boolean, ForeignKey, Enum , Float
+from sqlalchemy import Column, Integer, String, Text, Date, DateTime, Boolean, ForeignKey, Enum , Float, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.dialects.postgresql import JSON  # <-- Dodaj ovo!
 from database import Base
@@ -11,6 +11,12 @@ class FriendshipStatus(enum.Enum):
     accepted = "accepted"
     rejected = "rejected"
 
+# Enum za status poruke u email outboxu
+class EmailStatus(enum.Enum):
+    pending = "pending"
+    sent = "sent"
+    dead = "dead"
+
 class User(Base):
     __tablename__ = "users"
 
@@ -54,41 +60,118 @@ class Friend(Base):
         foreign_keys=[user_id],
         back_populates="friends",
     )
+
+    # Indeksi se kreiraju migracijom v0003_hot_path_indexes (ista imena)
+    __table_args__ = (
+        Index("uq_friends_user_id_friend_id", "user_id", "friend_id", unique=True),
+        Index("ix_friends_friend_id_status", "friend_id", "status"),
+    )
     
 class Trip(Base):
     __tablename__ = "trips"
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"))
     name = Column(String)
-    start_date = Column(String)
-    end_date = Column(String)
+    start_date = Column(Date)
+    end_date = Column(Date)
     transport_type = Column(String)
     transport_option = Column(JSON)
     accommodation = Column(JSON, nullable=True)
     flight = Column(JSON, nullable=True)
     total_cost = Column(Float, nullable=False)
     user = relationship("User", back_populates="trips")
+    # Brisanje dijeljenja (i njihovih feedbackova) radi baza: ON DELETE CASCADE
+    shares = relationship("SharedTrip", back_populates="trip", cascade="all, delete-orphan", passive_deletes=True)
+
+    # Kalendarski upiti (v0007_trip_date_columns); prvi pokriva i filtriranje samo po user_id
+    __table_args__ = (
+        Index("ix_trips_user_id_start_date", "user_id", "start_date"),
+        Index("ix_trips_user_id_end_date", "user_id", "end_date"),
+    )
     
 class SharedTrip(Base):
     __tablename__ = "shared_trips"
     id = Column(Integer, primary_key=True, index=True)
-    trip_id = Column(Integer, ForeignKey("trips.id"))
-    shared_with_id = Column(Integer, ForeignKey("users.id"))
+    trip_id = Column(Integer, ForeignKey("trips.id", ondelete="CASCADE"))
+    shared_with_id = Column(Integer, ForeignKey("users.id"), index=True)
     shared_by_id = Column(Integer, ForeignKey("users.id"))
     shared_at = Column(DateTime, default=datetime.datetime.utcnow)
 
-    trip = relationship("Trip")
+    trip = relationship("Trip", back_populates="shares")
     shared_with = relationship("User", foreign_keys=[shared_with_id])
     shared_by = relationship("User", foreign_keys=[shared_by_id])
-    feedbacks = relationship("SharedTripFeedback", back_populates="shared_trip", cascade="all, delete-orphan")
+    feedbacks = relationship("SharedTripFeedback", back_populates="shared_trip", cascade="all, delete-orphan", passive_deletes=True)
+
+    __table_args__ = (
+        Index("uq_shared_trips_trip_id_shared_with_id", "trip_id", "shared_with_id", unique=True),
+    )
     
 class SharedTripFeedback(Base):
     __tablename__ = "shared_trip_feedback"
     id = Column(Integer, primary_key=True, index=True)
-    shared_trip_id = Column(Integer, ForeignKey("shared_trips.id"))  # <-- ispravljeno!
+    shared_trip_id = Column(Integer, ForeignKey("shared_trips.id", ondelete="CASCADE"))  # <-- ispravljeno!
     rating = Column(Integer)  # npr. 1-5
     comment = Column(String)
     created_by_id = Column(Integer, ForeignKey("users.id"))  # <-- ispravljeno!
 
     shared_trip = relationship("SharedTrip", back_populates="feedbacks")
-    created_by = relationship("User")
\ No newline at end of file
+    created_by = relationship("User")
+
+    __table_args__ = (
+        Index("uq_shared_trip_feedback_shared_trip_id_created_by_id", "shared_trip_id", "created_by_id", unique=True),
+    )
+
+class EmailOutbox(Base):
+    __tablename__ = "email_outbox"
+    id = Column(Integer, primary_key=True, index=True)
+    recipient = Column(String(255), nullable=False)
+    subject = Column(String(255), nullable=False)
+    body = Column(Text, nullable=False)
+    status = Column(Enum(EmailStatus), default=EmailStatus.pending, nullable=False)
+    attempts = Column(Integer, default=0, nullable=False)
+    next_attempt_at = Column(DateTime, default=datetime.datetime.utcnow, nullable=False)
+    last_error = Column(String(1000), nullable=True)
+    created_at = Column(DateTime, default=datetime.datetime.utcnow)
+    sent_at = Column(DateTime, nullable=True)
+
+    __table_args__ = (
+        Index("ix_email_outbox_status_next_attempt_at", "status", "next_attempt_at"),
+    )
+
+
+# Verzija podataka po korisniku i opsegu (trips/shared/friends), za ETag
+class UserDataVersion(Base):
+    __tablename__ = "user_data_versions"
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    scope = Column(String(20), primary_key=True)
+    version = Column(Integer, nullable=False, default=1)
+
+
+# Stavke kataloga (prijevoz, smještaj, let) na koje se tripovi referenciraju.
+# Ista stavka se sprema jednom: jedinstveno po (kind, content_hash).
+class CatalogItem(Base):
+    __tablename__ = "catalog_items"
+    id = Column(Integer, primary_key=True, index=True)
+    kind = Column(String(20), nullable=False)
+    external_id = Column(String(100), nullable=True)  # "id" iz frontend kataloga, npr. "acc1"
+    content_hash = Column(String(64), nullable=False)
+    data = Column(JSON, nullable=False)
+    created_at = Column(DateTime, default=datetime.datetime.utcnow)
+
+    __table_args__ = (
+        Index("uq_catalog_items_kind_content_hash", "kind", "content_hash", unique=True),
+    )
+
+
+# Zbirna statistika putovanja po korisniku, održava je travel_stats.py
+class UserTravelStats(Base):
+    __tablename__ = "user_travel_stats"
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    trip_count = Column(Integer, nullable=False, default=0)
+    total_cost = Column(Float, nullable=False, default=0)
+    trips_per_month = Column(JSON, nullable=False, default=dict)  # {"YYYY-MM": broj}
+    destinations = Column(JSON, nullable=False, default=dict)  # {"odredište": broj}
+    shares_sent = Column(Integer, nullable=False, default=0)
+    shares_received = Column(Integer, nullable=False, default=0)
+    feedback_count = Column(Integer, nullable=False, default=0)
+    feedback_rating_sum = Column(Integer, nullable=False, default=0)
@@ -0,0 +1,92 @@
+import asyncio
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from fastapi import HTTPException, status
+from passlib.context import CryptContext
+
+# Broj procesa za bcrypt i koliko poslova smije čekati prije nego vratimo 503
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", os.cpu_count() or 2))
+PASSWORD_HASH_MAX_PENDING = int(os.getenv("PASSWORD_HASH_MAX_PENDING", PASSWORD_HASH_WORKERS * 4))
+# Fork iz procesa koji već ima threadove (QueueListener logiranja, AnyIO workeri)
+# može naslijediti zaključan lock i zablokirati dijete - workeri se pokreću čisto
+PASSWORD_HASH_START_METHOD = os.getenv("PASSWORD_HASH_START_METHOD", "spawn")
+
+# Jedan CryptContext po procesu (i u workerima i u glavnom procesu)
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+
+def _hash(password: str) -> str:
+    return pwd_context.hash(password)
+
+
+def _verify(plain_password: str, hashed_password: str) -> bool:
+    return pwd_context.verify(plain_password, hashed_password)
+
+
+class PasswordHasher:
+    """Bcrypt u zasebnim procesima, da ne blokira event loop ni threadpool.
+
+    Broj poslova u obradi + u redu je ograničen; kad je red pun odmah
+    vraćamo 503 umjesto da se zahtjevi gomilaju.
+    """
+
+    def __init__(self, workers: int = PASSWORD_HASH_WORKERS, max_pending: int = PASSWORD_HASH_MAX_PENDING):
+        self.workers = workers
+        self.max_pending = max_pending
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._executor = None
+        self._executor_lock = threading.Lock()
+
+    def start(self):
+        """Napravi process pool; zove se u startupu aplikacije (skripte ga dobiju pri prvom pozivu)."""
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context(PASSWORD_HASH_START_METHOD),
+                )
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self.start()
+        return self._executor
+
+    def _submit(self, fn, *args):
+        if not self._slots.acquire(blocking=False):
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Server is busy, please try again shortly",
+                headers={"Retry-After": "1"},
+            )
+        try:
+            future = self._get_executor().submit(fn, *args)
+        except Exception:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return future
+
+    async def hash(self, password: str) -> str:
+        return await asyncio.wrap_future(self._submit(_hash, password))
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        return await asyncio.wrap_future(self._submit(_verify, plain_password, hashed_password))
+
+    # Za sync kod (npr. buduća promjena lozinke u def ruti)
+    def hash_sync(self, password: str) -> str:
+        return self._submit(_hash, password).result()
+
+    def verify_sync(self, plain_password: str, hashed_password: str) -> bool:
+        return self._submit(_verify, plain_password, hashed_password).result()
+
+    def shutdown(self):
+        with self._executor_lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+
+password_hasher = PasswordHasher()
@@ -0,0 +1,139 @@
+import threading
+import time
+from collections import OrderedDict
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session, make_transient_to_detached
+
+from models import User
+
+# Koliko dugo (sekunde) i koliko korisnika držimo u memoriji
+PRINCIPAL_CACHE_TTL_SECONDS = 60
+PRINCIPAL_CACHE_MAX_SIZE = 10000
+
+
+class PrincipalCache:
+    """LRU + TTL cache autentificiranih korisnika, ključ je `sub` iz JWT-a (email).
+
+    Čuvamo samo vrijednosti stupaca (ne ORM objekt) pa se svaki pogodak
+    pretvara u novu odvojenu instancu, bez SELECT-a.
+
+    Svaka invalidacija povećava generaciju. Tko puni cache pročita je prije
+    SELECT-a i preda `put`; ako se u međuvremenu promijenila (commit u drugom
+    requestu), učitani podaci su možda stari i ne spremaju se.
+    """
+
+    def __init__(self, ttl_seconds: float = PRINCIPAL_CACHE_TTL_SECONDS, max_size: int = PRINCIPAL_CACHE_MAX_SIZE):
+        self.ttl_seconds = ttl_seconds
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self._generation = 0
+
+    def generation(self) -> int:
+        with self._lock:
+            return self._generation
+
+    def get(self, subject: str):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(subject)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, snapshot = entry
+            if expires_at <= now:
+                del self._entries[subject]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(subject)
+            self.hits += 1
+            return snapshot
+
+    def put(self, subject: str, snapshot: dict, generation: int):
+        expires_at = time.monotonic() + self.ttl_seconds
+        with self._lock:
+            if generation != self._generation:
+                return
+            self._entries[subject] = (expires_at, snapshot)
+            self._entries.move_to_end(subject)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, subject: str):
+        with self._lock:
+            # I kad unosa nema: možda ga upravo puni request koji je čitao prije commita
+            self._generation += 1
+            if self._entries.pop(subject, None) is not None:
+                self.invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
+
+
+principal_cache = PrincipalCache()
+
+_USER_COLUMNS = [column.key for column in inspect(User).column_attrs]
+
+
+def snapshot_user(user: User) -> dict:
+    return {key: getattr(user, key) for key in _USER_COLUMNS}
+
+
+def user_from_snapshot(snapshot: dict) -> User:
+    # Odvojena (detached) instanca, nije vezana ni na jednu sesiju: ruta je može
+    # čitati iz bilo kojeg threada. Za izmjene je treba spojiti u sesiju rute,
+    # `db.merge(user, load=False)` - ponaša se kao da je upravo učitana iz baze.
+    user = User(**snapshot)
+    make_transient_to_detached(user)
+    return user
+
+
+# Invalidacija: svaka promjena korisnika (upload slike, verifikacija emaila,
+# promjena role ili is_active...) izbacuje ga iz cachea tek nakon commita,
+# kako drugi request ne bi ponovno napunio cache starim podacima.
+def _pending(session: Session) -> set:
+    return session.info.setdefault("principal_cache_invalidate", set())
+
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _mark_user_changed(mapper, connection, target):
+    session = Session.object_session(target)
+    if session is None:
+        return
+    pending = _pending(session)
+    pending.add(target.email)
+    # Ako se mijenjao sam email, izbaci i stari ključ
+    history = inspect(target).attrs.email.history
+    pending.update(email for email in history.deleted or () if email)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_after_commit(session):
+    pending = session.info.pop("principal_cache_invalidate", None)
+    for email in pending or ():
+        principal_cache.invalidate(email)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_after_rollback(session):
+    session.info.pop("principal_cache_invalidate", None)
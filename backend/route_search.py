@@ -0,0 +1,257 @@
+"""Pretraga ruta s više dionica: prijevoz do aerodroma, letovi, autobus/vlak.
+
+Dionice iz kataloga voze svaki dan u isto vrijeme (departure_time) i traju
+`duration_minutes`. Graf se gradi jednom po verziji kataloga
+(`CatalogIndex.derive`): po gradu su dionice grupirane po susjedu.
+
+- najjeftinija ruta: vrijeme ne utječe na cijenu (uvijek se može čekati
+  sljedeći dan), pa je dovoljna jedna najjeftinija dionica po paru gradova
+  i A* po cijeni;
+- najbrža ruta: A* po vremenu dolaska s čekanjem na polazak i minimalnim
+  vremenom presjedanja (vrijeme ovisi o vrsti sljedeće dionice).
+
+Heuristika su donje granice do odredišta (obrnuti Dijkstra po najmanjoj
+cijeni, odnosno presjedanju + trajanju dionice, vidi LowerBounds) -
+konzistentne su, pa A* ostaje točan. Polazište nema presjedanje, ali
+njegova granica se koristi samo za prvi element reda.
+"""
+import heapq
+import itertools
+import threading
+
+from catalog import (
+    KIND_FLIGHT,
+    KIND_TRANSPORT,
+    KIND_TRANSPORT_FLIGHT,
+    CATALOG_SOURCES,
+    CatalogIndex,
+    format_clock,
+    parse_clock,
+)
+
+MINUTES_PER_DAY = 24 * 60
+
+# Minimalno vrijeme od dolaska do polaska sljedeće dionice, po vrsti sljedeće dionice
+MIN_CONNECTION_MINUTES = {
+    KIND_FLIGHT: 90,
+    KIND_TRANSPORT: 30,
+    KIND_TRANSPORT_FLIGHT: 30,
+}
+
+OPTIMIZE_CHEAPEST = "cheapest"
+OPTIMIZE_FASTEST = "fastest"
+
+INFINITY = float("inf")
+
+
+class Leg:
+    __slots__ = ("kind", "item", "origin", "destination", "price", "departure", "duration")
+
+    def __init__(self, kind, item, origin, destination, price, departure, duration):
+        self.kind = kind
+        self.item = item
+        self.origin = origin
+        self.destination = destination
+        self.price = price
+        self.departure = departure  # minute od ponoći; None = polazi kad god (npr. rent-a-car)
+        self.duration = duration
+
+    def next_departure(self, ready: int) -> int:
+        """Prvi polazak u trenutku `ready` ili kasnije (apsolutne minute)."""
+        if self.departure is None:
+            return ready
+        return ready + (self.departure - ready) % MINUTES_PER_DAY
+
+
+class LowerBounds:
+    """Obrnuti Dijkstra od odredišta koji se nastavlja samo koliko treba.
+
+    Za upit je dovoljno da je polazište "settled": gradovi do kojih pretraga
+    još nije stigla dobivaju radijus pretrage, što je i dalje donja granica
+    (i konzistentna). Stanje se čuva između upita za isto odredište.
+    """
+
+    def __init__(self, reverse: dict, destination: str):
+        self._reverse = reverse
+        self._settled = {}
+        self._tentative = {destination: 0}
+        self._heap = [(0, destination)]
+        self._radius = 0
+        self._lock = threading.Lock()
+
+    def settle(self, city: str) -> bool:
+        """Proširi pretragu do grada; False ako odredište iz njega nije dohvatljivo."""
+        if city in self._settled:
+            return True
+        with self._lock:
+            heap, settled, tentative = self._heap, self._settled, self._tentative
+            while city not in settled and heap:
+                bound, current = heapq.heappop(heap)
+                if current in settled or bound > tentative[current]:
+                    continue
+                settled[current] = bound
+                self._radius = bound
+                for previous, weight in self._reverse.get(current, {}).items():
+                    candidate = bound + weight
+                    if previous not in settled and candidate < tentative.get(previous, INFINITY):
+                        tentative[previous] = candidate
+                        heapq.heappush(heap, (candidate, previous))
+            if not heap:
+                # Sve dohvatljivo je obrađeno; ostali gradovi ne vode do odredišta
+                self._radius = INFINITY
+            return city in settled
+
+    def get(self, city: str):
+        return self._settled.get(city, self._radius)
+
+
+class RouteGraph:
+    def __init__(self, index: CatalogIndex):
+        self.adjacency = {}
+        # Za najjeftiniju rutu: grad -> {susjed: najjeftinija dionica}
+        self.cheapest_adjacency = {}
+        # Za najbržu rutu: grad -> [(susjed, najkraće trajanje, [(presjedanje, polazak, trajanje, dionica)])]
+        self.timetable = {}
+        reverse_price, reverse_duration = {}, {}
+        for kind in (KIND_TRANSPORT, KIND_FLIGHT, KIND_TRANSPORT_FLIGHT):
+            _, origin_field, destination_field = CATALOG_SOURCES[kind]
+            for item in index.all[kind].items:
+                origin = (item.get(origin_field) or "").strip().lower()
+                destination = (item.get(destination_field) or "").strip().lower()
+                duration = index.duration[kind][item["id"]]
+                # Dionica bez relacije ili trajanja ne može u raspored
+                if not origin or not destination or origin == destination or duration is None:
+                    continue
+                leg = Leg(kind, item, origin, destination, item["price"], parse_clock(item.get("departure_time")), duration)
+                self.adjacency.setdefault(origin, []).append(leg)
+                cheapest = self.cheapest_adjacency.setdefault(origin, {})
+                if destination not in cheapest or leg.price < cheapest[destination].price:
+                    cheapest[destination] = leg
+                edges = reverse_price.setdefault(destination, {})
+                edges[origin] = min(edges.get(origin, INFINITY), leg.price)
+                # Do dionice se (osim iz polazišta) uvijek čeka barem minimalno presjedanje
+                edges = reverse_duration.setdefault(destination, {})
+                edges[origin] = min(edges.get(origin, INFINITY), MIN_CONNECTION_MINUTES[kind] + leg.duration)
+        for origin, legs in self.adjacency.items():
+            groups = {}
+            for leg in legs:
+                groups.setdefault(leg.destination, []).append(
+                    (MIN_CONNECTION_MINUTES[leg.kind], leg.departure, leg.duration, leg)
+                )
+            self.timetable[origin] = [
+                (destination, min(entry[2] for entry in entries), entries)
+                for destination, entries in groups.items()
+            ]
+        self._reverse = {OPTIMIZE_CHEAPEST: reverse_price, OPTIMIZE_FASTEST: reverse_duration}
+        self._bounds = {}
+
+    def lower_bounds(self, destination: str, optimize: str):
+        """Donje granice do odredišta; None ako nijedna dionica ne vodi u njega.
+
+        Nepoznata odredišta ne dobivaju unos, pa cache raste najviše do broja
+        gradova u katalogu.
+        """
+        if destination not in self._reverse[optimize]:
+            return None
+        key = (destination, optimize)
+        bounds = self._bounds.get(key)
+        if bounds is None:
+            bounds = self._bounds.setdefault(key, LowerBounds(self._reverse[optimize], destination))
+        return bounds
+
+    def search(self, origin: str, destination: str, depart_after: int = 0, optimize: str = OPTIMIZE_CHEAPEST):
+        """A* od origin do destination; vraća listu dionica ili None."""
+        bounds = self.lower_bounds(destination, optimize)
+        if bounds is None or not bounds.settle(origin):
+            return None
+        fastest = optimize == OPTIMIZE_FASTEST
+        counter = itertools.count()
+        # Oznaka grada: ukupna cijena, odnosno apsolutno vrijeme dolaska
+        start = depart_after if fastest else 0
+        best = {origin: start}
+        previous = {}
+        heap = [(start + bounds.get(origin), next(counter), start, origin)]
+        while heap:
+            _, _, label, city = heapq.heappop(heap)
+            if label > best[city]:
+                continue
+            if city == destination:
+                legs = []
+                while city in previous:
+                    leg = previous[city]
+                    legs.append(leg)
+                    city = leg.origin
+                return legs[::-1]
+            if fastest:
+                at_origin = city == origin
+                for neighbour, shortest, entries in self.timetable.get(city, ()):
+                    bound = bounds.get(neighbour)
+                    if bound == INFINITY:
+                        continue
+                    current = best.get(neighbour, INFINITY)
+                    # Ni najkraća dionica bez čekanja ne popravlja susjeda - preskoči grupu
+                    if label + shortest >= current:
+                        continue
+                    chosen = None
+                    for connection, departure, duration, leg in entries:
+                        departs = label if at_origin else label + connection
+                        if departure is not None:
+                            departs += (departure - departs) % MINUTES_PER_DAY
+                        if departs + duration < current:
+                            current = departs + duration
+                            chosen = leg
+                    if chosen is not None:
+                        best[neighbour] = current
+                        previous[neighbour] = chosen
+                        heapq.heappush(heap, (current + bound, next(counter), current, neighbour))
+            else:
+                for leg in self.cheapest_adjacency.get(city, {}).values():
+                    bound = bounds.get(leg.destination)
+                    if bound == INFINITY:
+                        continue
+                    candidate = label + leg.price
+                    if candidate < best.get(leg.destination, INFINITY):
+                        best[leg.destination] = candidate
+                        previous[leg.destination] = leg
+                        heapq.heappush(heap, (candidate + bound, next(counter), candidate, leg.destination))
+        return None
+
+
+def route_graph(index: CatalogIndex) -> RouteGraph:
+    return index.derive("route_graph", lambda: RouteGraph(index))
+
+
+def _at(minutes: int) -> dict:
+    return {"day": minutes // MINUTES_PER_DAY, "time": format_clock(minutes % MINUTES_PER_DAY)}
+
+
+def schedule(legs, depart_after: int = 0) -> dict:
+    """Rasporedi dionice od `depart_after`: čekanja, presjedanja, ukupna cijena i trajanje."""
+    result = []
+    clock = depart_after
+    for position, leg in enumerate(legs):
+        ready = clock if position == 0 else clock + MIN_CONNECTION_MINUTES[leg.kind]
+        departure = leg.next_departure(ready)
+        arrival = departure + leg.duration
+        result.append({
+            "kind": leg.kind,
+            "item": leg.item,
+            "from": leg.origin,
+            "to": leg.destination,
+            "departure": _at(departure),
+            "arrival": _at(arrival),
+            "wait_minutes": departure - clock,
+        })
+        clock = arrival
+    return {
+        "legs": result,
+        "total_price": sum(leg.price for leg in legs),
+        "total_minutes": clock - depart_after,
+    }
+
+
+def find_route(index: CatalogIndex, origin: str, destination: str, depart_after: int = 0, optimize: str = OPTIMIZE_CHEAPEST):
+    legs = route_graph(index).search(origin, destination, depart_after, optimize)
+    if legs is None:
+        return None
+    return schedule(legs, depart_after)
@@ -1,9 +1,9 @@
 import logging
 from fastapi import APIRouter, HTTPException, Depends, Request, status, Security
 from pydantic import BaseModel, EmailStr
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from jose import JWTError, jwt
-from passlib.context import CryptContext
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from authlib.integrations.starlette_client import OAuth
 from starlette.requests import Request
@@ -13,21 +13,23 @@ import qrcode
 from io import BytesIO
 import base64
 from datetime import datetime, timedelta
-from database import get_db
+from database import AsyncSessionLocal, get_async_db
 from models import User
-from database import SessionLocal, engine, Base
 from models import User
-from utils import send_verification_email, hash_password, generate_otp_secret, generate_qr_code, decode_verification_token
+from utils import enqueue_verification_email, generate_otp_secret, generate_qr_code, decode_verification_token
+from principal_cache import principal_cache, snapshot_user, user_from_snapshot
+from password_service import password_hasher
+from email_outbox import outbox_sender
+from user_search import find_users, USER_SEARCH_PAGE_SIZE
+from media_storage import PROFILE_IMAGE_UPLOAD_OPENAPI, save_profile_image
+from versions import bump_profile_versions
+from typing import Optional
 from fastapi.responses import HTMLResponse
-from fastapi import File, UploadFile , Depends
 
 
 # Definirajte logger
 logger = logging.getLogger(__name__)
 
-# Kreiraj sve tablice u bazi (ako ne postoje)
-Base.metadata.create_all(bind=engine)
-
 # Konfiguracija
 SECRET_KEY = "tvoja_tajna_kljuceva"  # U produkciji, spremi ovo u env varijable
 ALGORITHM = "HS256"
@@ -35,8 +37,6 @@ ACCESS_TOKEN_EXPIRE_MINUTES = 240
 
 router = APIRouter()
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login")
 
 oauth = OAuth()
@@ -73,20 +73,6 @@ class RegisterRequest(BaseModel):
     username: str
     password: str
 
-# Dependency za dobivanje SQLAlchemy sessiona
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
-def verify_password(plain_password, hashed_password):
-    return pwd_context.verify(plain_password, hashed_password)
-
-def get_password_hash(password):
-    return pwd_context.hash(password)
-
 def create_access_token(data: dict, expires_delta: timedelta = None):
     to_encode = data.copy()
     if expires_delta:
@@ -97,8 +83,11 @@ def create_access_token(data: dict, expires_delta: timedelta = None):
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
-def get_current_user(token: str = Security(oauth2_scheme), db: Session = Depends(get_db)):
-    logger.debug(f"Received token: {token}")
+# Vraća odvojenu (detached) instancu korisnika, neovisnu o sesiji rute: isti
+# dependency služi i async rutama (get_async_db) i sinkronima (get_db, threadpool).
+# Na promašaju cachea korisnika čita vlastita kratka sesija koja vraća konekciju
+# u pool prije nego ruta otvori svoju.
+async def get_current_user(token: str = Security(oauth2_scheme)):
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -106,7 +95,6 @@ def get_current_user(token: str = Security(oauth2_scheme), db: Session = Depends
     )
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        logger.debug(f"Decoded payload: {payload}")
         email: str = payload.get("sub")  # Use email instead of username
         role: str = payload.get("role")
         if email is None or role is None:
@@ -114,50 +102,65 @@ def get_current_user(token: str = Security(oauth2_scheme), db: Session = Depends
             raise credentials_exception
         token_data = TokenData(username=email, role=role)
     except JWTError as e:
-        logger.error(f"JWT decoding error: {e}")
+        logger.error("JWT decoding error: %s", e)
         raise credentials_exception
-    user = db.query(User).filter(User.email == token_data.username).first()  # Query by email
-    if user is None:
-        logger.error(f"User not found for email: {token_data.username}")
-        raise credentials_exception
-    logger.debug(f"Authenticated user: {user.email}, role: {user.role}")
+    # Prvo probaj cache, tek onda bazu
+    snapshot = principal_cache.get(token_data.username)
+    if snapshot is None:
+        generation = principal_cache.generation()
+        async with AsyncSessionLocal() as db:
+            user = await db.scalar(select(User).where(User.email == token_data.username).limit(1))  # Query by email
+            if user is None:
+                logger.error("User not found for email: %s", token_data.username)
+                raise credentials_exception
+            snapshot = snapshot_user(user)
+        principal_cache.put(token_data.username, snapshot, generation)
+    user = user_from_snapshot(snapshot)
+    logger.debug("Authenticated user: %s, role: %s", user.email, user.role)
     return user
 
-def get_current_active_user(current_user: User = Depends(get_current_user)):
+async def get_current_active_user(current_user: User = Depends(get_current_user)):
     if not current_user.is_active:
         raise HTTPException(status_code=400, detail="Inactive user")
     return current_user
 
-def get_current_admin_user(current_user: User = Depends(get_current_active_user)):
+async def get_current_admin_user(current_user: User = Depends(get_current_active_user)):
     if current_user.role != "admin":
         raise HTTPException(status_code=403, detail="Not enough permissions")
     return current_user
 
 
+# Brojači cachea autentificiranih korisnika (hit/miss)
+@router.get("/principal-cache/stats")
+async def get_principal_cache_stats(current_user: User = Depends(get_current_admin_user)):
+    return principal_cache.stats()
+
+
 # Registracijski endpoint
 @router.post("/register", status_code=status.HTTP_201_CREATED)
-async def register(request: RegisterRequest, db: Session = Depends(get_db)):
+async def register(request: RegisterRequest, db: AsyncSession = Depends(get_async_db)):
     # Provjerite da li korisnik već postoji
-    if db.query(User).filter(User.email == request.email).first():
+    if await db.scalar(select(User.id).where(User.email == request.email).limit(1)):
         raise HTTPException(status_code=400, detail="Email already registered")
-    if db.query(User).filter(User.username == request.username).first():
+    if await db.scalar(select(User.id).where(User.username == request.username).limit(1)):
         raise HTTPException(status_code=400, detail="Username already taken")
 
     # Kreirajte novog korisnika
-    hashed_password = hash_password(request.password)
+    hashed_password = await password_hasher.hash(request.password)
     new_user = User(email=request.email, username=request.username, hashed_password=hashed_password)
     db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
 
-    # Pošaljite verifikacijski email
-    await send_verification_email(new_user.email)
+    # Verifikacijski email ide u outbox u istoj transakciji kao i korisnik;
+    # šalje ga pozadinski worker
+    enqueue_verification_email(db, new_user.email)
+    await db.commit()
+    outbox_sender.wake()
 
     return {"message": "User registered successfully. Please check your email to verify your account."}
 
 
 @router.get("/verify-email")
-def verify_email(token: str, db: Session = Depends(get_db)):
+async def verify_email(token: str, db: AsyncSession = Depends(get_async_db)):
     email = decode_verification_token(token)
     if not email:
         return JSONResponse(
@@ -165,7 +168,7 @@ def verify_email(token: str, db: Session = Depends(get_db)):
             status_code=400
         )
 
-    user = db.query(User).filter(User.email == email).first()
+    user = await db.scalar(select(User).where(User.email == email).limit(1))
     if not user:
         return JSONResponse(
             content={"detail": "User not found"},
@@ -179,7 +182,7 @@ def verify_email(token: str, db: Session = Depends(get_db)):
         )
 
     user.is_email_verified = True
-    db.commit()
+    await db.commit()
 
     return JSONResponse(
         content={"detail": "Email has been successfully verified"},
@@ -187,12 +190,12 @@ def verify_email(token: str, db: Session = Depends(get_db)):
     )
 
 @router.post("/verify-otp")
-def verify_otp(otp_code: str, token: str, db: Session = Depends(get_db)):
+async def verify_otp(otp_code: str, token: str, db: AsyncSession = Depends(get_async_db)):
     email = decode_verification_token(token)
     if email is None:
         raise HTTPException(status_code=400, detail="Invalid token or user not found")
 
-    user = db.query(User).filter(User.email == email).first()
+    user = await db.scalar(select(User).where(User.email == email).limit(1))
     if not user:
         raise HTTPException(status_code=400, detail="Invalid token or user not found")
 
@@ -203,14 +206,14 @@ def verify_otp(otp_code: str, token: str, db: Session = Depends(get_db)):
     return {"message": "OTP code verified successfully"}
 
 @router.post("/setup-2fa")
-def setup_2fa(request: Request, db: Session = Depends(get_db)):
+async def setup_2fa(request: Request, db: AsyncSession = Depends(get_async_db)):
     user = request.user
     if not user.is_email_verified:
         raise HTTPException(status_code=400, detail="Email not verified")
 
     otp_secret = generate_otp_secret()
     user.otp_secret = otp_secret
-    db.commit()
+    await db.commit()
 
     qr_code = generate_qr_code(user.username, otp_secret)
 
@@ -218,21 +221,21 @@ def setup_2fa(request: Request, db: Session = Depends(get_db)):
 
 # Update the login endpoint to use email in the token
 @router.post("/login", response_model=Token)
-def login(user: UserIn, db: Session = Depends(get_db)):
-    logger.debug(f"Login attempt for email: {user.email}")
+async def login(user: UserIn, db: AsyncSession = Depends(get_async_db)):
+    logger.debug("Login attempt for email: %s", user.email)
     
-    # Find user by email
-    db_user = db.query(User).filter(User.email == user.email).first()
+    # Find user by email (async upit, bcrypt u process pool)
+    db_user = await db.scalar(select(User).where(User.email == user.email).limit(1))
     if not db_user:
-        logger.error(f"User not found with email: {user.email}")
+        logger.error("User not found with email: %s", user.email)
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Invalid email or password"
         )
     
     # Verify password
-    if not verify_password(user.password, db_user.hashed_password):
-        logger.error(f"Invalid password for email: {user.email}")
+    if not await password_hasher.verify(user.password, db_user.hashed_password):
+        logger.error("Invalid password for email: %s", user.email)
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Invalid email or password"
@@ -250,13 +253,13 @@ def login(user: UserIn, db: Session = Depends(get_db)):
     access_token = create_access_token(
         data={"sub": db_user.email, "role": db_user.role}, expires_delta=access_token_expires
     )
-    logger.debug(f"User {user.email} logged in successfully")
+    logger.debug("User %s logged in successfully", user.email)
     return {"access_token": access_token, "token_type": "bearer"}
 
 # Ruta za dobivanje trenutnog korisnika s više informacija
 @router.get("/me")
-def get_current_user_info(current_user: User = Depends(get_current_user)):
-    logger.debug(f"Fetching current user info for: {current_user.username}")
+async def get_current_user_info(current_user: User = Depends(get_current_user)):
+    logger.debug("Fetching current user info for: %s", current_user.username)
     return {
         "user_id": current_user.id,
         "username": current_user.username,
@@ -269,9 +272,9 @@ def get_current_user_info(current_user: User = Depends(get_current_user)):
 
 # Endpoint za pretraživanje korisnika po username
 @router.get("/users")
-def search_users(search: str, db: Session = Depends(get_db)):
-    users = db.query(User).filter(User.username.ilike(f"%{search}%")).all()
-    return {"users": [{"id": user.id, "username": user.username, "email": user.email, "profile_image":user.profile_image} for user in users]}
+async def search_users(search: str, cursor: Optional[str] = None, limit: int = USER_SEARCH_PAGE_SIZE, db: AsyncSession = Depends(get_async_db)):
+    # Rangirano (exact, prefiks, podniz), s kursorom; prekratki upiti vraćaju praznu listu
+    return await db.run_sync(find_users, search, cursor, limit)
 
 # OAuth Google login
 @router.get('/login/google')
@@ -280,15 +283,15 @@ async def login_google(request: Request):
     return await oauth.google.authorize_redirect(request, redirect_uri)
 
 @router.get('/auth/callback')
-async def auth_google_callback(request: Request, db: Session = Depends(get_db)):
+async def auth_google_callback(request: Request, db: AsyncSession = Depends(get_async_db)):
     token = await oauth.google.authorize_access_token(request)
     user_info = await oauth.google.parse_id_token(request, token)
-    user = db.query(User).filter(User.username == user_info['email']).first()
+    user = await db.scalar(select(User).where(User.username == user_info['email']).limit(1))
     if not user:
         user = User(username=user_info['email'], hashed_password='', role='user', otp_secret='')
         db.add(user)
-        db.commit()
-        db.refresh(user)
+        await db.commit()
+        await db.refresh(user)
     access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
         data={"sub": user.username, "role": user.role}, expires_delta=access_token_expires
@@ -297,26 +300,20 @@ async def auth_google_callback(request: Request, db: Session = Depends(get_db)):
     response.set_cookie(key="access_token", value=f"Bearer {access_token}", httponly=True)
     return response
 
-@router.post("/upload-profile-image")
+@router.post("/upload-profile-image", openapi_extra=PROFILE_IMAGE_UPLOAD_OPENAPI)
 async def upload_profile_image(
-    image: UploadFile = File(...),
+    request: Request,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    import os
-    from uuid import uuid4
-
-    upload_dir = "media/profile_images"
-    os.makedirs(upload_dir, exist_ok=True)
-    ext = os.path.splitext(image.filename)[1]  # <-- ispravljeno s 'image'
-    filename = f"{uuid4()}{ext}"
-    file_path = os.path.join(upload_dir, filename)
-
-    with open(file_path, "wb") as image_file:
-        content = await image.read()  # <-- ispravljeno s 'image'
-        image_file.write(content)
+    # Multipart polje "image" se čita kao stream (vidi media_storage)
+    profile_image = await save_profile_image(request)
 
-    current_user.profile_image = f"/media/profile_images/{filename}"
-    db.commit()
+    # current_user nije vezan na sesiju (vidi get_current_user)
+    user = await db.merge(current_user, load=False)
+    user.profile_image = profile_image
+    # Slika je ugrađena u keširane odgovore prijatelja i dijeljenja
+    await db.run_sync(bump_profile_versions, user.id)
+    await db.commit()
 
-    return {"profile_image": current_user.profile_image}
\ No newline at end of file
+    return {"profile_image": profile_image}
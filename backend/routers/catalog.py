@@ -0,0 +1,68 @@
+from fastapi import APIRouter, HTTPException
+from typing import Optional
+
+from catalog import CATALOG_SOURCES, SORT_OPTIONS, catalog
+from pagination import clamp_limit, decode_cursor, encode_cursor
+
+router = APIRouter()
+
+CATALOG_PAGE_SIZE = 20
+CATALOG_MAX_PAGE_SIZE = 100
+
+
+def _check_kind(kind: str):
+    if kind not in CATALOG_SOURCES:
+        raise HTTPException(status_code=404, detail="Unknown catalog")
+
+
+@router.get("/{kind}")
+def search_catalog(
+    kind: str,
+    origin: Optional[str] = None,
+    destination: Optional[str] = None,
+    min_price: Optional[float] = None,
+    max_price: Optional[float] = None,
+    type: Optional[str] = None,
+    sort: str = "price",
+    cursor: Optional[str] = None,
+    limit: int = CATALOG_PAGE_SIZE,
+):
+    """Pretraga kataloga: filtri po relaciji, cijeni i tipu, sortiranje, keyset stranice.
+
+    Za transport_flight je `origin` trenutna lokacija, a `destination` aerodrom polaska.
+    """
+    _check_kind(kind)
+    if sort not in SORT_OPTIONS:
+        raise HTTPException(status_code=400, detail=f"sort must be one of: {', '.join(SORT_OPTIONS)}")
+    limit = clamp_limit(limit, CATALOG_PAGE_SIZE, CATALOG_MAX_PAGE_SIZE)
+    after = decode_cursor(cursor)
+    if after is not None:
+        # Kursor je [sort, *ključ]: ključ jednog sortiranja ne vrijedi u drugom
+        if not isinstance(after, list) or not after:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        if after[0] != sort:
+            raise HTTPException(status_code=400, detail="Cursor does not match sort")
+        after = tuple(after[1:])
+    # Jedna referenca na indeks za cijeli request (reload ga može zamijeniti)
+    index = catalog.index
+    try:
+        items, last_key = index.search(
+            kind, origin, destination, min_price, max_price, type, sort, after, limit
+        )
+    except TypeError:
+        # Izmijenjen kursor - ključevi se ne mogu usporediti
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return {
+        "items": items,
+        "next_cursor": encode_cursor([sort, *last_key]) if last_key is not None else None,
+        "version": index.version,
+    }
+
+
+@router.get("/{kind}/{item_id}")
+def get_catalog_item(kind: str, item_id: str):
+    _check_kind(kind)
+    item = catalog.index.get(kind, item_id)
+    if item is None:
+        raise HTTPException(status_code=404, detail="Catalog item not found")
+    return item
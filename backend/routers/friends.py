@@ -1,19 +1,60 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from sqlalchemy import and_, func, insert, literal, or_, select, tuple_, union, update
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from database import SessionLocal, get_db
+from database import get_async_db, get_db
 from models import User, Friend , FriendshipStatus
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict, TypeAdapter
 from routers.auth import get_current_user  # Uvoz funkcije iz auth.py
+from fast_json import json_response
+from pagination import clamp_limit, decode_cursor, encode_cursor
+from friend_graph import friend_graph, SUGGESTION_LIMIT
+from versions import bump_versions, not_modified, SCOPE_FRIENDS
+from typing import List, Optional
+import datetime
+import logging
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
-# Dependency za dobivanje SQLAlchemy sessiona
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+FRIENDS_PAGE_SIZE = 100
+FRIENDS_MAX_PAGE_SIZE = 500
+FRIENDS_BULK_MAX = 200
+
+
+def _split_page(rows, limit, cursor_key):
+    """Odreži višak reda (limit + 1) i vrati (stranica, kursor za sljedeću)."""
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor(cursor_key(rows[-1]))
+
+
+def _friends_page(db: Session, user_id: int, cursor: Optional[str], limit: int, columns, search: Optional[str] = None):
+    """Prihvaćeni prijatelji korisnika (oba smjera) u jednom upitu.
+
+    Id-jevi prijatelja dolaze iz UNION-a dva smjera jer svaki ima svoj indeks;
+    OR u JOIN-u planer ne može poslužiti indeksom.
+    Stabilan redoslijed po (username, id), keyset paginacija po istom ključu.
+    `search` filtrira po dijelu username-a (bez obzira na velika slova).
+    """
+    limit = clamp_limit(limit, FRIENDS_PAGE_SIZE, FRIENDS_MAX_PAGE_SIZE)
+    friend_ids = union(
+        select(Friend.friend_id).where(Friend.user_id == user_id, Friend.status == FriendshipStatus.accepted),
+        select(Friend.user_id).where(Friend.friend_id == user_id, Friend.status == FriendshipStatus.accepted),
+    )
+    q = db.query(*columns).filter(User.id.in_(friend_ids))
+    search = (search or "").strip().lower()
+    if search:
+        q = q.filter(func.lower(User.username).contains(search, autoescape=True))
+    after = decode_cursor(cursor)
+    if after is not None:
+        if not (isinstance(after, list) and len(after) == 2):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        q = q.filter(tuple_(User.username, User.id) > tuple_(literal(after[0]), literal(after[1])))
+    rows = q.order_by(User.username, User.id).limit(limit + 1).all()
+    return _split_page(rows, limit, lambda row: [row.username, row.id])
 
 class FriendRequestAction(BaseModel):
     request_id: int
@@ -23,12 +64,41 @@ class AddFriendRequest(BaseModel):
     user_id: int
     friend_id: int
 
-@router.post("/add-friend")
-def add_friend(request: AddFriendRequest, db: Session = Depends(get_db)):
+class BulkFriendRequestAction(BaseModel):
+    request_ids: List[int]
+    action: str
+
+class BulkAddFriendRequest(BaseModel):
+    friend_ids: List[int]
+
+class FriendOut(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    username: str
+
+class FriendPage(BaseModel):
+    friends: List[FriendOut]
+    next_cursor: Optional[str] = None
+
+# Kompajlirano jednom pri importu; čita redove upita (Row) preko atributa
+FRIEND_PAGE = TypeAdapter(FriendPage)
+
+
+def _check_batch(ids: List[int]) -> List[int]:
+    # Jedinstveni id-evi u izvornom redoslijedu, uz ograničenje veličine batcha
+    ids = list(dict.fromkeys(ids))
+    if not ids:
+        raise HTTPException(status_code=400, detail="No ids given")
+    if len(ids) > FRIENDS_BULK_MAX:
+        raise HTTPException(status_code=400, detail=f"At most {FRIENDS_BULK_MAX} ids per request")
+    return ids
+
+def _add_friend(db: Session, request: AddFriendRequest):
     user_id = request.user_id
     friend_id = request.friend_id
 
-    print(f"Received friend request from user ID: {user_id} to friend ID: {friend_id}")
+    logger.debug("Received friend request from user ID: %s to friend ID: %s", user_id, friend_id)
 
     # Provjerite da li zahtjev već postoji
     existing_request = db.query(Friend).filter(
@@ -36,15 +106,15 @@ def add_friend(request: AddFriendRequest, db: Session = Depends(get_db)):
     ).first()
 
     if existing_request:
-        print(f"Existing request found: {existing_request}")
-        if existing_request.status == "rejected":
-            # Ako je status "rejected", izbriši stari zapis i kreiraj novi
+        logger.debug("Existing request found: %s", existing_request.id)
+        if existing_request.status == FriendshipStatus.rejected:
+            # Ako je status "rejected", izbriši stari zapis i kreiraj novi (isti commit)
             db.delete(existing_request)
-            db.commit()
-            print(f"Deleted rejected request from {user_id} to {friend_id}")
-        elif existing_request.status == "pending":
+            db.flush()
+            logger.debug("Deleted rejected request from %s to %s", user_id, friend_id)
+        elif existing_request.status == FriendshipStatus.pending:
             raise HTTPException(status_code=400, detail="Friend request is already pending")
-        elif existing_request.status == "accepted":
+        elif existing_request.status == FriendshipStatus.accepted:
             raise HTTPException(status_code=400, detail="You are already friends")
         else:
             raise HTTPException(status_code=400, detail="Friend request already exists")
@@ -52,20 +122,25 @@ def add_friend(request: AddFriendRequest, db: Session = Depends(get_db)):
     # Kreirajte novi zahtjev za prijateljstvo
     friend_request = Friend(user_id=user_id, friend_id=friend_id, status="pending")
     db.add(friend_request)
+    bump_versions(db, SCOPE_FRIENDS, [user_id, friend_id])
     db.commit()
-    print(f"Created new friend request from {user_id} to {friend_id}")
+    logger.debug("Created new friend request from %s to %s", user_id, friend_id)
 
     return {"message": "Friend request sent successfully"}
+
+@router.post("/add-friend")
+async def add_friend(request: AddFriendRequest, db: AsyncSession = Depends(get_async_db)):
+    return await db.run_sync(_add_friend, request)
     
 
-@router.post("/respond-friend-request")
-def respond_friend_request(request: FriendRequestAction, db: Session = Depends(get_db)):
+def _respond_friend_request(db: Session, request: FriendRequestAction):
     # Dohvati zahtjev za prijateljstvo
     friend_request = db.query(Friend).filter(Friend.id == request.request_id).first()
     if not friend_request:
         raise HTTPException(status_code=404, detail="Friend request not found")
 
     # Ažuriraj status zahtjeva
+    was_accepted = friend_request.status == FriendshipStatus.accepted
     if request.action == "accept":
         friend_request.status = "accepted"
     elif request.action == "reject":
@@ -73,77 +148,301 @@ def respond_friend_request(request: FriendRequestAction, db: Session = Depends(g
     else:
         raise HTTPException(status_code=400, detail="Invalid action")
 
+    bump_versions(db, SCOPE_FRIENDS, [friend_request.user_id, friend_request.friend_id])
     db.commit()
+    # Indeks prijateljstava ažuriramo tek nakon uspješnog commita
+    if request.action == "accept" and not was_accepted:
+        friend_graph.add_edge(friend_request.user_id, friend_request.friend_id)
+    elif request.action == "reject" and was_accepted:
+        friend_graph.remove_edge(friend_request.user_id, friend_request.friend_id)
     return {"message": f"Friend request {request.action}ed successfully"}
 
-@router.get("/friend-requests/{user_id}")
-def get_friend_requests(user_id: int, db: Session = Depends(get_db)):
-    requests = (
-        db.query(Friend)
+@router.post("/respond-friend-request")
+async def respond_friend_request(request: FriendRequestAction, db: AsyncSession = Depends(get_async_db)):
+    return await db.run_sync(_respond_friend_request, request)
+
+def _respond_friend_requests(db: Session, request: BulkFriendRequestAction, current_user: User):
+    """Prihvati ili odbij više zahtjeva upućenih trenutnom korisniku jednim UPDATE-om."""
+    ids = _check_batch(request.request_ids)
+    if request.action == "accept":
+        new_status = FriendshipStatus.accepted
+    elif request.action == "reject":
+        new_status = FriendshipStatus.rejected
+    else:
+        raise HTTPException(status_code=400, detail="Invalid action")
+
+    updated = db.execute(
+        update(Friend)
+        .where(
+            Friend.id.in_(ids),
+            Friend.friend_id == current_user.id,
+            Friend.status == FriendshipStatus.pending,
+        )
+        .values(status=new_status)
+        .returning(Friend.id, Friend.user_id)
+        .execution_options(synchronize_session=False)
+    ).all()
+    bump_versions(db, SCOPE_FRIENDS, [current_user.id] + [row.user_id for row in updated])
+    db.commit()
+
+    senders = {row.id: row.user_id for row in updated}
+    if new_status == FriendshipStatus.accepted:
+        for sender_id in senders.values():
+            friend_graph.add_edge(sender_id, current_user.id)
+    done = "accepted" if new_status == FriendshipStatus.accepted else "rejected"
+    return {"results": [
+        {"request_id": request_id, "status": done if request_id in senders else "not_found"}
+        for request_id in ids
+    ]}
+
+@router.post("/respond-friend-requests")
+async def respond_friend_requests(
+    request: BulkFriendRequestAction,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user)
+):
+    return await db.run_sync(_respond_friend_requests, request, current_user)
+
+def _insert_friend_requests(db: Session, user_id: int, friend_ids: List[int]) -> set:
+    """INSERT ... ON CONFLICT DO NOTHING; vraća friend_id-eve koji su stvarno upisani."""
+    now = datetime.datetime.utcnow()
+    rows = [
+        {"user_id": user_id, "friend_id": friend_id, "status": FriendshipStatus.pending, "created_at": now}
+        for friend_id in friend_ids
+    ]
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    else:
+        # Ostali dijalekti: običan INSERT, konflikt završava IntegrityErrorom
+        db.execute(insert(Friend).values(rows))
+        return set(friend_ids)
+    stmt = (
+        dialect_insert(Friend).values(rows)
+        .on_conflict_do_nothing(index_elements=[Friend.user_id, Friend.friend_id])
+        .returning(Friend.friend_id)
+    )
+    return {row.friend_id for row in db.execute(stmt)}
+
+def _add_friends(db: Session, request: BulkAddFriendRequest, current_user: User):
+    """Pošalji zahtjeve za prijateljstvo listi korisnika u jednoj transakciji.
+
+    Odbijeni zahtjevi vraćaju se na pending jednim UPDATE-om, novi se
+    upisuju jednim INSERT-om; rezultat se vraća po svakom id-u.
+    """
+    ids = _check_batch(request.friend_ids)
+    me = current_user.id
+    existing_users = {row.id for row in db.query(User.id).filter(User.id.in_(ids))}
+    existing = db.query(Friend.user_id, Friend.friend_id, Friend.status).filter(or_(
+        and_(Friend.user_id == me, Friend.friend_id.in_(ids)),
+        and_(Friend.friend_id == me, Friend.user_id.in_(ids)),
+    )).all()
+    outgoing = {row.friend_id: row.status for row in existing if row.user_id == me}
+    incoming = {row.user_id: row.status for row in existing if row.friend_id == me}
+
+    results = {}
+    to_reopen = []
+    to_insert = []
+    for friend_id in ids:
+        if friend_id == me:
+            results[friend_id] = "invalid"
+        elif friend_id not in existing_users:
+            results[friend_id] = "not_found"
+        elif FriendshipStatus.accepted in (outgoing.get(friend_id), incoming.get(friend_id)):
+            results[friend_id] = "already_friends"
+        elif outgoing.get(friend_id) == FriendshipStatus.pending:
+            results[friend_id] = "already_pending"
+        elif incoming.get(friend_id) == FriendshipStatus.pending:
+            results[friend_id] = "incoming_pending"
+        elif outgoing.get(friend_id) == FriendshipStatus.rejected:
+            to_reopen.append(friend_id)
+            results[friend_id] = "sent"
+        else:
+            to_insert.append(friend_id)
+            results[friend_id] = "sent"
+
+    if to_reopen:
+        db.execute(
+            update(Friend)
+            .where(Friend.user_id == me, Friend.friend_id.in_(to_reopen), Friend.status == FriendshipStatus.rejected)
+            .values(status=FriendshipStatus.pending, created_at=datetime.datetime.utcnow())
+            .execution_options(synchronize_session=False)
+        )
+    if to_insert:
+        inserted = _insert_friend_requests(db, me, to_insert)
+        # Paralelni request je u međuvremenu upisao isti par (uq_friends_user_id_friend_id)
+        for friend_id in to_insert:
+            if friend_id not in inserted:
+                results[friend_id] = "already_pending"
+        to_insert = [friend_id for friend_id in to_insert if friend_id in inserted]
+    if to_reopen or to_insert:
+        bump_versions(db, SCOPE_FRIENDS, [me] + to_reopen + to_insert)
+    db.commit()
+    return {"results": [{"user_id": friend_id, "status": results[friend_id]} for friend_id in ids]}
+
+@router.post("/add-friends")
+async def add_friends(
+    request: BulkAddFriendRequest,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user)
+):
+    return await db.run_sync(_add_friends, request, current_user)
+
+def _get_friend_requests(
+    db: Session,
+    user_id: int,
+    request: Request,
+    response: Response,
+    cursor: Optional[str],
+    limit: int
+):
+    cached = not_modified(request, response, db, user_id, SCOPE_FRIENDS)
+    if cached:
+        return cached
+    # Jedan JOIN upit umjesto upita po zahtjevu; sortirano po id-u zahtjeva
+    limit = clamp_limit(limit, FRIENDS_PAGE_SIZE, FRIENDS_MAX_PAGE_SIZE)
+    q = (
+        db.query(Friend.id, User.username, User.email, User.profile_image)
+        .join(User, User.id == Friend.user_id)
         .filter(Friend.friend_id == user_id, Friend.status == FriendshipStatus.pending)
-        .all()
     )
-    result = []
-    for req in requests:
-        user = db.query(User).filter(User.id == req.user_id).first()
-        result.append({
-            "id": req.id,
-            "username": user.username,
-            "email": user.email,
-            "profile_image": user.profile_image  # <-- OVO DODAJ!
-        })
-    return {"friend_requests": result}
+    after = decode_cursor(cursor)
+    if after is not None:
+        if not isinstance(after, int):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        q = q.filter(Friend.id > after)
+    rows = q.order_by(Friend.id).limit(limit + 1).all()
+    rows, next_cursor = _split_page(rows, limit, lambda row: row.id)
+    result = [
+        {"id": row.id, "username": row.username, "email": row.email, "profile_image": row.profile_image}
+        for row in rows
+    ]
+    return json_response({"friend_requests": result, "next_cursor": next_cursor}, response)
 
-@router.delete("/remove-friend/{friend_id}")
-def remove_friend(friend_id: int, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+@router.get("/friend-requests/{user_id}")
+def get_friend_requests(
+    user_id: int,
+    request: Request,
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = FRIENDS_PAGE_SIZE,
+    db: Session = Depends(get_db)
+):
+    return _get_friend_requests(db, user_id, request, response, cursor, limit)
+
+def _remove_friend(db: Session, friend_id: int, current_user: User):
     friend = db.query(Friend).filter(
         (Friend.user_id == current_user.id) & (Friend.friend_id == friend_id)
     ).first()
     if not friend:
         raise HTTPException(status_code=404, detail="Friend not found")
 
+    was_accepted = friend.status == FriendshipStatus.accepted
     db.delete(friend)
+    bump_versions(db, SCOPE_FRIENDS, [current_user.id, friend_id])
     db.commit()
+    if was_accepted:
+        friend_graph.remove_edge(current_user.id, friend_id)
     return {"message": "Friend removed successfully"}
 
-@router.get("/{user_id}")
-def get_friends(user_id: int, db: Session = Depends(get_db)):
-    friends = (
-        db.query(Friend)
-        .filter(
-            ((Friend.user_id == user_id) | (Friend.friend_id == user_id)),
-            Friend.status == "accepted"  # ili FriendshipStatus.accepted ako koristiš Enum
-        )
-        .all()
-    )
-    result = []
-    for f in friends:
-        # Pronađi pravog prijatelja (ne trenutnog usera)
-        friend_user_id = f.friend_id if f.user_id == user_id else f.user_id
-        user = db.query(User).filter(User.id == friend_user_id).first()
-        result.append({
-            "id": user.id,
-            "username": user.username,
-            "email": user.email,
-            "profile_image": user.profile_image  # <-- OVO JE KLJUČNO!
-        })
-    return {"friends": result}
-
-@router.get("/", response_model=list[dict])
-def get_my_friends(db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
-    # Pronađi sve prijatelje gdje je status accepted
-    friends = db.query(Friend).filter(
-        ((Friend.user_id == current_user.id) | (Friend.friend_id == current_user.id)),
-        Friend.status == "accepted"
+@router.delete("/remove-friend/{friend_id}")
+async def remove_friend(
+    friend_id: int,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user)
+):
+    return await db.run_sync(_remove_friend, friend_id, current_user)
+
+def _get_friend_suggestions(db: Session, limit: int, current_user: User):
+    # Mora biti prije /{user_id}; rangirano po broju zajedničkih prijatelja
+    limit = clamp_limit(limit, SUGGESTION_LIMIT, 100)
+    # Korisnici s kojima već postoji zahtjev na čekanju ne nude se ponovno
+    pending = db.query(Friend.user_id, Friend.friend_id).filter(
+        or_(Friend.user_id == current_user.id, Friend.friend_id == current_user.id),
+        Friend.status == FriendshipStatus.pending,
     ).all()
-    # Vrati listu prijatelja (osim samog sebe)
-    result = []
-    for f in friends:
-        if f.user_id == current_user.id:
-            friend_id = f.friend_id
-        else:
-            friend_id = f.user_id
-        friend_user = db.query(User).filter(User.id == friend_id).first()
-        if friend_user:
-            result.append({"id": friend_user.id, "username": friend_user.username})
-    return result
\ No newline at end of file
+    exclude = {uid for row in pending for uid in row}
+    ranked = friend_graph.suggestions(db, current_user.id, limit, exclude)
+    if not ranked:
+        return {"suggestions": []}
+    users = {
+        row.id: row
+        for row in db.query(User.id, User.username, User.profile_image).filter(User.id.in_([uid for uid, _ in ranked]))
+    }
+    return {"suggestions": [
+        {
+            "id": uid,
+            "username": users[uid].username,
+            "profile_image": users[uid].profile_image,
+            "mutual_friends": mutual,
+        }
+        for uid, mutual in ranked if uid in users
+    ]}
+
+@router.get("/suggestions")
+def get_friend_suggestions(
+    limit: int = SUGGESTION_LIMIT,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    return _get_friend_suggestions(db, limit, current_user)
+
+def _get_friends(
+    db: Session,
+    user_id: int,
+    request: Request,
+    response: Response,
+    cursor: Optional[str],
+    limit: int
+):
+    cached = not_modified(request, response, db, user_id, SCOPE_FRIENDS)
+    if cached:
+        return cached
+    rows, next_cursor = _friends_page(
+        db, user_id, cursor, limit, (User.id, User.username, User.email, User.profile_image)
+    )
+    result = [
+        {"id": row.id, "username": row.username, "email": row.email, "profile_image": row.profile_image}
+        for row in rows
+    ]
+    return json_response({"friends": result, "next_cursor": next_cursor}, response)
+
+@router.get("/{user_id}")
+def get_friends(
+    user_id: int,
+    request: Request,
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = FRIENDS_PAGE_SIZE,
+    db: Session = Depends(get_db)
+):
+    return _get_friends(db, user_id, request, response, cursor, limit)
+
+def _get_my_friends(
+    db: Session,
+    request: Request,
+    response: Response,
+    cursor: Optional[str],
+    limit: int,
+    search: Optional[str],
+    current_user: User
+):
+    cached = not_modified(request, response, db, current_user.id, SCOPE_FRIENDS)
+    if cached:
+        return cached
+    rows, next_cursor = _friends_page(db, current_user.id, cursor, limit, (User.id, User.username), search)
+    return json_response({"friends": rows, "next_cursor": next_cursor}, response, FRIEND_PAGE)
+
+@router.get("/", response_model=FriendPage)
+def get_my_friends(
+    request: Request,
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = FRIENDS_PAGE_SIZE,
+    search: Optional[str] = None,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    return _get_my_friends(db, request, response, cursor, limit, search, current_user)
@@ -0,0 +1,67 @@
+from fastapi import APIRouter, HTTPException
+from typing import Optional
+
+from catalog import catalog, parse_clock
+from pagination import clamp_limit
+from route_search import OPTIMIZE_CHEAPEST, OPTIMIZE_FASTEST, find_route
+from trip_planner import PLANNER_RESULT_LIMIT, TRANSPORT_AIR, TRANSPORT_GROUND, plan_bundles
+
+router = APIRouter()
+
+PLANNER_MAX_NIGHTS = 60
+
+
+@router.get("/bundles")
+def get_trip_bundles(
+    origin: str,
+    destination: str,
+    nights: int,
+    budget: float,
+    transport_type: Optional[str] = None,
+    limit: int = PLANNER_RESULT_LIMIT,
+):
+    """Paketi prijevoz/let + smještaj unutar budžeta, Pareto fronta po cijeni, trajanju i ocjeni."""
+    if not 1 <= nights <= PLANNER_MAX_NIGHTS:
+        raise HTTPException(status_code=400, detail=f"nights must be between 1 and {PLANNER_MAX_NIGHTS}")
+    if budget <= 0:
+        raise HTTPException(status_code=400, detail="budget must be positive")
+    if transport_type not in (None, TRANSPORT_AIR, TRANSPORT_GROUND):
+        raise HTTPException(status_code=400, detail=f"transport_type must be {TRANSPORT_AIR} or {TRANSPORT_GROUND}")
+    index = catalog.index
+    bundles = plan_bundles(
+        index,
+        origin.strip().lower(),
+        destination.strip().lower(),
+        nights,
+        budget,
+        transport_type,
+        clamp_limit(limit, PLANNER_RESULT_LIMIT, PLANNER_RESULT_LIMIT),
+    )
+    return {"bundles": bundles, "version": index.version}
+
+
+@router.get("/routes")
+def get_route(
+    origin: str,
+    destination: str,
+    optimize: str = OPTIMIZE_CHEAPEST,
+    depart_after: str = "12:00 AM",
+):
+    """Najjeftinija ili najbrža ruta s presjedanjima (prijevoz do aerodroma, letovi, autobus/vlak).
+
+    `depart_after` je vrijeme u formatu kataloga ("8:00 AM"); dani u odgovoru su relativni.
+    """
+    if optimize not in (OPTIMIZE_CHEAPEST, OPTIMIZE_FASTEST):
+        raise HTTPException(status_code=400, detail=f"optimize must be {OPTIMIZE_CHEAPEST} or {OPTIMIZE_FASTEST}")
+    start = parse_clock(depart_after)
+    if start is None:
+        raise HTTPException(status_code=400, detail='depart_after must look like "8:00 AM"')
+    origin, destination = origin.strip().lower(), destination.strip().lower()
+    if origin == destination:
+        raise HTTPException(status_code=400, detail="origin and destination must differ")
+    index = catalog.index
+    route = find_route(index, origin, destination, start, optimize)
+    if route is None:
+        raise HTTPException(status_code=404, detail="No route found")
+    route["version"] = index.version
+    return route
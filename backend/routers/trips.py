@@ -1,10 +1,22 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from models import Trip, User , Friend, SharedTrip , SharedTripFeedback
-from database import get_db
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from sqlalchemy import and_, delete, extract, func, or_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, joinedload, load_only, selectinload
+from models import Trip, User , SharedTrip , SharedTripFeedback, UserTravelStats
+from database import get_async_db, get_db
 from routers.auth import get_current_user
-from pydantic import BaseModel
+from friend_graph import are_friends
+from fast_json import json_response
+from pagination import clamp_limit, decode_cursor, encode_cursor
+from trip_catalog import hydrate_trips, to_references
+from travel_stats import record_feedback, record_trip_created, record_trip_shared, record_trips_deleted, stats_summary
+from versions import bump_versions, not_modified, SCOPE_SHARED, SCOPE_TRIPS
+from pydantic import AliasChoices, BaseModel, ConfigDict, Field, TypeAdapter
 from typing import Optional, List
+from datetime import date
+import logging
+
+logger = logging.getLogger("trips")
 
 router = APIRouter()
 
@@ -13,83 +25,443 @@ class FeedbackRequest(BaseModel):
     rating: int
     comment: str
 
+class BulkDeleteTripsRequest(BaseModel):
+    trip_ids: List[int]
+
 class ShareTripRequest(BaseModel):
     trip_id: int
     friend_id: int
 
 class TripCreate(BaseModel):
     name: str
-    start_date: str
-    end_date: str
+    start_date: date
+    end_date: date
     transport_type: str
     transport_option: dict
     accommodation: Optional[dict]
     flight: Optional[dict]
     total_cost: float
 
-    class Config:
-        orm_mode = True
+TRIP_FIELDS = (
+    "id", "name", "start_date", "end_date", "transport_type",
+    "transport_option", "accommodation", "flight", "total_cost",
+)
+TRIP_SUMMARY_FIELDS = ("id", "name", "start_date", "end_date", "transport_type", "total_cost")
+TRIPS_PAGE_SIZE = 50
+TRIPS_MAX_PAGE_SIZE = 200
+TRIPS_OVERVIEW_PAGE_SIZE = 20
+TRIPS_BULK_MAX = 200
+CALENDAR_MAX_WINDOW_DAYS = 366
+CALENDAR_MAX_MONTHS = 24
 
 class TripOut(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
     id: int
-    name: str
-    start_date: str
-    end_date: str
-    transport_type: str
-    transport_option: dict
+    name: Optional[str]
+    start_date: Optional[date]
+    end_date: Optional[date]
+    transport_type: Optional[str]
+    transport_option: Optional[dict]
     accommodation: Optional[dict]
     flight: Optional[dict]
     total_cost: float
 
-    class Config:
-        orm_mode = True
+class TripSummaryOut(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    name: Optional[str]
+    start_date: Optional[date]
+    end_date: Optional[date]
+    transport_type: Optional[str]
+    total_cost: float
+
+class SharedUserOut(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    username: str
+    email: str
+
+class FeedbackUserOut(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    username: str
+    profile_image: Optional[str]
+
+class FeedbackOut(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    rating: Optional[int]
+    comment: Optional[str]
+    # Iz ORM-a se čita SharedTripFeedback.created_by, u JSON-u je "user"
+    user: FeedbackUserOut = Field(validation_alias=AliasChoices("user", "created_by"))
+
+# Stranica liste: stavke + kursor za sljedeću stranicu (None na zadnjoj)
+class TripSummaryPage(BaseModel):
+    trips: List[TripSummaryOut]
+    next_cursor: Optional[str] = None
+
+# Kompajlirano jednom pri importu (fast_json.json_response)
+TRIP_SUMMARY_LIST = TypeAdapter(List[TripSummaryOut])
+TRIP_SUMMARY_PAGE = TypeAdapter(TripSummaryPage)
+SHARED_USER_LIST = TypeAdapter(List[SharedUserOut])
+FEEDBACK_LIST = TypeAdapter(List[FeedbackOut])
+
+def _create_trip(db: Session, trip: TripCreate, current_user: User):
+    # Ne logiramo cijeli payload (transport/smještaj/let su veliki JSON-i)
+    logger.debug("Received trip %r for user %s", trip.name, current_user.id)
+    if trip.end_date < trip.start_date:
+        raise HTTPException(status_code=400, detail="end_date must not be before start_date")
+    # U tripu ostaju samo reference na katalog + snapshot cijene/vremena
+    transport_option, accommodation, flight = to_references(
+        db, trip.transport_option, trip.accommodation, trip.flight, trip.transport_type
+    )
+    db_trip = Trip(
+        name=trip.name,
+        start_date=trip.start_date,
+        end_date=trip.end_date,
+        transport_type=trip.transport_type,
+        transport_option=transport_option,
+        accommodation=accommodation,
+        flight=flight,
+        total_cost=trip.total_cost,
+        user_id=current_user.id
+    )
+    db.add(db_trip)
+    record_trip_created(db, db_trip)
+    bump_versions(db, SCOPE_TRIPS, [current_user.id])
+    db.commit()
+    db.refresh(db_trip)
+    logger.debug("Trip %s created successfully", db_trip.id)
+    item = {field: getattr(db_trip, field) for field in TRIP_FIELDS}
+    item["user_id"] = db_trip.user_id
+    return json_response(hydrate_trips(db, [item])[0], status_code=201)
 
 @router.post("/trips/", status_code=201)
-def create_trip(
+async def create_trip(
     trip: TripCreate,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user)
+):
+    return await db.run_sync(_create_trip, trip, current_user)
+
+def _parse_trip_fields(fields: Optional[str]):
+    """`fields=` -> tuple stupaca; None = sve, "summary" = kompaktni prikaz za liste."""
+    if not fields:
+        return TRIP_FIELDS
+    if fields == "summary":
+        return TRIP_SUMMARY_FIELDS
+    requested = [field.strip() for field in fields.split(",") if field.strip()]
+    unknown = [field for field in requested if field not in TRIP_FIELDS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown trip fields: {', '.join(unknown)}")
+    # id je uvijek potreban (kursor, linkovi na trip)
+    return tuple(field for field in TRIP_FIELDS if field == "id" or field in requested)
+
+def _get_my_trips(
+    db: Session,
+    request: Request,
+    response: Response,
+    cursor: Optional[str],
+    limit: int,
+    fields: Optional[str],
+    current_user: User
+):
+    cached = not_modified(request, response, db, current_user.id, SCOPE_TRIPS)
+    if cached:
+        return cached
+    # Nezatraženi stupci (npr. veliki JSON-i) se uopće ne čitaju iz baze (load_only)
+    selected = _parse_trip_fields(fields)
+    limit = clamp_limit(limit, TRIPS_PAGE_SIZE, TRIPS_MAX_PAGE_SIZE)
+    q = (
+        db.query(Trip)
+        .options(load_only(*[getattr(Trip, field) for field in selected]))
+        .filter(Trip.user_id == current_user.id)
+    )
+    after = decode_cursor(cursor)
+    if after is not None:
+        if not isinstance(after, int):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        q = q.filter(Trip.id > after)
+    trips = q.order_by(Trip.id).limit(limit + 1).all()
+    next_cursor = None
+    if len(trips) > limit:
+        trips = trips[:limit]
+        next_cursor = encode_cursor(trips[-1].id)
+    result = hydrate_trips(db, [{field: getattr(trip, field) for field in selected} for trip in trips])
+    return json_response({"trips": result, "next_cursor": next_cursor}, response)
+
+@router.get("/trips/")
+def get_my_trips(
+    request: Request,
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = TRIPS_PAGE_SIZE,
+    fields: Optional[str] = None,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    import logging
-    logger = logging.getLogger("trips")
-    logger.debug(f"Received trip payload: {trip.dict()}")
+    return _get_my_trips(db, request, response, cursor, limit, fields, current_user)
+
+def _get_my_trips_overview(
+    db: Session,
+    request: Request,
+    response: Response,
+    cursor: Optional[str],
+    limit: int,
+    current_user: User
+):
+    """Tripovi korisnika s primateljima dijeljenja i feedbackovima, straničeno po tripu.
+
+    Broj upita ne ovisi o broju tripova: verzije (ETag), tripovi, dijeljenja
+    (+ primatelji), feedbackovi (+ autori) i catalog_items pri hidraciji.
+    """
+    cached = not_modified(request, response, db, current_user.id, SCOPE_TRIPS)
+    if cached:
+        return cached
+    limit = clamp_limit(limit, TRIPS_OVERVIEW_PAGE_SIZE, TRIPS_MAX_PAGE_SIZE)
+    q = (
+        db.query(Trip)
+        .options(
+            selectinload(Trip.shares).options(
+                joinedload(SharedTrip.shared_with),
+                selectinload(SharedTrip.feedbacks).joinedload(SharedTripFeedback.created_by),
+            )
+        )
+        .filter(Trip.user_id == current_user.id)
+    )
+    after = decode_cursor(cursor)
+    if after is not None:
+        if not isinstance(after, int):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        q = q.filter(Trip.id > after)
+    trips = q.order_by(Trip.id).limit(limit + 1).all()
+    next_cursor = None
+    if len(trips) > limit:
+        trips = trips[:limit]
+        next_cursor = encode_cursor(trips[-1].id)
+
+    result = []
+    for trip in trips:
+        item = {field: getattr(trip, field) for field in TRIP_FIELDS}
+        item["shared_with"] = [
+            {"id": s.shared_with.id, "username": s.shared_with.username, "email": s.shared_with.email}
+            for s in trip.shares if s.shared_with
+        ]
+        item["feedbacks"] = [
+            {
+                "id": fb.id,
+                "rating": fb.rating,
+                "comment": fb.comment,
+                "user": {"id": fb.created_by.id, "username": fb.created_by.username, "profile_image": fb.created_by.profile_image}
+            }
+            for s in trip.shares for fb in s.feedbacks if fb.created_by
+        ]
+        result.append(item)
+    return json_response({"trips": hydrate_trips(db, result), "next_cursor": next_cursor}, response)
+
+@router.get("/trips/overview")
+def get_my_trips_overview(
+    request: Request,
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = TRIPS_OVERVIEW_PAGE_SIZE,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    return _get_my_trips_overview(db, request, response, cursor, limit, current_user)
+
+def _get_my_trip_stats(
+    db: Session,
+    request: Request,
+    response: Response,
+    current_user: User
+):
+    """Statistika putovanja iz zbirne tablice - jedan redak, bez skeniranja tripova."""
+    cached = not_modified(request, response, db, current_user.id, SCOPE_TRIPS, SCOPE_SHARED)
+    if cached:
+        return cached
+    stats = db.query(UserTravelStats).filter(UserTravelStats.user_id == current_user.id).first()
+    return json_response(stats_summary(stats), response)
+
+@router.get("/trips/stats")
+def get_my_trip_stats(
+    request: Request,
+    response: Response,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    return _get_my_trip_stats(db, request, response, current_user)
+
+def _calendar_query(db: Session, user_id: int):
+    # Kalendar prikazuje kompaktne tripove - bez velikih JSON stupaca
+    return (
+        db.query(Trip)
+        .options(load_only(*[getattr(Trip, field) for field in TRIP_SUMMARY_FIELDS]))
+        .filter(Trip.user_id == user_id)
+    )
+
+def _parse_month(value: str) -> date:
     try:
-        db_trip = Trip(
-            name=trip.name,
-            start_date=trip.start_date,
-            end_date=trip.end_date,
-            transport_type=trip.transport_type,
-            transport_option=trip.transport_option,
-            accommodation=trip.accommodation,
-            flight=trip.flight,
-            total_cost=trip.total_cost,
-            user_id=current_user.id
+        year, month = value.split("-")
+        return date(int(year), int(month), 1)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Month must be in YYYY-MM format")
+
+def _next_month(day: date) -> date:
+    return date(day.year + day.month // 12, day.month % 12 + 1, 1)
+
+def _get_upcoming_trips(
+    db: Session,
+    response: Response,
+    cursor: Optional[str],
+    limit: int,
+    current_user: User
+):
+    """Tripovi koji još nisu počeli, po datumu polaska.
+
+    Range scan po (user_id, start_date), keyset kursor (start_date, id). Bez
+    ETag-a: odgovor ovisi i o današnjem datumu, ne samo o verziji podataka.
+    """
+    limit = clamp_limit(limit, TRIPS_PAGE_SIZE, TRIPS_MAX_PAGE_SIZE)
+    q = _calendar_query(db, current_user.id).filter(Trip.start_date >= date.today())
+    after = decode_cursor(cursor)
+    if after is not None:
+        try:
+            after_date, after_id = date.fromisoformat(after[0]), int(after[1])
+        except (TypeError, ValueError, IndexError, KeyError):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        q = q.filter(or_(
+            Trip.start_date > after_date,
+            and_(Trip.start_date == after_date, Trip.id > after_id),
+        ))
+    trips = q.order_by(Trip.start_date, Trip.id).limit(limit + 1).all()
+    next_cursor = None
+    if len(trips) > limit:
+        trips = trips[:limit]
+        next_cursor = encode_cursor([trips[-1].start_date.isoformat(), trips[-1].id])
+    return json_response({"trips": trips, "next_cursor": next_cursor}, response, TRIP_SUMMARY_PAGE)
+
+@router.get("/trips/calendar/upcoming", response_model=TripSummaryPage)
+def get_upcoming_trips(
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = TRIPS_PAGE_SIZE,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    return _get_upcoming_trips(db, response, cursor, limit, current_user)
+
+def _get_trips_in_window(
+    db: Session,
+    start: date,
+    end: date,
+    request: Request,
+    response: Response,
+    current_user: User
+):
+    """Tripovi koji se preklapaju s prozorom [start, end] (uključivo).
+
+    Preklapanje je start_date <= end AND end_date >= start; upit je podijeljen
+    na dva raspona da baza može koristiti oba indeksa (BitmapOr): tripovi koji
+    počinju unutar prozora i tripovi koji su počeli prije i još traju.
+    """
+    if end < start:
+        raise HTTPException(status_code=400, detail="end must not be before start")
+    if (end - start).days > CALENDAR_MAX_WINDOW_DAYS:
+        raise HTTPException(status_code=400, detail=f"Window is limited to {CALENDAR_MAX_WINDOW_DAYS} days")
+    cached = not_modified(request, response, db, current_user.id, SCOPE_TRIPS)
+    if cached:
+        return cached
+    trips = (
+        _calendar_query(db, current_user.id)
+        .filter(or_(
+            Trip.start_date.between(start, end),
+            and_(Trip.start_date < start, Trip.end_date >= start),
+        ))
+        .order_by(Trip.start_date, Trip.id)
+        .all()
+    )
+    return json_response(trips, response, TRIP_SUMMARY_LIST)
+
+@router.get("/trips/calendar", response_model=List[TripSummaryOut])
+def get_trips_in_window(
+    start: date,
+    end: date,
+    request: Request,
+    response: Response,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    return _get_trips_in_window(db, start, end, request, response, current_user)
+
+def _get_trips_per_month(
+    db: Session,
+    request: Request,
+    response: Response,
+    start: Optional[str],
+    end: Optional[str],
+    current_user: User
+):
+    """Broj tripova i trošak po mjesecu polaska za mjesece start..end (YYYY-MM).
+
+    Zadano je tekuća godina. Agregira baza nad range scanom po
+    (user_id, start_date); prazni mjeseci se vraćaju s nulama.
+    """
+    today = date.today()
+    first = _parse_month(start) if start else date(today.year, 1, 1)
+    last = _parse_month(end) if end else date(today.year, 12, 1)
+    if last < first:
+        raise HTTPException(status_code=400, detail="end must not be before start")
+    months = [first]
+    while months[-1] < last:
+        months.append(_next_month(months[-1]))
+        if len(months) > CALENDAR_MAX_MONTHS:
+            raise HTTPException(status_code=400, detail=f"At most {CALENDAR_MAX_MONTHS} months per request")
+    cached = not_modified(request, response, db, current_user.id, SCOPE_TRIPS)
+    if cached:
+        return cached
+
+    year = extract("year", Trip.start_date)
+    month = extract("month", Trip.start_date)
+    rows = (
+        db.query(year, month, func.count(Trip.id), func.coalesce(func.sum(Trip.total_cost), 0))
+        .filter(
+            Trip.user_id == current_user.id,
+            Trip.start_date >= first,
+            Trip.start_date < _next_month(last),
         )
-        db.add(db_trip)
-        db.commit()
-        db.refresh(db_trip)
-        logger.debug(f"Trip created successfully: {db_trip}")
-        return db_trip
-    except Exception as e:
-        logger.error(f"Error creating trip: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
-
-@router.get("/trips/", response_model=List[TripOut])
-def get_my_trips(
+        .group_by(year, month)
+        .all()
+    )
+    buckets = {(int(y), int(m)): (count, cost) for y, m, count, cost in rows}
+    return json_response([
+        {
+            "month": f"{day.year:04d}-{day.month:02d}",
+            "trip_count": buckets.get((day.year, day.month), (0, 0))[0],
+            "total_cost": buckets.get((day.year, day.month), (0, 0))[1],
+        }
+        for day in months
+    ], response)
+
+@router.get("/trips/calendar/months", response_model=List[dict])
+def get_trips_per_month(
+    request: Request,
+    response: Response,
+    start: Optional[str] = None,
+    end: Optional[str] = None,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    trips = db.query(Trip).filter(Trip.user_id == current_user.id).all()
-    return trips
+    return _get_trips_per_month(db, request, response, start, end, current_user)
 
-@router.post("/trips/share/")
-def share_trip(request: ShareTripRequest, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
-    # Provjeri postoji li prijateljstvo
-    friendship = db.query(Friend).filter(
-        ((Friend.user_id == current_user.id) & (Friend.friend_id == request.friend_id) & (Friend.status == "accepted")) |
-        ((Friend.user_id == request.friend_id) & (Friend.friend_id == current_user.id) & (Friend.status == "accepted"))
-    ).first()
-    if not friendship:
+def _share_trip(db: Session, request: ShareTripRequest, current_user: User):
+    # Provjeri postoji li prijateljstvo; u bazi, jer indeks u memoriji ne vidi brisanja iz drugih procesa
+    if not are_friends(db, current_user.id, request.friend_id):
         raise HTTPException(status_code=403, detail="You are not friends with this user.")
 
     # Provjeri postoji li trip i da li pripada korisniku
@@ -111,29 +483,91 @@ def share_trip(request: ShareTripRequest, db: Session = Depends(get_db), current
         shared_by_id=current_user.id
     )
     db.add(shared_trip)
+    record_trip_shared(db, current_user.id, request.friend_id)
+    bump_versions(db, SCOPE_TRIPS, [current_user.id])
+    bump_versions(db, SCOPE_SHARED, [request.friend_id])
     db.commit()
     return {"message": "Trip shared successfully"}
 
-@router.delete("/trips/{trip_id}")
-def delete_trip(trip_id: int, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
-    trip = db.query(Trip).filter(Trip.id == trip_id, Trip.user_id == current_user.id).first()
-    if not trip:
-        raise HTTPException(status_code=404, detail="Trip not found or not yours.")
+@router.post("/trips/share/")
+async def share_trip(
+    request: ShareTripRequest,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user)
+):
+    return await db.run_sync(_share_trip, request, current_user)
 
-    # Prvo obriši sve feedbackove povezane sa shared tripovima
-    shared_trips = db.query(SharedTrip).filter(SharedTrip.trip_id == trip_id).all()
-    for shared in shared_trips:
-        db.query(SharedTripFeedback).filter(SharedTripFeedback.shared_trip_id == shared.id).delete()
-    db.query(SharedTrip).filter(SharedTrip.trip_id == trip_id).delete()
-    db.delete(trip)
+def _delete_trips(db: Session, user_id: int, trip_ids: List[int]) -> List[int]:
+    """Obriši tripove korisnika jednim DELETE-om; dijeljenja i feedbackove briše baza (CASCADE).
+
+    Vraća id-eve stvarno obrisanih tripova. Commit radi pozivatelj.
+    """
+    # Primatelji dijeljenja (statistika i verzije) prije nego ih kaskada obriše
+    recipients = [
+        row.shared_with_id
+        for row in db.query(SharedTrip.shared_with_id)
+        .join(Trip, Trip.id == SharedTrip.trip_id)
+        .filter(Trip.id.in_(trip_ids), Trip.user_id == user_id)
+    ]
+    record_trips_deleted(db, user_id, trip_ids, recipients)
+    deleted = [
+        row.id for row in db.execute(
+            delete(Trip)
+            .where(Trip.id.in_(trip_ids), Trip.user_id == user_id)
+            .returning(Trip.id)
+            .execution_options(synchronize_session=False)
+        )
+    ]
+    if deleted:
+        bump_versions(db, SCOPE_TRIPS, [user_id])
+        bump_versions(db, SCOPE_SHARED, recipients)
+    return deleted
+
+def _bulk_delete_trips(db: Session, request: BulkDeleteTripsRequest, current_user: User):
+    trip_ids = list(dict.fromkeys(request.trip_ids))
+    if not trip_ids:
+        raise HTTPException(status_code=400, detail="No trip ids given")
+    if len(trip_ids) > TRIPS_BULK_MAX:
+        raise HTTPException(status_code=400, detail=f"At most {TRIPS_BULK_MAX} trips per request")
+    deleted = _delete_trips(db, current_user.id, trip_ids)
+    db.commit()
+    deleted_set = set(deleted)
+    return {
+        "deleted": [trip_id for trip_id in trip_ids if trip_id in deleted_set],
+        "not_found": [trip_id for trip_id in trip_ids if trip_id not in deleted_set],
+    }
+
+@router.post("/trips/bulk-delete")
+async def bulk_delete_trips(
+    request: BulkDeleteTripsRequest,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user)
+):
+    return await db.run_sync(_bulk_delete_trips, request, current_user)
+
+def _delete_trip(db: Session, trip_id: int, current_user: User):
+    if not _delete_trips(db, current_user.id, [trip_id]):
+        raise HTTPException(status_code=404, detail="Trip not found or not yours.")
     db.commit()
     return {"detail": "Trip deleted"}
 
-@router.get("/trips/shared/", response_model=list[dict])
-def get_shared_trips(
-    db: Session = Depends(get_db),
+@router.delete("/trips/{trip_id}")
+async def delete_trip(
+    trip_id: int,
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
+    return await db.run_sync(_delete_trip, trip_id, current_user)
+
+def _get_shared_trips(
+    db: Session,
+    request: Request,
+    response: Response,
+    current_user: User
+):
+    cached = not_modified(request, response, db, current_user.id, SCOPE_SHARED)
+    if cached:
+        return cached
     shared = db.query(SharedTrip).filter(SharedTrip.shared_with_id == current_user.id).all()
     result = []
     for s in shared:
@@ -157,34 +591,47 @@ def get_shared_trips(
                 },
                 "shared_trip_id": s.id  # <-- OVO DODAJ!
             })
-    return result
+    # Puni objekti iz kataloga, jednim upitom za sve tripove
+    hydrate_trips(db, [item["trip"] for item in result])
+    return json_response(result, response)
 
-@router.get("/trips/shared-with/{trip_id}", response_model=List[dict])
-def get_shared_with_for_trip(
-    trip_id: int,
+@router.get("/trips/shared/", response_model=list[dict])
+def get_shared_trips(
+    request: Request,
+    response: Response,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
+    return _get_shared_trips(db, request, response, current_user)
+
+def _get_shared_with_for_trip(
+    db: Session,
+    trip_id: int,
+    request: Request,
+    response: Response,
+    current_user: User
+):
+    cached = not_modified(request, response, db, current_user.id, SCOPE_TRIPS)
+    if cached:
+        return cached
     # Provjeri da je trip od trenutnog korisnika
     trip = db.query(Trip).filter(Trip.id == trip_id, Trip.user_id == current_user.id).first()
     if not trip:
         raise HTTPException(status_code=404, detail="Trip not found or not yours.")
     shared = db.query(SharedTrip).filter(SharedTrip.trip_id == trip_id).all()
-    return [
-        {
-            "id": s.shared_with.id,
-            "username": s.shared_with.username,
-            "email": s.shared_with.email
-        }
-        for s in shared if s.shared_with
-    ]
-    
-@router.post("/trips/feedback/")
-def leave_feedback(
-    feedback: FeedbackRequest,
+    return json_response([s.shared_with for s in shared if s.shared_with], response, SHARED_USER_LIST)
+
+@router.get("/trips/shared-with/{trip_id}", response_model=List[SharedUserOut])
+def get_shared_with_for_trip(
+    trip_id: int,
+    request: Request,
+    response: Response,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
+    return _get_shared_with_for_trip(db, trip_id, request, response, current_user)
+    
+def _leave_feedback(db: Session, feedback: FeedbackRequest, current_user: User):
     shared_trip = db.query(SharedTrip).filter(
         SharedTrip.id == feedback.shared_trip_id,
         SharedTrip.shared_with_id == current_user.id
@@ -207,38 +654,59 @@ def leave_feedback(
         created_by_id=current_user.id
     )
     db.add(fb)
+    record_feedback(db, shared_trip.shared_by_id, feedback.rating)
+    bump_versions(db, SCOPE_TRIPS, [shared_trip.shared_by_id])
+    bump_versions(db, SCOPE_SHARED, [current_user.id])
     db.commit()
     return {"message": "Feedback submitted"}
 
-@router.get("/trips/{trip_id}/feedbacks", response_model=List[dict])
-def get_feedbacks_for_trip(
-    trip_id: int,
-    db: Session = Depends(get_db),
+@router.post("/trips/feedback/")
+async def leave_feedback(
+    feedback: FeedbackRequest,
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
+    return await db.run_sync(_leave_feedback, feedback, current_user)
+
+def _get_feedbacks_for_trip(
+    db: Session,
+    trip_id: int,
+    request: Request,
+    response: Response,
+    current_user: User
+):
+    cached = not_modified(request, response, db, current_user.id, SCOPE_TRIPS)
+    if cached:
+        return cached
     # Samo vlasnik tripa može vidjeti feedbackove
     trip = db.query(Trip).filter(Trip.id == trip_id, Trip.user_id == current_user.id).first()
     if not trip:
         raise HTTPException(status_code=404, detail="Trip not found or not yours.")
 
     shared_trips = db.query(SharedTrip).filter(SharedTrip.trip_id == trip_id).all()
-    feedbacks = []
-    for s in shared_trips:
-        for fb in s.feedbacks:
-            feedbacks.append({
-                "id": fb.id,
-                "rating": fb.rating,
-                "comment": fb.comment,
-                "user": {"id": fb.created_by.id, "username": fb.created_by.username, "profile_image":fb.created_by.profile_image}
-            })
-    return feedbacks
+    feedbacks = [fb for s in shared_trips for fb in s.feedbacks if fb.created_by]
+    return json_response(feedbacks, response, FEEDBACK_LIST)
 
-@router.get("/trips/shared-feedbacks/{shared_trip_id}", response_model=List[dict])
-def get_feedbacks_for_shared_trip(
-    shared_trip_id: int,
+@router.get("/trips/{trip_id}/feedbacks", response_model=List[FeedbackOut])
+def get_feedbacks_for_trip(
+    trip_id: int,
+    request: Request,
+    response: Response,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
+    return _get_feedbacks_for_trip(db, trip_id, request, response, current_user)
+
+def _get_feedbacks_for_shared_trip(
+    db: Session,
+    shared_trip_id: int,
+    request: Request,
+    response: Response,
+    current_user: User
+):
+    cached = not_modified(request, response, db, current_user.id, SCOPE_SHARED)
+    if cached:
+        return cached
     shared_trip = db.query(SharedTrip).filter(
         SharedTrip.id == shared_trip_id,
         SharedTrip.shared_with_id == current_user.id
@@ -246,13 +714,16 @@ def get_feedbacks_for_shared_trip(
     if not shared_trip:
         raise HTTPException(status_code=404, detail="Shared trip not found or not yours.")
 
-    feedbacks = []
-    for fb in shared_trip.feedbacks:
-        feedbacks.append({
-            "id": fb.id,
-            "rating": fb.rating,
-            "comment": fb.comment,
-            "user": {"id": fb.created_by.id, "username": fb.created_by.username, "profile_image":fb.created_by.profile_image}
-        })
-    return feedbacks
+    feedbacks = [fb for fb in shared_trip.feedbacks if fb.created_by]
+    return json_response(feedbacks, response, FEEDBACK_LIST)
+
+@router.get("/trips/shared-feedbacks/{shared_trip_id}", response_model=List[FeedbackOut])
+def get_feedbacks_for_shared_trip(
+    shared_trip_id: int,
+    request: Request,
+    response: Response,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    return _get_feedbacks_for_shared_trip(db, shared_trip_id, request, response, current_user)
 
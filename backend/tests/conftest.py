@@ -0,0 +1,97 @@
+"""Zajednički fixturei.
+
+Testovi koji trebaju PostgreSQL (migracije, EXPLAIN, broj upita) čitaju
+TEST_DATABASE_URL i preskaču se ako nije postavljen; baza se prazni prije
+svakog testa. Ostali rade na privremenoj SQLite bazi.
+"""
+import asyncio
+import os
+from types import SimpleNamespace
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, make_url, text
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
+
+import models  # noqa: F401 - registrira tablice na Base.metadata
+from database import Base, get_async_db, get_db
+from routers import trips
+from routers.auth import get_current_user
+
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL")
+
+
+@pytest.fixture
+def sqlite_path(tmp_path):
+    return tmp_path / "test.db"
+
+
+@pytest.fixture
+def sqlite_engine(sqlite_path):
+    engine = create_engine(f"sqlite:///{sqlite_path}")
+    Base.metadata.create_all(engine)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def sqlite_session_factory(sqlite_engine):
+    return sessionmaker(autocommit=False, autoflush=False, bind=sqlite_engine)
+
+
+@pytest.fixture
+def async_sqlite_session_factory(sqlite_engine, sqlite_path):
+    # Isti file kao sqlite_engine (tablice već postoje), preko aiosqlite
+    engine = create_async_engine(f"sqlite+aiosqlite:///{sqlite_path}")
+    yield async_sessionmaker(engine, autoflush=False, expire_on_commit=False)
+    asyncio.run(engine.dispose())
+
+
+@pytest.fixture
+def pg_engine():
+    if not TEST_DATABASE_URL:
+        pytest.skip("TEST_DATABASE_URL nije postavljen")
+    engine = create_engine(TEST_DATABASE_URL)
+    with engine.begin() as conn:
+        conn.execute(text("DROP SCHEMA public CASCADE"))
+        conn.execute(text("CREATE SCHEMA public"))
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def pg_async_session_factory(pg_engine):
+    # Ista baza kao pg_engine, preko asyncpg (kao database.async_engine). NullPool:
+    # asyncpg konekcija je vezana uz event loop, a TestClient ih može mijenjati
+    url = make_url(TEST_DATABASE_URL).set(drivername="postgresql+asyncpg")
+    engine = create_async_engine(url, poolclass=NullPool)
+    yield async_sessionmaker(engine, autoflush=False, expire_on_commit=False)
+    asyncio.run(engine.dispose())
+
+
+@pytest.fixture
+def trips_client(sqlite_session_factory, async_sqlite_session_factory):
+    """TestClient za routers.trips na SQLite bazi; prijavljeni korisnik je `client.user_id`."""
+    app = FastAPI()
+    app.include_router(trips.router, prefix="/api")
+
+    def override_db():
+        db = sqlite_session_factory()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    async def override_async_db():
+        async with async_sqlite_session_factory() as db:
+            yield db
+
+    client = TestClient(app)
+    client.user_id = 1
+    app.dependency_overrides[get_db] = override_db
+    app.dependency_overrides[get_async_db] = override_async_db
+    app.dependency_overrides[get_current_user] = lambda: SimpleNamespace(id=client.user_id, username=f"user{client.user_id}")
+    return client
@@ -0,0 +1,110 @@
+"""Sintetički katalozi i referentne implementacije (pretraga svih parova, obični Dijkstra) za testove."""
+import heapq
+import random
+
+from catalog import KIND_FLIGHT, KIND_TRANSPORT, KIND_TRANSPORT_FLIGHT, CatalogIndex, format_clock
+from route_search import MIN_CONNECTION_MINUTES, MINUTES_PER_DAY, OPTIMIZE_FASTEST, route_graph
+
+ORIGIN, DESTINATION = "zagreb", "split"
+
+# kind -> (polje polazišta, polje odredišta), kao u CATALOG_SOURCES
+FIELDS = {
+    KIND_TRANSPORT: ("departure", "destination"),
+    KIND_FLIGHT: ("departure", "destination"),
+    KIND_TRANSPORT_FLIGHT: ("currLocation", "departure"),
+}
+
+
+def _leg(rng, index, prefix, origin, destination, price):
+    departure = rng.randrange(0, 24 * 60, 5)
+    return {
+        "id": f"{prefix}{index}", "price": price, "departure": origin, "destination": destination,
+        "departure_time": format_clock(departure),
+        "arrival_time": format_clock((departure + rng.randrange(30, 12 * 60, 5)) % (24 * 60)),
+    }
+
+
+def planner_catalog(options: int, seed: int = 1) -> CatalogIndex:
+    """Katalog s --options stavki po nozi planera (prijevoz, let u oba smjera, smještaj) na ORIGIN-DESTINATION."""
+    rng = random.Random(seed)
+    return CatalogIndex({
+        "transport": [_leg(rng, i, "ground", ORIGIN, DESTINATION, rng.randint(10, 300)) for i in range(options)],
+        "flight": [_leg(rng, i, "out", ORIGIN, DESTINATION, rng.randint(40, 600)) for i in range(options)]
+        + [_leg(rng, i, "back", DESTINATION, ORIGIN, rng.randint(40, 600)) for i in range(options)],
+        "accommodation": [
+            {
+                "id": f"stay{i}", "price": rng.randint(20, 500), "destination": DESTINATION,
+                "reviews": [{"rating": rng.randint(1, 5)} for _ in range(rng.randint(0, 3))],
+            }
+            for i in range(options)
+        ],
+        "transport_flight": [],
+    })
+
+
+def brute_force(index: CatalogIndex, nights: int, budget: float) -> set:
+    """Svi parovi unutar budžeta pa O(n²) filter dominiranih; vraća skup (cijena, trajanje, ocjena)."""
+    travels = [(item["price"], index.duration["transport"][item["id"]]) for item in index.candidates("transport", ORIGIN, DESTINATION).items]
+    cheapest_return = index.candidates("flight", DESTINATION, ORIGIN).items[0]["price"]
+    travels += [
+        (item["price"] + cheapest_return, index.duration["flight"][item["id"]])
+        for item in index.candidates("flight", ORIGIN, DESTINATION).items
+    ]
+    ratings = index.rating["accommodation"]
+    stays = [(item["price"] * nights, ratings[item["id"]] or 0) for item in index.candidates("accommodation", destination=DESTINATION).items]
+    points = {
+        (travel_price + stay_price, duration, rating)
+        for travel_price, duration in travels for stay_price, rating in stays
+        if travel_price + stay_price <= budget
+    }
+    return {
+        point for point in points
+        if not any(
+            other != point and other[0] <= point[0] and other[1] <= point[1] and other[2] >= point[2]
+            for other in points
+        )
+    }
+
+
+def route_catalog(cities: int, legs: int, seed: int = 1) -> CatalogIndex:
+    """Katalog s legs dionica (prijevoz, letovi, prijevoz do aerodroma) između gradova city0..city{cities-1}."""
+    rng = random.Random(seed)
+    names = [f"city{i}" for i in range(cities)]
+    sources = {"accommodation": [], KIND_TRANSPORT: [], KIND_FLIGHT: [], KIND_TRANSPORT_FLIGHT: []}
+    for i in range(legs):
+        kind = rng.choice((KIND_TRANSPORT, KIND_TRANSPORT, KIND_FLIGHT, KIND_TRANSPORT_FLIGHT))
+        origin, destination = rng.sample(names, 2)
+        origin_field, destination_field = FIELDS[kind]
+        departure = rng.randrange(0, MINUTES_PER_DAY, 5)
+        duration = rng.randrange(30, 10 * 60, 5) if kind != KIND_FLIGHT else rng.randrange(45, 4 * 60, 5)
+        sources[kind].append({
+            "id": f"{kind}{i}", "price": rng.randint(5, 400 if kind == KIND_FLIGHT else 120),
+            origin_field: origin, destination_field: destination,
+            "departure_time": format_clock(departure),
+            "arrival_time": format_clock((departure + duration) % MINUTES_PER_DAY),
+        })
+    return CatalogIndex(sources)
+
+
+def dijkstra(index: CatalogIndex, origin: str, destination: str, depart_after: int, optimize: str):
+    """Dijkstra po svim dionicama bez heuristike; cijena ili trajanje, None ako nema rute."""
+    graph = route_graph(index)
+    fastest = optimize == OPTIMIZE_FASTEST
+    start = depart_after if fastest else 0
+    best, heap = {origin: start}, [(start, origin)]
+    while heap:
+        label, city = heapq.heappop(heap)
+        if label > best[city]:
+            continue
+        if city == destination:
+            return label - start
+        for leg in graph.adjacency.get(city, ()):
+            if fastest:
+                ready = label if city == origin else label + MIN_CONNECTION_MINUTES[leg.kind]
+                candidate = leg.next_departure(ready) + leg.duration
+            else:
+                candidate = label + leg.price
+            if candidate < best.get(leg.destination, float("inf")):
+                best[leg.destination] = candidate
+                heapq.heappush(heap, (candidate, leg.destination))
+    return None
@@ -0,0 +1,74 @@
+"""Pretraga kataloga: keyset stranice po svakom sortiranju, kursor vezan uz sortiranje."""
+import json
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from catalog import CATALOG_SOURCES, CatalogService, format_clock
+from routers import catalog as catalog_router
+
+TRANSPORT = [
+    {
+        "id": f"bus{i}", "type": "bus" if i % 2 else "train", "price": 10 + (i * 7) % 40,
+        "departure": "Zagreb", "destination": "Split" if i % 3 else "Rijeka",
+        "departure_time": format_clock(6 * 60), "arrival_time": format_clock(6 * 60 + 30 + (i * 13) % 300),
+    }
+    for i in range(60)
+]
+
+
+@pytest.fixture
+def service(tmp_path, monkeypatch):
+    for kind, (filename, _, _) in CATALOG_SOURCES.items():
+        (tmp_path / filename).write_text(json.dumps(TRANSPORT if kind == "transport" else []))
+    service = CatalogService(str(tmp_path))
+    monkeypatch.setattr(catalog_router, "catalog", service)
+    return service
+
+
+@pytest.fixture
+def client(service):
+    app = FastAPI()
+    app.include_router(catalog_router.router, prefix="/api/catalog")
+    return TestClient(app)
+
+
+def _all_pages(client, **params):
+    items, cursor, pages = [], None, 0
+    while True:
+        query = {**params, "limit": 7, **({"cursor": cursor} if cursor else {})}
+        data = client.get("/api/catalog/transport", params=query).json()
+        items += data["items"]
+        pages += 1
+        cursor = data["next_cursor"]
+        if not cursor:
+            return items, pages
+
+
+@pytest.mark.parametrize("sort", ["price", "-price", "duration"])
+def test_pages_cover_filtered_results_in_order(client, service, sort):
+    params = {"origin": "zagreb", "destination": "split", "min_price": 15, "max_price": 40, "type": "bus"}
+    items, pages = _all_pages(client, sort=sort, **params)
+
+    index = service.index
+    expected = sorted(
+        (item for item in TRANSPORT if item["destination"] == "Split" and 15 <= item["price"] <= 40 and item["type"] == "bus"),
+        key=index._sort_key("transport", sort),
+    )
+    assert [item["id"] for item in items] == [item["id"] for item in expected]
+    assert pages > 1
+
+
+def test_sorted_order_is_cached_per_index_version(client, service):
+    client.get("/api/catalog/transport", params={"origin": "zagreb", "sort": "duration"})
+    client.get("/api/catalog/transport", params={"origin": "Zagreb ", "sort": "duration", "max_price": 20})
+    client.get("/api/catalog/transport", params={"origin": "atlantis", "sort": "duration"})
+    assert list(service.index.derived) == [("sorted", "transport", "zagreb", None, "duration")]
+
+
+def test_cursor_from_another_sort_is_rejected(client):
+    cursor = client.get("/api/catalog/transport", params={"sort": "duration", "limit": 5}).json()["next_cursor"]
+    response = client.get("/api/catalog/transport", params={"sort": "price", "cursor": cursor})
+    assert response.status_code == 400
+    assert client.get("/api/catalog/transport", params={"sort": "duration", "cursor": cursor}).status_code == 200
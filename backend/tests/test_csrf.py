@@ -0,0 +1,45 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from csrf import CSRF_COOKIE_NAME, CSRFMiddleware
+
+
+@pytest.fixture
+def client():
+    app = FastAPI()
+    app.add_middleware(CSRFMiddleware)
+
+    @app.post("/ping")
+    def ping():
+        return {"ok": True}
+
+    @app.get("/ping")
+    def ping_get():
+        return {"ok": True}
+
+    client = TestClient(app)
+    client.cookies.set(CSRF_COOKIE_NAME, "good")
+    return client
+
+
+def test_safe_method_passes_without_token(client):
+    assert client.get("/ping").status_code == 200
+
+
+def test_matching_token(client):
+    assert client.post("/ping", headers={"X-CSRF-Token": "good"}).status_code == 200
+
+
+def test_missing_and_mismatched_token(client):
+    assert client.post("/ping").status_code == 403
+    assert client.post("/ping", headers={"X-CSRF-Token": "bad"}).status_code == 403
+
+
+@pytest.mark.parametrize("headers, expected", [
+    ([("X-CSRF-Token", "good"), ("X-CSRF-Token", "bad")], 200),
+    ([("X-CSRF-Token", "bad"), ("X-CSRF-Token", "good")], 403),
+])
+def test_duplicate_header_uses_first(client, headers, expected):
+    # Isto kao Request.headers.get: vrijedi prvi header
+    assert client.post("/ping", headers=headers).status_code == expected
@@ -0,0 +1,145 @@
+"""Email outbox protiv lokalnog SMTP servera (aiosmtpd)."""
+import asyncio
+import datetime
+import re
+import socket
+from email import message_from_bytes, policy
+
+import pytest
+from aiosmtpd.controller import Controller
+
+import email_outbox
+from email_outbox import OUTBOX_MAX_ATTEMPTS, OutboxSender
+from models import EmailOutbox, EmailStatus
+from utils import VERIFICATION_TOKEN_PLACEHOLDER, decode_verification_token, enqueue_verification_email
+
+
+class RecordingHandler:
+    def __init__(self):
+        self.messages = []
+        self.reject = False
+
+    async def handle_RCPT(self, server, session, envelope, address, rcpt_options):
+        if self.reject:
+            return "451 Try again later"
+        envelope.rcpt_tos.append(address)
+        return "250 OK"
+
+    async def handle_DATA(self, server, session, envelope):
+        self.messages.append(envelope)
+        return "250 Message accepted for delivery"
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@pytest.fixture
+def smtp_server():
+    handler = RecordingHandler()
+    controller = Controller(handler, hostname="127.0.0.1", port=_free_port())
+    controller.start()
+    yield controller, handler
+    controller.stop()
+
+
+@pytest.fixture
+def outbox_db(monkeypatch, sqlite_session_factory):
+    monkeypatch.setattr(email_outbox, "SessionLocal", sqlite_session_factory)
+    return sqlite_session_factory
+
+
+def _drain(sender):
+    async def run():
+        try:
+            return await sender.drain_once()
+        finally:
+            await sender.close()
+    return asyncio.run(run())
+
+
+def _sender(controller):
+    return OutboxSender(hostname=controller.hostname, port=controller.port, sender="noreply@example.com")
+
+
+def _enqueue(session_factory, *emails):
+    db = session_factory()
+    for email in emails:
+        enqueue_verification_email(db, email)
+    db.commit()
+    db.close()
+
+
+def _rows(session_factory):
+    db = session_factory()
+    rows = db.query(EmailOutbox).order_by(EmailOutbox.id).all()
+    db.close()
+    return rows
+
+
+def _make_due(session_factory):
+    db = session_factory()
+    db.query(EmailOutbox).update({EmailOutbox.next_attempt_at: datetime.datetime.utcnow()})
+    db.commit()
+    db.close()
+
+
+def test_batch_delivered_over_one_connection(smtp_server, outbox_db):
+    controller, handler = smtp_server
+    _enqueue(outbox_db, "a@example.com", "b@example.com", "c@example.com")
+
+    assert _drain(_sender(controller)) == 3
+
+    assert [envelope.rcpt_tos for envelope in handler.messages] == [["a@example.com"], ["b@example.com"], ["c@example.com"]]
+    rows = _rows(outbox_db)
+    assert all(row.status == EmailStatus.sent and row.sent_at is not None for row in rows)
+    assert all(row.attempts == 1 for row in rows)
+
+
+def test_verification_token_minted_at_send_time(smtp_server, outbox_db):
+    controller, handler = smtp_server
+    _enqueue(outbox_db, "late@example.com")
+    assert VERIFICATION_TOKEN_PLACEHOLDER in _rows(outbox_db)[0].body
+
+    _drain(_sender(controller))
+
+    body = message_from_bytes(handler.messages[0].content, policy=policy.default).get_content()
+    token = re.search(r"verify-email\?token=([\w.\-]+)", body).group(1)
+    assert decode_verification_token(token) == "late@example.com"
+
+
+def test_failures_back_off_then_dead_letter(smtp_server, outbox_db):
+    controller, handler = smtp_server
+    handler.reject = True
+    _enqueue(outbox_db, "x@example.com")
+
+    for attempt in range(1, OUTBOX_MAX_ATTEMPTS):
+        _drain(_sender(controller))
+        row = _rows(outbox_db)[0]
+        assert row.status == EmailStatus.pending
+        assert row.attempts == attempt
+        assert row.next_attempt_at > datetime.datetime.utcnow()
+        assert "451" in row.last_error
+        _make_due(outbox_db)
+
+    _drain(_sender(controller))
+    row = _rows(outbox_db)[0]
+    assert row.status == EmailStatus.dead
+    assert row.attempts == OUTBOX_MAX_ATTEMPTS
+    assert handler.messages == []
+
+
+def test_crash_between_claim_and_record_counts_attempt(outbox_db):
+    _enqueue(outbox_db, "crash@example.com")
+
+    # Worker preuzme poruku i "padne" prije _record_results, više puta
+    for attempt in range(1, OUTBOX_MAX_ATTEMPTS + 1):
+        assert len(email_outbox._claim_batch(10)) == 1
+        assert _rows(outbox_db)[0].attempts == attempt
+        _make_due(outbox_db)
+
+    assert email_outbox._claim_batch(10) == []
+    row = _rows(outbox_db)[0]
+    assert row.status == EmailStatus.dead
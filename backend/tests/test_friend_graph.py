@@ -0,0 +1,101 @@
+"""Indeks prijateljstava u memoriji (prijedlozi) i provjera prijateljstva za dijeljenje tripa."""
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException
+
+import friend_graph as graph_module
+from friend_graph import FriendGraph, are_friends
+from models import Friend, FriendshipStatus, Trip, User
+from routers import trips
+
+
+@pytest.fixture
+def db(sqlite_session_factory):
+    db = sqlite_session_factory()
+    db.add_all([User(id=i, username=f"user{i}", email=f"u{i}@example.com", hashed_password="x") for i in range(1, 11)])
+    db.commit()
+    yield db
+    db.close()
+
+
+def _befriend(db, *pairs, status=FriendshipStatus.accepted):
+    db.add_all([Friend(user_id=a, friend_id=b, status=status) for a, b in pairs])
+    db.commit()
+
+
+def test_duplicate_rows_in_both_directions(db):
+    _befriend(db, (1, 2), (2, 1))
+    graph = FriendGraph()
+    assert graph.friends_of(db, 1) == {2}
+
+    # Brisanje jednog retka: drugi smjer još drži prijateljstvo
+    graph.remove_edge(2, 1)
+    assert graph.friends_of(db, 1) == {2}
+    assert graph.friends_of(db, 2) == {1}
+    graph.remove_edge(1, 2)
+    assert graph.friends_of(db, 1) == frozenset()
+    # Višak brisanja ne ide u minus
+    graph.remove_edge(1, 2)
+    graph.add_edge(2, 1)
+    assert graph.friends_of(db, 2) == {1}
+
+
+def test_edges_before_load_come_from_database(db):
+    graph = FriendGraph()
+    # Indeks još nije učitan: promjena se ne bilježi dvaput
+    _befriend(db, (3, 4))
+    graph.add_edge(3, 4)
+    graph.remove_edge(3, 4)
+    assert graph.friends_of(db, 3) == {4}
+
+
+def test_share_rejects_friendship_removed_in_other_process(db):
+    _befriend(db, (1, 2))
+    db.add(Trip(id=1, user_id=1, name="Split", total_cost=0))
+    db.commit()
+    # Ovaj proces je učitao prijateljstvo...
+    graph = FriendGraph()
+    assert graph.friends_of(db, 1) == {2}
+    # ...a drugi worker ga je obrisao (bez remove_edge u ovom procesu)
+    db.query(Friend).delete()
+    db.commit()
+    assert graph.friends_of(db, 1) == {2}
+
+    assert not are_friends(db, 1, 2)
+    with pytest.raises(HTTPException) as error:
+        trips._share_trip(db, trips.ShareTripRequest(trip_id=1, friend_id=2), SimpleNamespace(id=1))
+    assert error.value.status_code == 403
+
+
+def test_are_friends_either_direction_accepted_only(db):
+    _befriend(db, (2, 1))
+    _befriend(db, (1, 3), status=FriendshipStatus.pending)
+    assert are_friends(db, 1, 2) and are_friends(db, 2, 1)
+    assert not are_friends(db, 1, 3)
+
+
+def test_suggestions_ranked_by_mutual_friends(db):
+    # 1 -> prijatelji 2, 3, 4; 5 je prijatelj s 2, 3 i 4, 6 s 2 i 3, 7 s 4
+    _befriend(db, (1, 2), (3, 1), (1, 4), (5, 2), (3, 5), (4, 5), (6, 2), (6, 3), (7, 4), (8, 4))
+    graph = FriendGraph()
+
+    assert graph.suggestions(db, 1) == [(5, 3), (6, 2), (7, 1), (8, 1)]
+    assert graph.suggestions(db, 1, limit=2) == [(5, 3), (6, 2)]
+    assert graph.suggestions(db, 1, exclude={5, 7}) == [(6, 2), (8, 1)]
+    # Postojeći prijatelji i sam korisnik se ne predlažu
+    assert all(uid not in (1, 2, 3, 4) for uid, _ in graph.suggestions(db, 1))
+
+
+def test_suggestion_scan_is_bounded(db, monkeypatch):
+    _befriend(db, (1, 2), (1, 3), (5, 2), (5, 3), (6, 2), (6, 3))
+    graph = FriendGraph()
+
+    monkeypatch.setattr(graph_module, "SUGGESTION_MAX_FRIENDS_SCANNED", 1)
+    # Samo jedan prijatelj skeniran -> najviše jedan zajednički
+    assert sorted(graph.suggestions(db, 1)) == [(5, 1), (6, 1)]
+
+    monkeypatch.setattr(graph_module, "SUGGESTION_MAX_FRIENDS_SCANNED", 500)
+    monkeypatch.setattr(graph_module, "SUGGESTION_MAX_EDGES_SCANNED", 1)
+    # Prvi prijatelj već prelazi granicu bridova -> ostali se ne skeniraju
+    assert sorted(graph.suggestions(db, 1)) == [(5, 1), (6, 1)]
@@ -0,0 +1,82 @@
+"""Bulk slanje zahtjeva za prijateljstvo pod istovremenim requestovima."""
+import threading
+from types import SimpleNamespace
+
+from sqlalchemy.orm import sessionmaker
+
+from database import Base
+from models import Friend, FriendshipStatus, User
+from routers import friends
+from routers.friends import BulkAddFriendRequest
+
+
+def _seed_users(session_factory, count):
+    db = session_factory()
+    db.add_all([User(id=i, username=f"user{i}", email=f"u{i}@example.com", hashed_password="x") for i in range(1, count + 1)])
+    db.commit()
+    db.close()
+
+
+def _concurrent_add_friends(monkeypatch, session_factory, friend_ids, workers=2):
+    # Svi requestovi prođu provjeru postojećih redova prije ijednog INSERT-a
+    barrier = threading.Barrier(workers)
+    insert = friends._insert_friend_requests
+
+    def insert_after_barrier(*args):
+        barrier.wait(timeout=10)
+        return insert(*args)
+
+    monkeypatch.setattr(friends, "_insert_friend_requests", insert_after_barrier)
+    results, errors = [], []
+
+    def worker():
+        db = session_factory()
+        try:
+            results.append(friends._add_friends(db, BulkAddFriendRequest(friend_ids=friend_ids), SimpleNamespace(id=1)))
+        except Exception as e:
+            errors.append(e)
+        finally:
+            db.close()
+
+    threads = [threading.Thread(target=worker) for _ in range(workers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results, errors
+
+
+def _check(session_factory, results, errors, friend_ids):
+    assert errors == []
+    statuses = sorted(
+        tuple(item["status"] for item in result["results"]) for result in results
+    )
+    # Svaki par je "sent" točno jednom, drugi request vidi "already_pending"
+    for index in range(len(friend_ids)):
+        assert sorted(status[index] for status in statuses) == ["already_pending", "sent"]
+    db = session_factory()
+    rows = db.query(Friend.friend_id, Friend.status).filter(Friend.user_id == 1).all()
+    db.close()
+    assert sorted(rows) == [(friend_id, FriendshipStatus.pending) for friend_id in friend_ids]
+
+
+def test_insert_skips_existing_pairs(sqlite_session_factory):
+    _seed_users(sqlite_session_factory, 4)
+    db = sqlite_session_factory()
+    db.add(Friend(user_id=1, friend_id=3, status=FriendshipStatus.pending))
+    db.commit()
+
+    assert friends._insert_friend_requests(db, 1, [2, 3, 4]) == {2, 4}
+    db.commit()
+    assert db.query(Friend).count() == 3
+    db.close()
+
+
+def test_concurrent_bulk_add_postgres(monkeypatch, pg_engine):
+    Base.metadata.create_all(pg_engine)
+    session_factory = sessionmaker(autocommit=False, autoflush=False, bind=pg_engine)
+    _seed_users(session_factory, 6)
+
+    results, errors = _concurrent_add_friends(monkeypatch, session_factory, [2, 3, 4, 5, 6])
+
+    _check(session_factory, results, errors, [2, 3, 4, 5, 6])
@@ -0,0 +1,119 @@
+"""Broj SQL upita u čitanjima prijatelja ne ovisi o broju prijatelja."""
+from types import SimpleNamespace
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+from database import get_async_db, get_db
+from models import Friend, FriendshipStatus, User
+from routers import friends
+from routers.auth import get_current_user
+
+ME = 1
+
+
+def _seed(session_factory, accepted: int, pending: int):
+    db = session_factory()
+    total = 1 + accepted + pending
+    db.add_all([User(id=i, username=f"user{i:03d}", email=f"u{i}@example.com", hashed_password="x") for i in range(1, total + 1)])
+    db.flush()
+    for other in range(2, 2 + accepted):
+        # Prijateljstva u oba smjera
+        if other % 2:
+            db.add(Friend(user_id=ME, friend_id=other, status=FriendshipStatus.accepted))
+        else:
+            db.add(Friend(user_id=other, friend_id=ME, status=FriendshipStatus.accepted))
+    for other in range(2 + accepted, total + 1):
+        db.add(Friend(user_id=other, friend_id=ME, status=FriendshipStatus.pending))
+    db.commit()
+    db.close()
+
+
+@pytest.fixture
+def client(sqlite_session_factory, async_sqlite_session_factory):
+    app = FastAPI()
+    app.include_router(friends.router, prefix="/api/friends")
+
+    async def override_db():
+        async with async_sqlite_session_factory() as db:
+            yield db
+
+    def override_sync_db():
+        db = sqlite_session_factory()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app.dependency_overrides[get_async_db] = override_db
+    app.dependency_overrides[get_db] = override_sync_db
+    app.dependency_overrides[get_current_user] = lambda: SimpleNamespace(id=ME)
+    return TestClient(app)
+
+
+@pytest.fixture
+def statements(sqlite_engine, async_sqlite_session_factory):
+    # Čitanja su sinkrone rute (get_db), upisi async; broje se oba enginea
+    executed = []
+    engines = (sqlite_engine, async_sqlite_session_factory.kw["bind"].sync_engine)
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        executed.append(statement)
+
+    for engine in engines:
+        event.listen(engine, "before_cursor_execute", count)
+    yield executed
+    for engine in engines:
+        event.remove(engine, "before_cursor_execute", count)
+
+
+def _page_through(client, url, key, statements):
+    """Sve stranice s limit=25; vraća (stavke, broj upita po stranici)."""
+    items, per_page, cursor = [], [], None
+    while True:
+        statements.clear()
+        response = client.get(url, params={"limit": 25, **({"cursor": cursor} if cursor else {})})
+        assert response.status_code == 200
+        per_page.append(len(statements))
+        body = response.json()
+        items += body[key]
+        cursor = body["next_cursor"]
+        if not cursor:
+            return items, per_page
+
+
+@pytest.mark.parametrize("count", [3, 150])
+@pytest.mark.parametrize("url, key", [
+    (f"/api/friends/{ME}", "friends"),
+    ("/api/friends/", "friends"),
+    (f"/api/friends/friend-requests/{ME}", "friend_requests"),
+])
+def test_fixed_query_count(sqlite_session_factory, client, statements, url, key, count):
+    _seed(sqlite_session_factory, accepted=count, pending=count)
+
+    items, per_page = _page_through(client, url, key, statements)
+
+    expected = count
+    assert len({item["id"] for item in items}) == expected
+    # ETag upit + jedan upit za stranicu, na svakoj stranici
+    assert set(per_page) == {2}
+
+
+def test_search_filters_friends_by_username(sqlite_session_factory, client):
+    _seed(sqlite_session_factory, accepted=30, pending=5)
+
+    def search(text, **params):
+        response = client.get("/api/friends/", params={"search": text, **params})
+        assert response.status_code == 200
+        return response.json()
+
+    page = search("USER01", limit=5)
+    assert [friend["username"] for friend in page["friends"]] == [f"user{i:03d}" for i in range(10, 15)]
+    rest = search("user01", limit=5, cursor=page["next_cursor"])
+    assert [friend["username"] for friend in rest["friends"]] == [f"user{i:03d}" for i in range(15, 20)]
+    assert rest["next_cursor"] is None
+    # Pending korisnici i znakovi LIKE-a se ne podudaraju
+    assert [friend["id"] for friend in search("user03")["friends"]] == [30, 31]
+    assert search("user_")["friends"] == []
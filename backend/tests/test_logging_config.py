@@ -0,0 +1,55 @@
+import asyncio
+import logging
+
+import pytest
+
+import logging_config
+from logging_config import RequestDebugMiddleware, _SamplingFilter
+
+
+def _record(level):
+    return logging.LogRecord("test", level, __file__, 1, "message", None, None)
+
+
+def test_filter_samples_only_debug():
+    always = _SamplingFilter(logging.WARNING, sample_rate=1.0)
+    assert always.filter(_record(logging.DEBUG))
+    assert not always.filter(_record(logging.INFO))
+    assert always.filter(_record(logging.WARNING))
+
+    never = _SamplingFilter(logging.WARNING, sample_rate=0.0)
+    assert not never.filter(_record(logging.DEBUG))
+
+
+@pytest.fixture
+def root_logger(monkeypatch):
+    root = logging.getLogger()
+    previous = root.level
+    monkeypatch.setattr(logging_config, "_base_level", logging.INFO)
+    monkeypatch.setattr(logging_config, "LOG_DEBUG_SAMPLE_RATE", 0.0)
+    monkeypatch.setattr(logging_config, "LOG_DEBUG_TOKEN", "secret")
+    root.setLevel(logging_config._root_level())
+    yield root
+    root.setLevel(previous)
+
+
+def test_root_at_base_level_unless_debug_request(root_logger):
+    assert root_logger.level == logging.INFO
+    seen = []
+
+    async def app(scope, receive, send):
+        seen.append((root_logger.level, logging_config._request_debug.get()))
+
+    middleware = RequestDebugMiddleware(app)
+    plain = {"type": "http", "headers": []}
+    debug = {"type": "http", "headers": [(b"x-debug-log", b"secret")]}
+    asyncio.run(middleware(plain, None, None))
+    asyncio.run(middleware(debug, None, None))
+
+    assert seen == [(logging.INFO, False), (logging.DEBUG, True)]
+    assert root_logger.level == logging.INFO
+
+
+def test_sampling_keeps_root_at_debug(root_logger, monkeypatch):
+    monkeypatch.setattr(logging_config, "LOG_DEBUG_SAMPLE_RATE", 0.01)
+    assert logging_config._root_level() == logging.DEBUG
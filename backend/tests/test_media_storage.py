@@ -0,0 +1,66 @@
+import asyncio
+import hashlib
+import os
+
+import pytest
+from fastapi import HTTPException, Request
+from PIL import Image
+
+import media_storage
+
+
+@pytest.fixture
+def media_dirs(monkeypatch, tmp_path):
+    monkeypatch.setattr(media_storage, "PROFILE_IMAGE_DIR", str(tmp_path / "media" / "profile_images"))
+    monkeypatch.setattr(media_storage, "MEDIA_TMP_DIR", str(tmp_path / "media_tmp"))
+    return tmp_path
+
+
+def _upload(path, **save_kwargs):
+    Image.new("RGB", (40, 30), (200, 80, 20)).save(path, **save_kwargs)
+    return str(path)
+
+
+def test_name_is_hash_of_reencoded_output(media_dirs):
+    # Ista slika s različitim metapodacima -> isti kodirani sadržaj i ime
+    first = media_storage._reencode_image(_upload(media_dirs / "a.png", format="PNG"))
+    second = media_storage._reencode_image(_upload(media_dirs / "b.png", format="PNG", compress_level=1))
+
+    assert first == second
+    stored = os.path.join(media_storage.PROFILE_IMAGE_DIR, first)
+    with open(stored, "rb") as f:
+        assert first == hashlib.sha256(f.read()).hexdigest() + ".jpg"
+    assert os.listdir(media_storage.MEDIA_TMP_DIR) == []
+
+
+def test_invalid_upload_leaves_no_files(media_dirs):
+    bogus = media_dirs / "bogus.png"
+    bogus.write_bytes(b"not an image")
+
+    with pytest.raises(HTTPException) as error:
+        media_storage._reencode_image(str(bogus))
+
+    assert error.value.status_code == 400
+    assert os.listdir(media_storage.MEDIA_TMP_DIR) == []
+    assert not os.path.exists(media_storage.PROFILE_IMAGE_DIR)
+
+
+def test_malformed_multipart_is_client_error(media_dirs):
+    body = b"--other\r\nContent-Disposition: form-data; name=\"image\"; filename=\"a.png\"\r\n\r\nxx\r\n--other--\r\n"
+    scope = {
+        "type": "http", "method": "POST", "path": "/upload-profile-image",
+        "headers": [
+            (b"content-type", b"multipart/form-data; boundary=expected"),
+            (b"content-length", str(len(body)).encode()),
+        ],
+    }
+
+    async def receive():
+        return {"type": "http.request", "body": body, "more_body": False}
+
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(media_storage.save_profile_image(Request(scope, receive)))
+
+    assert error.value.status_code == 400
+    assert error.value.detail == "Malformed multipart body"
+    assert not os.path.exists(media_storage.PROFILE_IMAGE_DIR)
@@ -0,0 +1,45 @@
+import asyncio
+import os
+import time
+
+import pytest
+from PIL import Image
+
+import media_variants
+
+
+@pytest.fixture
+def variant_dirs(monkeypatch, tmp_path):
+    monkeypatch.setattr(media_variants, "MEDIA_TMP_DIR", str(tmp_path / "media_tmp"))
+    monkeypatch.setattr(media_variants, "variant_cache", media_variants.VariantCache(str(tmp_path / "variants")))
+    source = tmp_path / "source.jpg"
+    Image.new("RGB", (200, 100), (10, 120, 200)).save(source, format="JPEG")
+    return tmp_path, str(source)
+
+
+def test_concurrent_requests_render_once(monkeypatch, variant_dirs):
+    tmp_path, source = variant_dirs
+    target = str(tmp_path / "variants" / "source.w64.webp")
+    render = media_variants._render_variant
+    calls = []
+
+    def slow_render(*args):
+        calls.append(args)
+        time.sleep(0.05)
+        return render(*args)
+
+    monkeypatch.setattr(media_variants, "_render_variant", slow_render)
+
+    async def run():
+        first = [media_variants._ensure_variant(source, target, 64, "webp") for _ in range(5)]
+        await asyncio.gather(*first)
+        # Unos nestaje tek kad ga zadnji korisnik otpusti
+        assert media_variants._generation_locks == {}
+        await media_variants._ensure_variant(source, target, 64, "webp")
+
+    asyncio.run(run())
+
+    assert len(calls) == 1
+    with Image.open(target) as img:
+        assert (img.format, img.width) == ("WEBP", 64)
+    assert os.listdir(tmp_path / "media_tmp") == []
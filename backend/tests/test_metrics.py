@@ -0,0 +1,128 @@
+"""Metrike: labela je predložak rute, kumulativni histogram, SQL po requestu, METRICS_TOKEN."""
+import re
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import event, select
+
+import metrics
+from metrics import OTHER_ROUTE, Counter, Histogram, MetricsMiddleware
+from models import User
+
+
+@pytest.fixture
+def async_db(async_sqlite_session_factory, monkeypatch):
+    # Kao database.py: brojanje ide preko sync_engine async enginea
+    engine = async_sqlite_session_factory.kw["bind"].sync_engine
+    monkeypatch.setattr(metrics, "_engines", {})
+    metrics.instrument_engine(engine, "async")
+    yield async_sqlite_session_factory
+    event.remove(engine, "before_cursor_execute", metrics._before_cursor_execute)
+    event.remove(engine, "after_cursor_execute", metrics._after_cursor_execute)
+
+
+@pytest.fixture
+def client(async_db):
+    app = FastAPI()
+    app.add_middleware(MetricsMiddleware)
+    app.include_router(metrics.router)
+
+    def load(session, user_id):
+        session.get(User, user_id)
+        return session.scalars(select(User.id)).all()
+
+    @app.get("/test-metrics/users/{user_id}")
+    async def read_user(user_id: int):
+        # Dvije naredbe kroz run_sync (greenlet), kao rute s `await db.run_sync(...)`
+        async with async_db() as db:
+            return await db.run_sync(load, user_id)
+
+    return TestClient(app)
+
+
+def _sample(text: str, name: str, **labels) -> float:
+    wanted = ",".join(f'{key}="{value}"' for key, value in labels.items())
+    match = re.search(rf"^{re.escape(name + '{' + wanted + '}')} (\S+)$", text, re.MULTILINE)
+    return float(match.group(1)) if match else 0.0
+
+
+def test_histogram_buckets_are_cumulative():
+    histogram = Histogram("h", "Test.", (1, 5), ("kind",))
+    for value in (0.5, 1, 3, 10):
+        histogram.observe(value, ("a",))
+    histogram.observe(2, ("b",))
+    lines = []
+    histogram.render(lines)
+
+    assert lines == [
+        "# HELP h Test.",
+        "# TYPE h histogram",
+        'h_bucket{kind="a",le="1.0"} 2',
+        'h_bucket{kind="a",le="5.0"} 3',
+        'h_bucket{kind="a",le="+Inf"} 4',
+        'h_sum{kind="a"} 14.5',
+        'h_count{kind="a"} 4',
+        'h_bucket{kind="b",le="1.0"} 0',
+        'h_bucket{kind="b",le="5.0"} 1',
+        'h_bucket{kind="b",le="+Inf"} 1',
+        'h_sum{kind="b"} 2.0',
+        'h_count{kind="b"} 1',
+    ]
+
+
+def test_counter_labels_are_a_tuple():
+    counter = Counter("c_total", "Test.", ("method", "status"))
+    counter.inc(labels=("GET", "200"))
+    counter.inc(2, ("GET", "200"))
+    counter.inc(labels=("POST", "500"))
+    lines = []
+    counter.render(lines)
+
+    assert lines[2:] == ['c_total{method="GET",status="200"} 3', 'c_total{method="POST",status="500"} 1']
+
+
+def test_route_template_label_and_other(client):
+    before = client.get("/metrics").text
+
+    assert client.get("/test-metrics/users/1").status_code == 200
+    assert client.get("/test-metrics/users/2").status_code == 200
+    assert client.get("/test-metrics/nope/3").status_code == 404
+    after = client.get("/metrics").text
+
+    def delta(**labels):
+        return _sample(after, "http_requests_total", **labels) - _sample(before, "http_requests_total", **labels)
+
+    # Jedna serija za sve id-ove; stvarne putanje se ne pojavljuju kao labele
+    assert delta(method="GET", route="/test-metrics/users/{user_id}", status="200") == 2
+    assert delta(method="GET", route=OTHER_ROUTE, status="404") == 1
+    assert "/test-metrics/users/1" not in after
+    # /metrics sam sebe ne broji
+    assert 'route="/metrics"' not in after
+
+
+def test_sql_statements_counted_per_request_through_run_sync(client):
+    route = "/test-metrics/users/{user_id}"
+    before = client.get("/metrics").text
+
+    assert client.get("/test-metrics/users/1").status_code == 200
+    after = client.get("/metrics").text
+
+    def delta(name):
+        return _sample(after, name, method="GET", route=route) - _sample(before, name, method="GET", route=route)
+
+    assert delta("http_request_sql_statements_count") == 1
+    assert delta("http_request_sql_statements_sum") == 2
+    assert delta("http_request_sql_seconds_count") == 1
+    assert _sample(after, "db_pool_size", pool="async") > 0
+
+
+def test_metrics_token(client, monkeypatch):
+    monkeypatch.setattr(metrics, "METRICS_TOKEN", "s3cret")
+
+    assert client.get("/metrics").status_code == 401
+    assert client.get("/metrics", headers={"Authorization": "Bearer wrong"}).status_code == 401
+    response = client.get("/metrics", headers={"Authorization": "Bearer s3cret"})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert "# TYPE http_requests_total counter" in response.text
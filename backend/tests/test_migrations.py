@@ -0,0 +1,154 @@
+import datetime
+
+from sqlalchemy import create_engine, event, inspect, text
+
+import models  # noqa: F401
+from database import Base
+from migrations import run_migrations
+from migrations import v0001_baseline
+
+
+def _model_schema():
+    return {
+        table.name: (
+            {column.name for column in table.columns},
+            {index.name for index in table.indexes},
+        )
+        for table in Base.metadata.sorted_tables
+    }
+
+
+def _assert_matches_models(engine):
+    inspector = inspect(engine)
+    for name, (columns, indexes) in _model_schema().items():
+        assert {column["name"] for column in inspector.get_columns(name)} == columns, name
+        assert indexes <= {index["name"] for index in inspector.get_indexes(name)}, name
+
+
+def test_fresh_postgres_matches_models(pg_engine):
+    run_migrations(pg_engine)
+    _assert_matches_models(pg_engine)
+    # Ponovno pokretanje ne radi ništa
+    run_migrations(pg_engine)
+
+
+def test_fresh_sqlite_matches_models(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'migrated.db'}")
+    run_migrations(engine)
+    _assert_matches_models(engine)
+    engine.dispose()
+
+
+def test_existing_data_deduplicated_and_converted(pg_engine):
+    # Baza iz vremena prije migracija: početna shema, duplikati, bez schema_migrations
+    with pg_engine.begin() as conn:
+        v0001_baseline.upgrade(conn)
+        old, new = datetime.datetime(2024, 1, 1), datetime.datetime(2024, 6, 1)
+        conn.execute(text("INSERT INTO users (id, username, email, hashed_password) VALUES "
+                          "(1, 'ana', 'a@x', 'x'), (2, 'ivo', 'i@x', 'x'), (3, 'eva', 'e@x', 'x')"))
+        conn.execute(text(
+            "INSERT INTO friends (id, user_id, friend_id, status, created_at) VALUES "
+            "(1, 1, 2, 'rejected', :new), (2, 1, 2, 'accepted', :old), (3, 1, 2, 'pending', :new),"
+            "(4, 1, 3, 'pending', :old), (5, 1, 3, 'pending', :new)"
+        ), {"old": old, "new": new})
+        conn.execute(text(
+            "INSERT INTO trips (id, user_id, name, start_date, end_date, transport_type, transport_option, total_cost) "
+            "VALUES (1, 1, 'Split', '2024-07-01', '2024-07-05', 'bus', "
+            "'{\"id\": \"t1\", \"price\": 20, \"departure\": \"zagreb\", \"destination\": \"Split\", \"images\": [\"a.jpg\"]}', 100)"
+        ))
+        conn.execute(text(
+            "INSERT INTO shared_trips (id, trip_id, shared_with_id, shared_by_id) VALUES "
+            "(1, 1, 2, 1), (2, 1, 2, 1), (3, 1, 3, 1)"
+        ))
+        conn.execute(text(
+            "INSERT INTO shared_trip_feedback (id, shared_trip_id, rating, comment, created_by_id) VALUES "
+            "(1, 2, 4, 'from duplicate share', 2), (2, 1, 3, 'older', 3), (3, 2, 5, 'newer', 3)"
+        ))
+
+    run_migrations(pg_engine)
+
+    with pg_engine.connect() as conn:
+        friends = conn.execute(text("SELECT id, status FROM friends ORDER BY id")).all()
+        # Najjači status za (1, 2), najnoviji za (1, 3)
+        assert friends == [(2, "accepted"), (5, "pending")]
+        assert conn.execute(text("SELECT id FROM shared_trips ORDER BY id")).scalars().all() == [1, 3]
+        feedback = conn.execute(text(
+            "SELECT id, shared_trip_id, comment FROM shared_trip_feedback ORDER BY id"
+        )).all()
+        # Feedback s duplikata je prebačen na preživjelo dijeljenje; po korisniku ostaje najnoviji
+        assert feedback == [(1, 1, "from duplicate share"), (3, 1, "newer")]
+
+        stats = conn.execute(text(
+            "SELECT trip_count, destinations::text, shares_sent, feedback_count, feedback_rating_sum"
+            " FROM user_travel_stats WHERE user_id = 1"
+        )).one()
+        assert stats == (1, '{"split": 1}', 2, 2, 9)
+
+        transport = conn.execute(text("SELECT transport_option FROM trips WHERE id = 1")).scalar()
+        assert "images" not in transport and transport["price"] == 20
+        item = conn.execute(text("SELECT kind, data FROM catalog_items WHERE id = :id"),
+                            {"id": transport["catalog_id"]}).one()
+        assert item.kind == "transport" and item.data["images"] == ["a.jpg"]
+        assert conn.execute(text("SELECT start_date FROM trips WHERE id = 1")).scalar() == datetime.date(2024, 7, 1)
+
+
+def test_invalid_trip_dates_are_nulled_and_counted(pg_engine, caplog):
+    with pg_engine.begin() as conn:
+        v0001_baseline.upgrade(conn)
+        conn.execute(text("INSERT INTO users (id, username, email, hashed_password) VALUES (1, 'ana', 'a@x', 'x')"))
+        conn.execute(text(
+            "INSERT INTO trips (id, user_id, name, start_date, end_date, transport_option, total_cost) VALUES "
+            "(1, 1, 'ok', '2024-02-29', '2024-03-02', '{}', 1),"
+            "(2, 1, 'impossible', '2024-02-30', '2024-03-01', '{}', 1),"
+            "(3, 1, 'text', 'July 1st', '2023-02-29', '{}', 1),"
+            "(4, 1, 'empty', NULL, '', '{}', 1)"
+        ))
+
+    with caplog.at_level("WARNING", logger="migrations.v0007_trip_date_columns"):
+        run_migrations(pg_engine)
+
+    with pg_engine.connect() as conn:
+        dates = conn.execute(text("SELECT id, start_date, end_date FROM trips ORDER BY id")).all()
+    assert dates == [
+        (1, datetime.date(2024, 2, 29), datetime.date(2024, 3, 2)),
+        (2, None, datetime.date(2024, 3, 1)),
+        (3, None, None),
+        (4, None, None),
+    ]
+    assert "2 trips had an invalid start_date" in caplog.text
+    assert "2 trips had an invalid end_date" in caplog.text
+
+
+def test_catalog_references_batched(pg_engine):
+    with pg_engine.begin() as conn:
+        v0001_baseline.upgrade(conn)
+        conn.execute(text("INSERT INTO users (id, username, email, hashed_password) VALUES (1, 'ana', 'a@x', 'x')"))
+        conn.execute(text(
+            "INSERT INTO trips (id, user_id, name, transport_option, accommodation, total_cost) VALUES "
+            + ", ".join(
+                f"({i}, 1, 't{i}', '{{\"id\": \"bus{i % 3}\", \"price\": 5}}', '{{\"id\": \"hotel\", \"price\": 80}}', 1)"
+                for i in range(1, 41)
+            )
+        ))
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(" ".join(statement.split()[:3]))
+
+    event.listen(pg_engine, "before_cursor_execute", record)
+    try:
+        run_migrations(pg_engine)
+    finally:
+        event.remove(pg_engine, "before_cursor_execute", record)
+
+    with pg_engine.connect() as conn:
+        assert conn.execute(text("SELECT kind, count(*) FROM catalog_items GROUP BY kind ORDER BY kind")).all() == [
+            ("accommodation", 1), ("transport", 3),
+        ]
+        assert conn.execute(text(
+            "SELECT count(*) FROM trips WHERE transport_option ->> 'catalog_id' IS NOT NULL"
+            " AND accommodation ->> 'catalog_id' IS NOT NULL"
+        )).scalar() == 40
+    # Jedna serija: jedan UPDATE (executemany) i jedan INSERT u katalog, ne po tripu
+    assert statements.count("UPDATE trips SET") == 1
+    assert statements.count("INSERT INTO catalog_items") == 1
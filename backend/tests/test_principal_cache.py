@@ -0,0 +1,134 @@
+"""Cache autentificiranih korisnika: LRU/TTL, invalidacija nakon commita, utrka put/invalidate."""
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import inspect
+
+import principal_cache as cache_module
+from models import User
+from principal_cache import PrincipalCache, principal_cache, snapshot_user, user_from_snapshot
+from routers import auth
+
+
+@pytest.fixture
+def db(sqlite_session_factory):
+    principal_cache.clear()
+    db = sqlite_session_factory()
+    db.add(User(id=1, username="user1", email="u1@example.com", hashed_password="x", role="user"))
+    db.commit()
+    yield db
+    db.close()
+    principal_cache.clear()
+
+
+def _cache(db, email="u1@example.com"):
+    user = db.query(User).filter(User.email == email).one()
+    principal_cache.put(email, snapshot_user(user), principal_cache.generation())
+
+
+def test_lru_eviction():
+    cache = PrincipalCache(max_size=2)
+    for subject in ("a", "b"):
+        cache.put(subject, {"email": subject}, cache.generation())
+    cache.get("a")
+    cache.put("c", {"email": "c"}, cache.generation())
+    assert cache.get("b") is None
+    assert cache.get("a") == {"email": "a"}
+    assert cache.get("c") == {"email": "c"}
+    assert cache.stats()["evictions"] == 1
+
+
+def test_ttl_expiry(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(cache_module.time, "monotonic", lambda: now[0])
+    cache = PrincipalCache(ttl_seconds=60)
+    cache.put("a", {"email": "a"}, cache.generation())
+    now[0] += 59
+    assert cache.get("a") is not None
+    now[0] += 2
+    assert cache.get("a") is None
+    assert cache.stats()["size"] == 0
+
+
+def test_invalidated_only_after_commit(db):
+    _cache(db)
+    user = db.query(User).filter(User.id == 1).one()
+    user.role = "admin"
+    db.flush()
+    assert principal_cache.get("u1@example.com") is not None
+    db.commit()
+    assert principal_cache.get("u1@example.com") is None
+
+
+def test_rollback_discards_pending_invalidation(db):
+    _cache(db)
+    user = db.query(User).filter(User.id == 1).one()
+    user.is_active = False
+    db.flush()
+    db.rollback()
+    assert principal_cache.get("u1@example.com") is not None
+    assert "principal_cache_invalidate" not in db.info
+    # Kasniji commit bez promjena ne smije izbaciti korisnika
+    db.commit()
+    assert principal_cache.get("u1@example.com") is not None
+
+
+def test_email_change_invalidates_old_key(db):
+    _cache(db)
+    user = db.query(User).filter(User.id == 1).one()
+    user.email = "new@example.com"
+    db.commit()
+    assert principal_cache.get("u1@example.com") is None
+
+
+def test_commit_during_load_does_not_cache_stale_user(db, sqlite_session_factory):
+    # Request A pročita generaciju i korisnika...
+    generation = principal_cache.generation()
+    stale = snapshot_user(db.query(User).filter(User.id == 1).one())
+    # ...request B u međuvremenu deaktivira korisnika i commita...
+    other = sqlite_session_factory()
+    other.query(User).filter(User.id == 1).one().is_active = False
+    other.commit()
+    other.close()
+    # ...pa A-ov put ne smije vratiti stari snapshot u cache
+    principal_cache.put("u1@example.com", stale, generation)
+    assert principal_cache.get("u1@example.com") is None
+
+
+def test_current_user_is_detached_and_reads_own_session(db, async_sqlite_session_factory, monkeypatch):
+    opened = []
+
+    def session_factory():
+        opened.append(1)
+        return async_sqlite_session_factory()
+
+    monkeypatch.setattr(auth, "AsyncSessionLocal", session_factory)
+    token = auth.create_access_token({"sub": "u1@example.com", "role": "user"})
+
+    first = asyncio.run(auth.get_current_user(token))
+    second = asyncio.run(auth.get_current_user(token))
+
+    # Promašaj čita kratka vlastita sesija, pogodak ne ide u bazu
+    assert opened == [1]
+    for user in (first, second):
+        assert inspect(user).detached
+        assert (user.id, user.email, user.role) == (1, "u1@example.com", "user")
+
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(auth.get_current_user(auth.create_access_token({"sub": "nobody@example.com", "role": "user"})))
+    assert error.value.status_code == 401
+
+
+def test_detached_user_merges_into_route_session(db, sqlite_session_factory):
+    _cache(db)
+    user = user_from_snapshot(principal_cache.get("u1@example.com"))
+
+    route_db = sqlite_session_factory()
+    merged = route_db.merge(user, load=False)
+    merged.profile_image = "new.webp"
+    route_db.commit()
+    route_db.close()
+
+    assert principal_cache.get("u1@example.com") is None
+    assert db.query(User.profile_image).filter(User.id == 1).scalar() == "new.webp"
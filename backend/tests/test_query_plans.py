@@ -0,0 +1,213 @@
+"""Vrući upiti iz friends.py i trips.py ne smiju raditi Seq Scan.
+
+Baza se diže migracijama, requestovi idu kroz prave rute (sinkrone preko
+psycopg2, async preko asyncpg), a svaka izvršena naredba se ponovno pokreće kao EXPLAIN uz `enable_seqscan = off`.
+Bez odgovarajućeg indeksa planer tada bira Seq Scan ili čitanje cijelog
+indeksa (npr. primarnog ključa); oboje se računa kao skeniranje cijele
+tablice. Korisnika ima dovoljno da planer ne bira puno
+skeniranje samo zato što je tablica mala.
+"""
+import json
+import re
+from types import SimpleNamespace
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
+
+from database import get_async_db, get_db
+from migrations import run_migrations
+from routers import friends, trips
+from routers.auth import get_current_user
+
+ME = 1
+USERS = 5000
+FRIENDS = 60
+
+READ_ROUTES = [
+    f"/api/friends/{ME}",
+    "/api/friends/",
+    f"/api/friends/friend-requests/{ME}",
+    "/api/trips/",
+    "/api/trips/?fields=summary",
+    "/api/trips/overview",
+    "/api/trips/stats",
+    "/api/trips/calendar/upcoming",
+    "/api/trips/calendar?start=2030-01-01&end=2030-03-01",
+    "/api/trips/calendar/months?start=2030-01&end=2030-06",
+    "/api/trips/shared/",
+    "/api/trips/shared-with/{trip_id}",
+    "/api/trips/{trip_id}/feedbacks",
+    "/api/trips/shared-feedbacks/{shared_trip_id}",
+]
+
+
+def _seed(engine):
+    with engine.begin() as conn:
+        conn.execute(text(
+            "INSERT INTO users (id, username, email, hashed_password)"
+            " SELECT i, 'user' || i, 'user' || i || '@example.com', 'x' FROM generate_series(1, :users) AS i"
+        ), {"users": USERS})
+        conn.execute(text(
+            "INSERT INTO friends (user_id, friend_id, status, created_at)"
+            " SELECT CASE WHEN i % 2 = 0 THEN 1 ELSE i END, CASE WHEN i % 2 = 0 THEN i ELSE 1 END,"
+            " CASE WHEN i % 3 = 0 THEN 'pending' ELSE 'accepted' END::friendshipstatus, now()"
+            " FROM generate_series(2, :friends) AS i"
+        ), {"friends": FRIENDS})
+        conn.execute(text(
+            "INSERT INTO trips (user_id, name, start_date, end_date, transport_type, transport_option, total_cost)"
+            " SELECT 1 + i % 10, 'trip ' || i, DATE '2030-01-01' + i, DATE '2030-01-03' + i, 'bus',"
+            " '{\"destination\": \"Split\", \"price\": 10}', 100 FROM generate_series(1, 300) AS i"
+        ))
+        conn.execute(text(
+            "INSERT INTO shared_trips (trip_id, shared_with_id, shared_by_id, shared_at)"
+            " SELECT t.id, u.id, t.user_id, now() FROM trips t"
+            " JOIN generate_series(11, 14) AS u(id) ON true"
+        ))
+        conn.execute(text(
+            "INSERT INTO shared_trips (trip_id, shared_with_id, shared_by_id, shared_at)"
+            " SELECT id, :me, user_id, now() FROM trips WHERE user_id <> :me AND id % 3 = 0"
+        ), {"me": ME})
+        conn.execute(text(
+            "INSERT INTO shared_trip_feedback (shared_trip_id, rating, comment, created_by_id)"
+            " SELECT id, 4, 'ok', shared_with_id FROM shared_trips WHERE id % 2 = 0"
+        ))
+        conn.execute(text("ANALYZE"))
+        trip_id = conn.execute(text(
+            "SELECT t.id FROM trips t JOIN shared_trips s ON s.trip_id = t.id"
+            " JOIN shared_trip_feedback f ON f.shared_trip_id = s.id WHERE t.user_id = :me LIMIT 1"
+        ), {"me": ME}).scalar()
+        shared_trip_id = conn.execute(text(
+            "SELECT s.id FROM shared_trips s JOIN shared_trip_feedback f ON f.shared_trip_id = s.id"
+            " WHERE s.shared_with_id = :me LIMIT 1"
+        ), {"me": ME}).scalar()
+    return {"trip_id": trip_id, "shared_trip_id": shared_trip_id}
+
+
+@pytest.fixture
+def migrated(pg_engine):
+    run_migrations(pg_engine)
+    return _seed(pg_engine)
+
+
+@pytest.fixture
+def pg_route_engine(pg_engine):
+    # Zaseban engine za sinkrone rute: EXPLAIN ide preko pg_engine i ne smije se brojati
+    engine = create_engine(pg_engine.url, poolclass=NullPool)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def client(pg_async_session_factory, pg_route_engine):
+    app = FastAPI()
+    app.include_router(friends.router, prefix="/api/friends")
+    app.include_router(trips.router, prefix="/api")
+
+    async def override_db():
+        async with pg_async_session_factory() as db:
+            yield db
+
+    def override_sync_db():
+        db = sessionmaker(bind=pg_route_engine)()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app.dependency_overrides[get_async_db] = override_db
+    app.dependency_overrides[get_db] = override_sync_db
+    app.dependency_overrides[get_current_user] = lambda: SimpleNamespace(id=ME, username=f"user{ME}")
+    with TestClient(app) as client:
+        yield client
+
+
+@pytest.fixture
+def executed(pg_async_session_factory, pg_route_engine):
+    statements = []
+    engines = (pg_async_session_factory.kw["bind"].sync_engine, pg_route_engine)
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(_positional(statement, parameters))
+
+    for engine in engines:
+        event.listen(engine, "before_cursor_execute", record)
+    yield statements
+    for engine in engines:
+        event.remove(engine, "before_cursor_execute", record)
+
+
+def _positional(statement: str, parameters):
+    """psycopg2 (%(ime)s + dict) -> $1, $2... + lista, kao kod asyncpg."""
+    if not isinstance(parameters, dict):
+        return statement, parameters
+    names = []
+
+    def number(match):
+        names.append(match.group(1))
+        return f"${len(names)}"
+
+    statement = re.sub(r"%\((\w+)\)s", number, statement)
+    return statement, [parameters[name] for name in names]
+
+
+def _leading_columns(conn) -> dict:
+    # Indeksi na izrazima (npr. lower(username)) nemaju stupac u indkey[0]
+    return dict(conn.execute(text(
+        "SELECT c.relname, a.attname FROM pg_index i"
+        " JOIN pg_class c ON c.oid = i.indexrelid"
+        " JOIN pg_attribute a ON a.attrelid = i.indrelid AND a.attnum = i.indkey[0]"
+    )).all())
+
+
+def _full_scans(node, leading: dict, parent: str = "") -> list:
+    """Čvorovi koji čitaju cijelu tablicu ili cijeli indeks.
+
+    Index Cond bez vodećeg stupca indeksa (npr. friend_id na (user_id, friend_id))
+    i dalje prolazi cijeli indeks. Merge Join čita indeks redom i staje kad
+    druga strana završi, to se ne računa.
+    """
+    found = []
+    node_type = node["Node Type"]
+    if node_type == "Seq Scan":
+        found.append(f"Seq Scan on {node['Relation Name']}")
+    elif "Index Name" in node and parent != "Merge Join":
+        column = leading.get(node["Index Name"])
+        condition = node.get("Index Cond", "")
+        if not condition or (column and not re.search(rf"(?<![\w.]){re.escape(column)}\b", condition)):
+            found.append(f"{node_type} using {node['Index Name']}")
+    for child in node.get("Plans", []):
+        found += _full_scans(child, leading, node_type)
+    return found
+
+
+def _seq_scans(conn, statement: str, parameters) -> list:
+    # PREPARE + EXPLAIN EXECUTE planira sa stvarnim vrijednostima parametara
+    conn.execute(text("DEALLOCATE ALL"))
+    conn.exec_driver_sql(f"PREPARE hot_query AS {statement}")
+    placeholders = ", ".join(["%s"] * len(parameters))
+    explain = "EXPLAIN (FORMAT JSON) EXECUTE hot_query" + (f"({placeholders})" if parameters else "")
+    plan = conn.exec_driver_sql(explain, tuple(parameters)).scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return _full_scans(plan[0]["Plan"], _leading_columns(conn))
+
+
+def test_hot_queries_use_indexes(pg_engine, migrated, client, executed):
+    checked = 0
+    with pg_engine.connect() as conn:
+        conn.execute(text("SET enable_seqscan = off"))
+        for route in READ_ROUTES:
+            executed.clear()
+            response = client.get(route.format(**migrated))
+            assert response.status_code == 200, (route, response.text)
+            assert executed, route
+            for statement, parameters in executed:
+                if not statement.lstrip().upper().startswith(("SELECT", "UPDATE", "DELETE")):
+                    continue
+                checked += 1
+                assert _seq_scans(conn, statement, parameters) == [], (route, statement)
+    assert checked >= len(READ_ROUTES)
@@ -0,0 +1,28 @@
+"""Pretraga ruta: isti rezultat kao Dijkstra bez heuristike, ograničen cache granica."""
+import random
+
+import pytest
+
+from route_search import MINUTES_PER_DAY, OPTIMIZE_CHEAPEST, OPTIMIZE_FASTEST, find_route, route_graph
+from tests.reference import dijkstra, route_catalog
+
+
+@pytest.mark.parametrize("optimize", [OPTIMIZE_CHEAPEST, OPTIMIZE_FASTEST])
+def test_routes_match_plain_dijkstra(optimize):
+    index = route_catalog(30, 300, seed=4)
+    rng = random.Random(5)
+    field = "total_minutes" if optimize == OPTIMIZE_FASTEST else "total_price"
+    for _ in range(100):
+        origin, destination = rng.sample([f"city{i}" for i in range(30)], 2)
+        depart_after = rng.randrange(0, MINUTES_PER_DAY, 15)
+        route = find_route(index, origin, destination, depart_after, optimize)
+        assert (route and route[field]) == dijkstra(index, origin, destination, depart_after, optimize)
+
+
+def test_unknown_destinations_are_not_cached():
+    index = route_catalog(10, 60)
+    graph = route_graph(index)
+    for optimize in (OPTIMIZE_CHEAPEST, OPTIMIZE_FASTEST):
+        for city in ("atlantis", "el dorado", "city0 "):
+            assert find_route(index, "city1", city, 0, optimize) is None
+    assert graph._bounds == {}
@@ -0,0 +1,68 @@
+"""Inkrementalna statistika nakon niza izmjena kroz rute jednaka je punom preračunu."""
+from models import Friend, FriendshipStatus, User, UserTravelStats
+from travel_stats import rebuild_all
+
+STATS_COLUMNS = (
+    "trip_count", "total_cost", "trips_per_month", "destinations",
+    "shares_sent", "shares_received", "feedback_count", "feedback_rating_sum",
+)
+EMPTY = (0, 0, {}, {}, 0, 0, 0, 0)
+
+
+def _trip(name, start, destination, cost):
+    return {
+        "name": name, "start_date": start, "end_date": start, "transport_type": "road",
+        "transport_option": {"id": f"bus-{name}", "destination": destination, "price": cost},
+        "accommodation": None, "flight": None, "total_cost": cost,
+    }
+
+
+def _stats(db) -> dict:
+    rows = {
+        row.user_id: tuple(getattr(row, column) for column in STATS_COLUMNS)
+        for row in db.query(UserTravelStats).populate_existing()
+    }
+    # Korisnik kojem su sve izmjene poništene ima prazan redak; preračun ga ne stvara
+    return {user_id: values for user_id, values in rows.items() if values != EMPTY}
+
+
+def test_incremental_stats_match_rebuild(sqlite_session_factory, trips_client):
+    db = sqlite_session_factory()
+    db.add_all([User(id=i, username=f"user{i}", email=f"u{i}@example.com", hashed_password="x") for i in (1, 2, 3)])
+    db.add_all([
+        Friend(user_id=1, friend_id=2, status=FriendshipStatus.accepted),
+        Friend(user_id=3, friend_id=1, status=FriendshipStatus.accepted),
+    ])
+    db.commit()
+
+    def as_user(user_id):
+        trips_client.user_id = user_id
+        return trips_client
+
+    created = [
+        as_user(1).post("/api/trips/", json=_trip("split", "2030-07-01", "Split", 300)).json()["id"],
+        as_user(1).post("/api/trips/", json=_trip("zadar", "2030-07-20", "Zadar", 120)).json()["id"],
+        as_user(1).post("/api/trips/", json=_trip("pula", "2030-08-02", "Split", 80)).json()["id"],
+        as_user(2).post("/api/trips/", json=_trip("rijeka", "2031-01-05", "Rijeka", 60)).json()["id"],
+    ]
+    for trip_id, friend_id in ((created[0], 2), (created[0], 3), (created[1], 2)):
+        assert as_user(1).post("/api/trips/share/", json={"trip_id": trip_id, "friend_id": friend_id}).status_code == 200
+    assert as_user(2).post("/api/trips/share/", json={"trip_id": created[3], "friend_id": 1}).status_code == 200
+
+    shared = {
+        (user_id, item["trip"]["id"]): item["shared_trip_id"]
+        for user_id in (1, 2, 3) for item in as_user(user_id).get("/api/trips/shared/").json()
+    }
+    for user_id, trip_id, rating in ((2, created[0], 5), (3, created[0], 2), (2, created[1], 4), (1, created[3], 3)):
+        feedback = {"shared_trip_id": shared[user_id, trip_id], "rating": rating, "comment": "ok"}
+        assert as_user(user_id).post("/api/trips/feedback/", json=feedback).status_code == 200
+
+    deleted = as_user(1).post("/api/trips/bulk-delete", json={"trip_ids": [created[0], created[2]]}).json()
+    assert deleted["deleted"] == [created[0], created[2]]
+
+    incremental = _stats(db)
+    assert incremental[1][0] == 1 and incremental[1][4] == 1
+    rebuild_all(db)
+    assert _stats(db) == incremental
+    db.rollback()
+    db.close()
@@ -0,0 +1,66 @@
+"""Tripovi referenciraju stavke serverskog kataloga; ostalo ide u catalog_items."""
+import json
+
+import pytest
+
+import trip_catalog
+from catalog import CATALOG_SOURCES, CatalogService
+from models import CatalogItem
+
+SOURCES = {
+    "accommodation": [{"id": "acc1", "price": 120, "destination": "Split", "images": ["a.jpg"]}],
+    "flight": [
+        {"id": "flight1", "price": 90, "departure": "Zagreb", "destination": "Split"},
+        {"id": "flight2", "price": 95, "departure": "Split", "destination": "Zagreb"},
+    ],
+    "transport": [{"id": "bus1", "price": 20, "departure": "Zagreb", "destination": "Split", "company": "Road"}],
+    "transport_flight": [{"id": "bus1", "price": 5, "currLocation": "Zagreb", "departure": "Zagreb", "name": "Airport"}],
+}
+
+
+@pytest.fixture(autouse=True)
+def service(tmp_path, monkeypatch):
+    for kind, (filename, _, _) in CATALOG_SOURCES.items():
+        (tmp_path / filename).write_text(json.dumps(SOURCES[kind]))
+    service = CatalogService(str(tmp_path))
+    monkeypatch.setattr(trip_catalog, "catalog", service)
+    return service
+
+
+def test_catalog_items_are_referenced_by_id(sqlite_session_factory):
+    db = sqlite_session_factory()
+    transport, accommodation, flight = trip_catalog.to_references(
+        db,
+        {**SOURCES["transport_flight"][0], "price": 4},
+        {"id": "default", "name": "Already have accommodation", "price": 0},
+        {"departure": SOURCES["flight"][0], "return": SOURCES["flight"][1]},
+        "air",
+    )
+    db.commit()
+
+    # "air" -> prijevoz do aerodroma, ne obični bus1
+    assert transport == {"id": "bus1", "price": 4, "departure": "Zagreb", "currLocation": "Zagreb", "catalog_kind": "transport_flight"}
+    assert flight["departure"]["catalog_kind"] == "flight" and flight["return"]["id"] == "flight2"
+    # Vlastiti smještaj nije u katalogu: jedan redak u catalog_items
+    assert set(accommodation) == {"id", "price", "catalog_id"}
+    assert [row.data["name"] for row in db.query(CatalogItem)] == ["Already have accommodation"]
+
+    item = trip_catalog.hydrate_trips(db, [{"transport_option": transport, "accommodation": accommodation, "flight": flight}])[0]
+    # Snapshot ima prednost: cijena po kojoj je rezerviran
+    assert item["transport_option"]["name"] == "Airport" and item["transport_option"]["price"] == 4
+    assert item["accommodation"]["name"] == "Already have accommodation"
+    assert item["flight"]["return"]["destination"] == "Zagreb"
+    db.close()
+
+
+def test_road_transport_uses_transport_catalog(sqlite_session_factory):
+    db = sqlite_session_factory()
+    transport, accommodation, _ = trip_catalog.to_references(
+        db, SOURCES["transport"][0], SOURCES["accommodation"][0], None, "road"
+    )
+    assert transport["catalog_kind"] == "transport" and accommodation["catalog_kind"] == "accommodation"
+    assert db.query(CatalogItem).count() == 0
+
+    item = trip_catalog.hydrate_trips(db, [{"transport_option": transport, "accommodation": accommodation}])[0]
+    assert item["transport_option"]["company"] == "Road" and item["accommodation"]["images"] == ["a.jpg"]
+    db.close()
@@ -0,0 +1,39 @@
+"""Planer paketa: ista fronta kao pretraga svih parova, ograničen cache na indeksu."""
+import pytest
+
+from catalog import CatalogIndex
+from tests.reference import DESTINATION, ORIGIN, brute_force, planner_catalog
+from trip_planner import plan_bundles
+
+
+@pytest.mark.parametrize("seed", [1, 2, 3])
+@pytest.mark.parametrize("nights,budget", [(1, 400), (3, 1200), (7, 5000)])
+def test_front_matches_brute_force(seed, nights, budget):
+    index = planner_catalog(40, seed=seed)
+    bundles = plan_bundles(index, ORIGIN, DESTINATION, nights, budget, limit=10 ** 6)
+    assert {(b["total_price"], b["duration_minutes"], b["rating"] or 0) for b in bundles} == brute_force(index, nights, budget)
+    assert [b["total_price"] for b in bundles] == sorted(b["total_price"] for b in bundles)
+
+
+def test_derived_cache_does_not_grow_with_requests():
+    index = planner_catalog(20)
+    for nights in range(1, 15):
+        plan_bundles(index, ORIGIN, DESTINATION, nights, 3000)
+    for city in ("atlantis", "el dorado", "shangri-la"):
+        assert plan_bundles(index, city, DESTINATION, 2, 3000) == []
+        assert plan_bundles(index, ORIGIN, city, 2, 3000) == []
+    assert sorted(index.derived) == [("planner_stay", DESTINATION), ("planner_travel", ORIGIN, DESTINATION, None)]
+
+
+def test_missing_rating_is_none_in_output():
+    index = CatalogIndex({
+        "transport": [{"id": "bus", "price": 10, "departure": ORIGIN, "destination": DESTINATION, "duration": "2h"}],
+        "flight": [],
+        "transport_flight": [],
+        "accommodation": [
+            {"id": "cheap", "price": 20, "destination": DESTINATION},
+            {"id": "good", "price": 50, "destination": DESTINATION, "reviews": [{"rating": 5}]},
+        ],
+    })
+    bundles = plan_bundles(index, ORIGIN, DESTINATION, 2, 500)
+    assert [(b["accommodation"]["id"], b["total_price"], b["rating"]) for b in bundles] == [("cheap", 50, None), ("good", 110, 5)]
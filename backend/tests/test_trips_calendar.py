@@ -0,0 +1,88 @@
+"""Kalendarski endpointi: preklapanje s prozorom, mjesečni zbroj, kursor nadolazećih tripova."""
+import datetime
+
+from models import Trip, User
+from routers.trips import _next_month
+
+D = datetime.date
+
+
+def _seed(session_factory, trips):
+    db = session_factory()
+    db.add_all([User(id=i, username=f"user{i}", email=f"u{i}@example.com", hashed_password="x") for i in (1, 2)])
+    db.add_all([
+        Trip(id=trip_id, user_id=user_id, name=f"Trip {trip_id}", start_date=start, end_date=end, total_cost=cost)
+        for trip_id, user_id, start, end, cost in trips
+    ])
+    db.commit()
+    db.close()
+
+
+def test_window_overlap_includes_both_edges(sqlite_session_factory, trips_client):
+    _seed(sqlite_session_factory, [
+        (1, 1, D(2030, 3, 1), D(2030, 3, 10), 10),   # završava prvog dana prozora
+        (2, 1, D(2030, 3, 20), D(2030, 3, 25), 10),  # počinje zadnjeg dana prozora
+        (3, 1, D(2030, 2, 1), D(2030, 4, 1), 10),    # obuhvaća cijeli prozor
+        (4, 1, D(2030, 3, 12), D(2030, 3, 14), 10),  # unutar prozora
+        (5, 1, D(2030, 3, 1), D(2030, 3, 9), 10),    # završava dan prije
+        (6, 1, D(2030, 3, 21), D(2030, 3, 22), 10),  # počinje dan poslije
+        (7, 2, D(2030, 3, 12), D(2030, 3, 14), 10),  # tuđi trip
+    ])
+
+    response = trips_client.get("/api/trips/calendar", params={"start": "2030-03-10", "end": "2030-03-20"})
+
+    assert response.status_code == 200
+    assert [trip["id"] for trip in response.json()] == [3, 1, 4, 2]
+    assert trips_client.get("/api/trips/calendar", params={"start": "2030-03-20", "end": "2030-03-10"}).status_code == 400
+
+
+def test_months_fill_gaps_across_year_end(sqlite_session_factory, trips_client):
+    _seed(sqlite_session_factory, [
+        (1, 1, D(2030, 11, 5), D(2030, 11, 8), 100),
+        (2, 1, D(2030, 11, 30), D(2030, 12, 2), 50),
+        (3, 1, D(2031, 1, 1), D(2031, 1, 3), 70),
+        (4, 1, D(2031, 3, 1), D(2031, 3, 3), 1),     # izvan raspona
+        (5, 2, D(2030, 12, 10), D(2030, 12, 12), 9),  # tuđi trip
+    ])
+
+    response = trips_client.get("/api/trips/calendar/months", params={"start": "2030-11", "end": "2031-02"})
+
+    assert response.status_code == 200
+    assert response.json() == [
+        {"month": "2030-11", "trip_count": 2, "total_cost": 150},
+        {"month": "2030-12", "trip_count": 0, "total_cost": 0},
+        {"month": "2031-01", "trip_count": 1, "total_cost": 70},
+        {"month": "2031-02", "trip_count": 0, "total_cost": 0},
+    ]
+    assert trips_client.get("/api/trips/calendar/months", params={"start": "2030-13"}).status_code == 400
+
+
+def test_next_month_rolls_over_year():
+    assert _next_month(D(2030, 12, 1)) == D(2031, 1, 1)
+    assert _next_month(D(2030, 1, 1)) == D(2030, 2, 1)
+
+
+def test_upcoming_pages_by_start_date(sqlite_session_factory, trips_client):
+    today = datetime.date.today()
+    day = datetime.timedelta(days=1)
+    _seed(sqlite_session_factory, [
+        (1, 1, today - day, today + day, 1),          # već je počeo
+        (2, 1, today + 3 * day, today + 4 * day, 1),
+        (3, 1, today, today, 1),
+        (4, 1, today + 3 * day, today + 5 * day, 1),  # isti dan kao 2, redoslijed po id-u
+        (5, 1, today + 9 * day, today + 9 * day, 1),
+        (6, 2, today + 2 * day, today + 2 * day, 1),
+    ])
+
+    pages, cursor = [], None
+    while True:
+        body = trips_client.get(
+            "/api/trips/calendar/upcoming", params={"limit": 2, **({"cursor": cursor} if cursor else {})}
+        ).json()
+        pages.append([trip["id"] for trip in body["trips"]])
+        cursor = body["next_cursor"]
+        if cursor is None:
+            break
+
+    assert pages == [[3, 2], [4, 5]]
+    assert trips_client.get("/api/trips/calendar/upcoming", params={"cursor": "bm9wZQ"}).status_code == 400
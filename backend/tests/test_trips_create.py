@@ -0,0 +1,33 @@
+"""Greška pri spremanju tripa ne otkriva detalje klijentu."""
+from types import SimpleNamespace
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from database import get_async_db
+from routers import trips
+from routers.auth import get_current_user
+
+TRIP = {
+    "name": "Split", "start_date": "2030-07-01", "end_date": "2030-07-05", "transport_type": "road",
+    "transport_option": {"id": "bus1", "price": 20}, "accommodation": None, "flight": None, "total_cost": 20,
+}
+
+
+def test_unexpected_error_returns_generic_500(async_sqlite_session_factory, monkeypatch):
+    def fail(*args):
+        raise RuntimeError("connection to db-internal:5432 refused")
+
+    monkeypatch.setattr(trips, "to_references", fail)
+    app = FastAPI()
+    app.include_router(trips.router, prefix="/api")
+
+    async def override_db():
+        async with async_sqlite_session_factory() as db:
+            yield db
+
+    app.dependency_overrides[get_async_db] = override_db
+    app.dependency_overrides[get_current_user] = lambda: SimpleNamespace(id=1)
+    response = TestClient(app, raise_server_exceptions=False).post("/api/trips/", json=TRIP)
+    assert response.status_code == 500
+    assert "db-internal" not in response.text
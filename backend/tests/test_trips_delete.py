@@ -0,0 +1,62 @@
+"""Brisanje tripova: rezultat po id-u, tuđi tripovi ostaju, dijeljenja i feedbackove briše baza."""
+from models import SharedTrip, SharedTripFeedback, Trip, User, UserDataVersion
+from versions import SCOPE_SHARED
+
+
+def _seed(session_factory):
+    db = session_factory()
+    db.add_all([User(id=i, username=f"user{i}", email=f"u{i}@example.com", hashed_password="x") for i in (1, 2, 3)])
+    db.add_all([
+        Trip(id=1, user_id=1, name="Split", total_cost=100),
+        Trip(id=2, user_id=1, name="Zadar", total_cost=50),
+        Trip(id=3, user_id=1, name="Pula", total_cost=70),
+        Trip(id=4, user_id=2, name="Rijeka", total_cost=80),
+    ])
+    db.flush()
+    db.add_all([
+        SharedTrip(id=1, trip_id=1, shared_by_id=1, shared_with_id=2),
+        SharedTrip(id=2, trip_id=1, shared_by_id=1, shared_with_id=3),
+        SharedTrip(id=3, trip_id=3, shared_by_id=1, shared_with_id=2),
+        SharedTrip(id=4, trip_id=4, shared_by_id=2, shared_with_id=1),
+    ])
+    db.flush()
+    db.add_all([
+        SharedTripFeedback(shared_trip_id=1, rating=5, comment="super", created_by_id=2),
+        SharedTripFeedback(shared_trip_id=4, rating=3, comment="ok", created_by_id=1),
+    ])
+    db.commit()
+    db.close()
+
+
+def test_bulk_delete(sqlite_session_factory, trips_client):
+    _seed(sqlite_session_factory)
+
+    response = trips_client.post("/api/trips/bulk-delete", json={"trip_ids": [2, 1, 4, 99, 1]})
+
+    assert response.status_code == 200
+    assert response.json() == {"deleted": [2, 1], "not_found": [4, 99]}
+    db = sqlite_session_factory()
+    assert sorted(trip.id for trip in db.query(Trip)) == [3, 4]
+    # Dijeljenja i feedbackovi obrisanog tripa nestaju, ostali ostaju
+    assert sorted(share.id for share in db.query(SharedTrip)) == [3, 4]
+    assert [feedback.shared_trip_id for feedback in db.query(SharedTripFeedback)] == [4]
+    # Primatelji dijeljenja dobivaju novu verziju (ETag)
+    assert {row.user_id for row in db.query(UserDataVersion).filter(UserDataVersion.scope == SCOPE_SHARED)} == {2, 3}
+    db.close()
+
+
+def test_bulk_delete_limits(trips_client):
+    assert trips_client.post("/api/trips/bulk-delete", json={"trip_ids": []}).status_code == 400
+    assert trips_client.post("/api/trips/bulk-delete", json={"trip_ids": list(range(1000))}).status_code == 400
+
+
+def test_delete_other_users_trip_is_not_found(sqlite_session_factory, trips_client):
+    _seed(sqlite_session_factory)
+
+    assert trips_client.delete("/api/trips/4").status_code == 404
+    trips_client.user_id = 2
+    assert trips_client.delete("/api/trips/4").status_code == 200
+    db = sqlite_session_factory()
+    assert db.query(SharedTrip).filter(SharedTrip.trip_id == 4).count() == 0
+    assert db.query(SharedTripFeedback).count() == 1
+    db.close()
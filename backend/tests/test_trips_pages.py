@@ -0,0 +1,71 @@
+"""Liste tripova: stavke i next_cursor u tijelu odgovora, broj upita ne ovisi o broju tripova."""
+import datetime
+
+import pytest
+from sqlalchemy import event
+
+from models import SharedTrip, SharedTripFeedback, Trip, User
+
+
+def _seed(session_factory, count: int):
+    db = session_factory()
+    db.add_all([User(id=i, username=f"user{i}", email=f"u{i}@example.com", hashed_password="x") for i in (1, 2, 3)])
+    start = datetime.date(2030, 1, 1)
+    db.add_all([
+        Trip(id=i, user_id=1 if i <= count else 2, name=f"Trip {i}", start_date=start, end_date=start,
+             transport_type="road", transport_option={"id": f"bus{i}", "price": 10}, total_cost=10)
+        for i in range(1, count + 4)
+    ])
+    db.flush()
+    db.add_all([SharedTrip(id=i, trip_id=i, shared_by_id=1, shared_with_id=2 + i % 2) for i in range(1, count + 1)])
+    db.flush()
+    db.add_all([SharedTripFeedback(shared_trip_id=i, rating=4, comment="ok", created_by_id=2 + i % 2) for i in range(1, count + 1)])
+    db.commit()
+    db.close()
+
+
+def _pages(client, url, params):
+    pages, cursor = [], None
+    while True:
+        response = client.get(url, params={**params, **({"cursor": cursor} if cursor else {})})
+        assert response.status_code == 200
+        assert "X-Next-Cursor" not in response.headers
+        body = response.json()
+        pages.append(body["trips"])
+        cursor = body["next_cursor"]
+        if cursor is None:
+            return pages
+
+
+def test_my_trips_pages_in_body(sqlite_session_factory, trips_client):
+    _seed(sqlite_session_factory, 12)
+
+    pages = _pages(trips_client, "/api/trips/", {"limit": 5, "fields": "summary"})
+
+    assert [len(page) for page in pages] == [5, 5, 2]
+    assert [trip["id"] for page in pages for trip in page] == list(range(1, 13))
+    assert "transport_option" not in pages[0][0]
+
+
+@pytest.mark.parametrize("count", [4, 40])
+def test_overview_query_count_is_fixed(sqlite_session_factory, sqlite_engine, trips_client, count):
+    _seed(sqlite_session_factory, count)
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(sqlite_engine, "before_cursor_execute", record)
+    try:
+        response = trips_client.get("/api/trips/overview", params={"limit": 50})
+    finally:
+        event.remove(sqlite_engine, "before_cursor_execute", record)
+
+    body = response.json()
+    assert body["next_cursor"] is None
+    assert [trip["id"] for trip in body["trips"]] == list(range(1, count + 1))
+    first = body["trips"][0]
+    assert first["shared_with"] == [{"id": 3, "username": "user3", "email": "u3@example.com"}]
+    assert [feedback["user"]["id"] for feedback in first["feedbacks"]] == [3]
+    # Verzije, tripovi, dijeljenja, feedbackovi (catalog_items samo kad postoje reference)
+    assert len(statements) <= 5
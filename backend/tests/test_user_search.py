@@ -0,0 +1,42 @@
+import pytest
+from fastapi import HTTPException
+
+from models import User
+from pagination import encode_cursor
+from user_search import find_users
+
+
+@pytest.fixture
+def db(sqlite_session_factory):
+    db = sqlite_session_factory()
+    db.add_all([User(username=f"traveler{i:02d}", email=f"t{i}@example.com", hashed_password="x") for i in range(30)])
+    db.commit()
+    yield db
+    db.close()
+
+
+def test_cursor_pages_through_all_matches(db):
+    seen, cursor = [], None
+    while True:
+        page = find_users(db, "travel", cursor, limit=7)
+        seen += [user["username"] for user in page["users"]]
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+    assert seen == sorted(f"traveler{i:02d}" for i in range(30))
+
+
+@pytest.mark.parametrize("values", [
+    [1, "traveler01"],
+    ["1", "traveler01", 2],
+    [1, 5, 2],
+    [1, "traveler01", "2"],
+    [True, "traveler01", 2],
+    [1, "traveler01", 2.5],
+    [7, "traveler01", 2],
+    {"rank": 1},
+])
+def test_malformed_cursor_is_400(db, values):
+    with pytest.raises(HTTPException) as error:
+        find_users(db, "travel", encode_cursor(values))
+    assert error.value.status_code == 400
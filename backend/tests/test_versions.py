@@ -0,0 +1,35 @@
+"""Promjena profila poništava keširane odgovore svih koji ga prikazuju."""
+from models import Friend, FriendshipStatus, SharedTrip, Trip, User, UserDataVersion
+from versions import SCOPE_FRIENDS, SCOPE_SHARED, SCOPE_TRIPS, bump_profile_versions
+
+
+def test_profile_change_bumps_dependent_users(sqlite_session_factory):
+    db = sqlite_session_factory()
+    db.add_all([User(id=i, username=f"user{i}", email=f"u{i}@example.com", hashed_password="x") for i in range(1, 7)])
+    db.add_all([
+        Friend(user_id=1, friend_id=2, status=FriendshipStatus.pending),
+        Friend(user_id=3, friend_id=1, status=FriendshipStatus.accepted),
+        Trip(id=1, user_id=1, name="mine", total_cost=0),
+        Trip(id=2, user_id=5, name="theirs", total_cost=0),
+        Trip(id=3, user_id=6, name="unrelated", total_cost=0),
+    ])
+    db.flush()
+    db.add_all([
+        SharedTrip(trip_id=1, shared_by_id=1, shared_with_id=4),
+        SharedTrip(trip_id=2, shared_by_id=5, shared_with_id=1),
+        SharedTrip(trip_id=3, shared_by_id=6, shared_with_id=2),
+    ])
+    db.commit()
+
+    bump_profile_versions(db, 1)
+    db.commit()
+
+    bumped = {}
+    for row in db.query(UserDataVersion).all():
+        bumped.setdefault(row.scope, set()).add(row.user_id)
+    assert bumped == {
+        SCOPE_FRIENDS: {1, 2, 3},
+        SCOPE_TRIPS: {1, 5},
+        SCOPE_SHARED: {1, 4},
+    }
+    db.close()
@@ -0,0 +1,214 @@
+"""Inkrementalno održavana statistika putovanja po korisniku.
+
+Funkcije `record_*` pozivaju se u istoj transakciji kao i izmjena koju
+opisuju (create_trip, delete_trip, share_trip, leave_feedback), pa statistika
+uvijek odgovara podacima. Za punjenje postojećih podataka:
+
+    python -m travel_stats
+"""
+from collections import Counter
+
+from sqlalchemy import func
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, load_only
+
+from models import SharedTrip, SharedTripFeedback, Trip, UserTravelStats
+
+
+def trip_destination(trip) -> str:
+    """Odredište tripa iz odabranog prijevoza, smještaja ili leta."""
+    candidates = [trip.transport_option, trip.accommodation]
+    if trip.flight:
+        candidates.append(trip.flight.get("departure") if "departure" in trip.flight else trip.flight)
+    for option in candidates:
+        if isinstance(option, dict) and option.get("destination"):
+            return str(option["destination"]).lower()
+    return None
+
+
+def trip_month(trip) -> str:
+    # "YYYY-MM"; str() jer v0006 može čitati još nepretvoreni String stupac
+    return str(trip.start_date)[:7] if trip.start_date else None
+
+
+def _empty_stats(user_id: int = None) -> UserTravelStats:
+    return UserTravelStats(
+        user_id=user_id, trip_count=0, total_cost=0, trips_per_month={}, destinations={},
+        shares_sent=0, shares_received=0, feedback_count=0, feedback_rating_sum=0,
+    )
+
+
+def _stats_for_update(db: Session, user_id: int) -> UserTravelStats:
+    # Zaključaj redak korisnika da se paralelna ažuriranja ne pregaze
+    stats = (
+        db.query(UserTravelStats)
+        .filter(UserTravelStats.user_id == user_id)
+        .with_for_update()
+        .populate_existing()
+        .first()
+    )
+    if stats is not None:
+        return stats
+    try:
+        with db.begin_nested():
+            stats = _empty_stats(user_id)
+            db.add(stats)
+        return stats
+    except IntegrityError:
+        return db.query(UserTravelStats).filter(UserTravelStats.user_id == user_id).with_for_update().one()
+
+
+def _stats_for_users(db: Session, user_ids) -> dict:
+    # Uvijek isti redoslijed zaključavanja (po user_id) - bez deadlocka između
+    # istovremenih dijeljenja A->B i B->A
+    return {user_id: _stats_for_update(db, user_id) for user_id in sorted(set(user_ids))}
+
+
+def _adjust(counts: dict, key, delta: int) -> dict:
+    # JSON stupac se mijenja dodjelom nove vrijednosti, da ORM primijeti promjenu
+    counts = dict(counts or {})
+    if key is None:
+        return counts
+    counts[key] = counts.get(key, 0) + delta
+    if counts[key] <= 0:
+        del counts[key]
+    return counts
+
+
+def record_trip_created(db: Session, trip: Trip):
+    stats = _stats_for_update(db, trip.user_id)
+    stats.trip_count += 1
+    stats.total_cost += trip.total_cost or 0
+    stats.trips_per_month = _adjust(stats.trips_per_month, trip_month(trip), 1)
+    stats.destinations = _adjust(stats.destinations, trip_destination(trip), 1)
+
+
+def record_trips_deleted(db: Session, user_id: int, trip_ids, recipients):
+    """Oduzmi tripove (i njihova dijeljenja i feedbackove) prije nego ih se obriše.
+
+    `recipients` su shared_with_id svih dijeljenja tih tripova (po retku).
+    """
+    trips = (
+        db.query(Trip)
+        .options(load_only(
+            Trip.id, Trip.start_date, Trip.total_cost, Trip.transport_option, Trip.accommodation, Trip.flight
+        ))
+        .filter(Trip.id.in_(trip_ids), Trip.user_id == user_id)
+        .all()
+    )
+    if not trips:
+        return
+    ids = [trip.id for trip in trips]
+    received = Counter(recipients)
+    locked = _stats_for_users(db, [user_id, *received])
+    stats = locked[user_id]
+    for trip in trips:
+        stats.trip_count -= 1
+        stats.total_cost -= trip.total_cost or 0
+        stats.trips_per_month = _adjust(stats.trips_per_month, trip_month(trip), -1)
+        stats.destinations = _adjust(stats.destinations, trip_destination(trip), -1)
+
+    stats.shares_sent -= sum(received.values())
+    for recipient_id, count in received.items():
+        locked[recipient_id].shares_received -= count
+
+    feedback_count, rating_sum = (
+        db.query(func.count(SharedTripFeedback.id), func.coalesce(func.sum(SharedTripFeedback.rating), 0))
+        .join(SharedTrip, SharedTrip.id == SharedTripFeedback.shared_trip_id)
+        .filter(SharedTrip.trip_id.in_(ids))
+        .one()
+    )
+    stats.feedback_count -= feedback_count
+    stats.feedback_rating_sum -= rating_sum
+
+
+def record_trip_shared(db: Session, owner_id: int, recipient_id: int):
+    locked = _stats_for_users(db, [owner_id, recipient_id])
+    locked[owner_id].shares_sent += 1
+    locked[recipient_id].shares_received += 1
+
+
+def record_feedback(db: Session, owner_id: int, rating: int):
+    # Feedback se broji vlasniku tripa (prosječna ocjena njegovih putovanja)
+    stats = _stats_for_update(db, owner_id)
+    stats.feedback_count += 1
+    stats.feedback_rating_sum += rating or 0
+
+
+def stats_summary(stats: UserTravelStats) -> dict:
+    if stats is None:
+        stats = _empty_stats()
+    return {
+        "trip_count": stats.trip_count,
+        "total_cost": stats.total_cost,
+        "average_cost": stats.total_cost / stats.trip_count if stats.trip_count else 0,
+        "trips_per_month": dict(sorted((stats.trips_per_month or {}).items())),
+        "destinations": stats.destinations or {},
+        "shares_sent": stats.shares_sent,
+        "shares_received": stats.shares_received,
+        "feedback_count": stats.feedback_count,
+        "average_feedback_rating": (
+            stats.feedback_rating_sum / stats.feedback_count if stats.feedback_count else None
+        ),
+    }
+
+
+def rebuild_all(db: Session):
+    """Ponovno izračunaj statistiku svih korisnika iz tripova, dijeljenja i feedbackova.
+
+    Samo flush - commit je na pozivatelju (migracija ili `python -m travel_stats`).
+    """
+    rows = {}
+
+    def row(user_id):
+        if user_id not in rows:
+            rows[user_id] = _empty_stats(user_id)
+        return rows[user_id]
+
+    trips = (
+        db.query(Trip)
+        .options(load_only(
+            Trip.user_id, Trip.start_date, Trip.total_cost, Trip.transport_option, Trip.accommodation, Trip.flight
+        ))
+        .yield_per(1000)
+    )
+    for trip in trips:
+        stats = row(trip.user_id)
+        stats.trip_count += 1
+        stats.total_cost += trip.total_cost or 0
+        stats.trips_per_month = _adjust(stats.trips_per_month, trip_month(trip), 1)
+        stats.destinations = _adjust(stats.destinations, trip_destination(trip), 1)
+
+    for owner_id, count in db.query(Trip.user_id, func.count(SharedTrip.id)).join(
+        SharedTrip, SharedTrip.trip_id == Trip.id
+    ).group_by(Trip.user_id):
+        row(owner_id).shares_sent = count
+    for recipient_id, count in db.query(SharedTrip.shared_with_id, func.count(SharedTrip.id)).group_by(
+        SharedTrip.shared_with_id
+    ):
+        row(recipient_id).shares_received = count
+    for owner_id, count, rating_sum in (
+        db.query(Trip.user_id, func.count(SharedTripFeedback.id), func.coalesce(func.sum(SharedTripFeedback.rating), 0))
+        .join(SharedTrip, SharedTrip.trip_id == Trip.id)
+        .join(SharedTripFeedback, SharedTripFeedback.shared_trip_id == SharedTrip.id)
+        .group_by(Trip.user_id)
+    ):
+        row(owner_id).feedback_count = count
+        row(owner_id).feedback_rating_sum = rating_sum
+
+    db.query(UserTravelStats).delete(synchronize_session=False)
+    db.add_all(rows.values())
+    db.flush()
+    return len(rows)
+
+
+if __name__ == "__main__":
+    from database import SessionLocal
+
+    session = SessionLocal()
+    try:
+        count = rebuild_all(session)
+        session.commit()
+        print(f"Rebuilt travel stats for {count} users")
+    finally:
+        session.close()
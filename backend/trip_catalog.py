@@ -0,0 +1,166 @@
+"""Reference tripova na stavke kataloga.
+
+Trip ne sprema cijeli objekt iz kataloga (slike, recenzije, opisi), nego
+samo referencu i mali snapshot (cijena, vremena, relacija) u postojećim
+JSON stupcima. Stavka iz serverskog kataloga (catalog.py) se referencira
+svojim id-em i vrstom kataloga:
+
+    transport_option = {"catalog_kind": "transport", "id": "bus1", "price": 78, ...}
+
+Objekti kojih nema u katalogu (npr. "Already have accommodation" iz
+frontenda) spremaju se jednom u catalog_items po hashu sadržaja:
+
+    accommodation = {"catalog_id": 3, "price": 0, ...}
+    flight = {"departure": {...}, "return": {...} | None}
+
+Cijeli objekt se vraća u odgovor (`hydrate_trips`) iz indeksa u memoriji i
+jednim upitom po stranici za catalog_items, i to samo kad su ti stupci
+zatraženi. Snapshot ima prednost pred katalogom - trip zadržava cijenu po
+kojoj je rezerviran, i ostaje jedini podatak ako stavka nestane iz kataloga.
+"""
+import hashlib
+import json
+
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from catalog import KIND_ACCOMMODATION, KIND_FLIGHT, KIND_TRANSPORT, KIND_TRANSPORT_FLIGHT, catalog
+from models import CatalogItem
+
+FLIGHT_LEGS = ("departure", "return")
+
+# Polja koja trip čuva kod sebe; travel_stats treba departure/destination
+SNAPSHOT_FIELDS = ("id", "price", "departure", "destination", "currLocation", "departure_time", "arrival_time")
+
+
+def content_hash(data: dict) -> str:
+    raw = json.dumps(data, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+def _is_reference(value) -> bool:
+    return isinstance(value, dict) and ("catalog_id" in value or "catalog_kind" in value)
+
+
+def catalog_ids(db: Session, items) -> list:
+    """[(kind, data), ...] -> id-evi stavki kataloga istim redom; nedostajuće se dodaju.
+
+    Najviše dva SELECT-a i jedan INSERT neovisno o broju stavki.
+    """
+    keys = [(kind, content_hash(data)) for kind, data in items]
+    if not keys:
+        return []
+    hashes = {key[1] for key in keys}
+
+    def load():
+        return {
+            (row.kind, row.content_hash): row.id
+            for row in db.query(CatalogItem.id, CatalogItem.kind, CatalogItem.content_hash)
+            .filter(CatalogItem.content_hash.in_(hashes))
+        }
+
+    found = load()
+    missing = {}
+    for (kind, data), key in zip(items, keys):
+        if key not in found and key not in missing:
+            missing[key] = {
+                "kind": kind,
+                "external_id": str(data["id"]) if data.get("id") is not None else None,
+                "content_hash": key[1],
+                "data": data,
+            }
+    if missing:
+        dialect = db.get_bind().dialect.name
+        if dialect == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert as dialect_insert
+        elif dialect == "sqlite":
+            from sqlalchemy.dialects.sqlite import insert as dialect_insert
+        else:
+            dialect_insert = None
+        if dialect_insert is not None:
+            # Paralelni create_trip s istom stavkom: drugi INSERT se tiho preskoči
+            db.execute(dialect_insert(CatalogItem).values(list(missing.values())).on_conflict_do_nothing())
+        else:
+            db.execute(insert(CatalogItem).values(list(missing.values())))
+        found = load()
+    return [found[key] for key in keys]
+
+
+def _snapshot(data: dict, **reference) -> dict:
+    snapshot = {field: data[field] for field in SNAPSHOT_FIELDS if field in data}
+    snapshot.update(reference)
+    return snapshot
+
+
+def to_references(db: Session, transport_option, accommodation, flight, transport_type: str = None):
+    """Pretvori objekte iz kataloga u reference sa snapshotom (za spremanje u Trip).
+
+    Prijevoz do aerodroma (transport_type "air") dolazi iz drugog kataloga s
+    istim id-evima kao obični prijevoz.
+    """
+    flight = dict(flight) if isinstance(flight, dict) else flight
+    transport_kind = KIND_TRANSPORT_FLIGHT if transport_type == "air" else KIND_TRANSPORT
+    slots = [(transport_kind, transport_option), (KIND_ACCOMMODATION, accommodation)]
+    if isinstance(flight, dict):
+        slots += [(KIND_FLIGHT, flight.get(leg)) for leg in FLIGHT_LEGS]
+    refs = [data for _, data in slots]
+    index = catalog.index
+    pending = []
+    for position, (kind, data) in enumerate(slots):
+        if not isinstance(data, dict) or not data or _is_reference(data):
+            continue
+        if data.get("id") is not None and index.get(kind, str(data["id"])) is not None:
+            refs[position] = _snapshot(data, id=str(data["id"]), catalog_kind=kind)
+        else:
+            # catalog_items čuva samo "transport", prijevoz do aerodroma je ista vrsta
+            pending.append((position, KIND_TRANSPORT if kind == KIND_TRANSPORT_FLIGHT else kind, data))
+    ids = catalog_ids(db, [(kind, data) for _, kind, data in pending])
+    for (position, _, data), catalog_id in zip(pending, ids):
+        refs[position] = _snapshot(data, catalog_id=catalog_id)
+    if isinstance(flight, dict):
+        for leg, ref in zip(FLIGHT_LEGS, refs[2:]):
+            if leg in flight:
+                flight[leg] = ref
+    return refs[0], refs[1], flight
+
+
+def _references(item: dict):
+    for field in ("transport_option", "accommodation"):
+        if _is_reference(item.get(field)):
+            yield item[field]
+    flight = item.get("flight")
+    if isinstance(flight, dict):
+        for leg in FLIGHT_LEGS:
+            if _is_reference(flight.get(leg)):
+                yield flight[leg]
+
+
+def hydrate_trips(db: Session, items: list) -> list:
+    """Zamijeni reference u rječnicima tripova punim objektima iz kataloga (najviše jedan upit).
+
+    Stari redovi s cijelim objektom (bez reference) ostaju kakvi jesu.
+    """
+    refs = [ref for item in items for ref in _references(item)]
+    if not refs:
+        return items
+    ids = {ref["catalog_id"] for ref in refs if "catalog_id" in ref}
+    stored = dict(db.query(CatalogItem.id, CatalogItem.data).filter(CatalogItem.id.in_(ids))) if ids else {}
+    index = catalog.index
+
+    def expand(ref):
+        if not _is_reference(ref):
+            return ref
+        if "catalog_kind" in ref:
+            full = index.get(ref["catalog_kind"], ref.get("id")) or {}
+        else:
+            full = stored.get(ref["catalog_id"], {})
+        snapshot = {key: value for key, value in ref.items() if key not in ("catalog_id", "catalog_kind")}
+        return {**full, **snapshot}
+
+    for item in items:
+        for field in ("transport_option", "accommodation"):
+            if field in item:
+                item[field] = expand(item[field])
+        if isinstance(item.get("flight"), dict):
+            item["flight"] = {leg: expand(value) for leg, value in item["flight"].items()}
+    return items
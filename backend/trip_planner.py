@@ -0,0 +1,171 @@
+"""Planer paketa putovanja (prijevoz/let + smještaj) unutar budžeta.
+
+Vraća Pareto frontu kombinacija po tri kriterija: ukupna cijena (manja je
+bolja), trajanje putovanja (manje) i ocjena smještaja (veća). Umjesto
+pretrage svih parova:
+
+1. Ocjena ovisi samo o smještaju, a trajanje samo o prijevozu. Ako prijevoz
+   A nije skuplji ni sporiji od B, svaka kombinacija s B je dominirana istom
+   kombinacijom s A - dovoljno je gledati 2D frontu prijevoza (cijena,
+   trajanje) i 2D frontu smještaja (cijena, ocjena). Fronte se računaju
+   sortiranjem, jednom po ruti/odredištu i verziji kataloga (cache na indeksu).
+   Fronta smještaja ne ovisi o broju noćenja (množenje cijene ne mijenja
+   dominaciju), a nepoznate rute se ne keširaju - cache ne raste s upitima.
+2. Obje fronte su sortirane po cijeni, pa je budžet bisect po smještaju.
+3. Preostale kombinacije prolaze 3D sweep po cijeni sa "stepenicama"
+   (trajanje, -ocjena) i bisectom.
+
+Cijena smještaja u katalogu je po noćenju.
+"""
+import bisect
+import logging
+
+from catalog import KIND_ACCOMMODATION, KIND_FLIGHT, KIND_TRANSPORT, CatalogIndex
+
+logger = logging.getLogger(__name__)
+
+PLANNER_RESULT_LIMIT = 50
+# Gornja granica parova nakon 2D fronti i budžeta (zaštita od patoloških kataloga)
+PLANNER_MAX_COMBINATIONS = 200000
+
+TRANSPORT_AIR = "air"
+TRANSPORT_GROUND = "ground"
+
+INFINITY = float("inf")
+
+
+def pareto_front_2d(options, first, second):
+    """Nedominirane opcije po (first, second), oba se minimiziraju; sortirano po first.
+
+    O(n log n): nakon sortiranja po (first, second) opcija ostaje samo ako
+    joj je second strogo manji od svih prethodnih.
+    """
+    front = []
+    best = INFINITY
+    for option in sorted(options, key=lambda option: (first(option), second(option))):
+        if second(option) < best:
+            front.append(option)
+            best = second(option)
+    return front
+
+
+class TravelOption:
+    __slots__ = ("kind", "item", "return_item", "price", "duration")
+
+    def __init__(self, kind, item, return_item, price, duration):
+        self.kind = kind
+        self.item = item
+        self.return_item = return_item
+        self.price = price
+        self.duration = INFINITY if duration is None else duration
+
+
+class StayOption:
+    __slots__ = ("item", "price", "rating")
+
+    def __init__(self, item, price, rating):
+        self.item = item
+        # Cijena po noćenju
+        self.price = price
+        # None ako nema recenzija (tako i u odgovoru); pri usporedbi vrijedi kao 0
+        self.rating = rating
+
+
+def travel_front(index: CatalogIndex, origin: str, destination: str, transport_type: str = None):
+    ground = index.candidates(KIND_TRANSPORT, origin, destination).items
+    if not ground and not index.candidates(KIND_FLIGHT, origin, destination).items:
+        # Nepoznata ruta se ne kešira
+        return []
+
+    def build():
+        options = []
+        if transport_type in (None, TRANSPORT_GROUND):
+            for item in ground:
+                options.append(TravelOption(
+                    KIND_TRANSPORT, item, None, item["price"], index.duration[KIND_TRANSPORT][item["id"]]
+                ))
+        if transport_type in (None, TRANSPORT_AIR):
+            # Povratni let: najjeftiniji na obrnutoj ruti (kao u wizardu); bez njega let se ne nudi
+            returns = index.candidates(KIND_FLIGHT, destination, origin).items
+            if returns:
+                cheapest_return = returns[0]
+                for item in index.candidates(KIND_FLIGHT, origin, destination).items:
+                    options.append(TravelOption(
+                        KIND_FLIGHT, item, cheapest_return, item["price"] + cheapest_return["price"],
+                        index.duration[KIND_FLIGHT][item["id"]],
+                    ))
+        return pareto_front_2d(options, lambda option: option.price, lambda option: option.duration)
+
+    return index.derive(("planner_travel", origin, destination, transport_type), build)
+
+
+def stay_front(index: CatalogIndex, destination: str):
+    """Fronta smještaja po cijeni noćenja i ocjeni."""
+    candidates = index.candidates(KIND_ACCOMMODATION, destination=destination).items
+    if not candidates:
+        return []
+
+    def build():
+        ratings = index.rating[KIND_ACCOMMODATION]
+        options = [StayOption(item, item["price"], ratings[item["id"]]) for item in candidates]
+        return pareto_front_2d(options, lambda option: option.price, lambda option: -(option.rating or 0))
+
+    return index.derive(("planner_stay", destination), build)
+
+
+def plan_bundles(
+    index: CatalogIndex,
+    origin: str,
+    destination: str,
+    nights: int,
+    budget: float,
+    transport_type: str = None,
+    limit: int = PLANNER_RESULT_LIMIT,
+):
+    """Pareto fronta paketa unutar budžeta, sortirana po cijeni."""
+    travels = [travel for travel in travel_front(index, origin, destination, transport_type) if travel.price <= budget]
+    stays = stay_front(index, destination)
+    stay_prices = [stay.price * nights for stay in stays]
+
+    combinations = []
+    for travel in travels:
+        # Fronta smještaja je sortirana po cijeni: u budžet stane prefiks
+        affordable = bisect.bisect_right(stay_prices, budget - travel.price)
+        for stay, stay_price in zip(stays[:affordable], stay_prices):
+            combinations.append((travel.price + stay_price, travel.duration, -(stay.rating or 0), travel, stay))
+        if len(combinations) > PLANNER_MAX_COMBINATIONS:
+            logger.warning("Planner combinations capped at %s for %s -> %s", PLANNER_MAX_COMBINATIONS, origin, destination)
+            break
+    combinations.sort(key=lambda combination: combination[:3])
+
+    # Stepenice: (trajanje rastuće, -ocjena strogo padajuća) svih dosad prihvaćenih
+    stair_durations, stair_ratings = [], []
+    frontier = []
+    for combination in combinations:
+        _, duration, negative_rating, _, _ = combination
+        position = bisect.bisect_right(stair_durations, duration)
+        # Dominirana ako jeftinija kombinacija nije sporija i nema lošiju ocjenu
+        if position and stair_ratings[position - 1] <= negative_rating:
+            continue
+        frontier.append(combination)
+        if len(frontier) >= limit:
+            break
+        # Makni stepenice koje nova točka dominira u projekciji
+        if position and stair_durations[position - 1] == duration:
+            position -= 1
+        end = position
+        while end < len(stair_durations) and stair_ratings[end] >= negative_rating:
+            end += 1
+        stair_durations[position:end] = [duration]
+        stair_ratings[position:end] = [negative_rating]
+
+    return [
+        {
+            "total_price": price,
+            "duration_minutes": None if duration == INFINITY else duration,
+            "rating": stay.rating,
+            "travel": {"kind": travel.kind, "item": travel.item, "return": travel.return_item},
+            "accommodation": stay.item,
+        }
+        for price, duration, negative_rating, travel, stay in frontier
+    ]
@@ -0,0 +1,72 @@
+from fastapi import HTTPException
+from sqlalchemy import Integer, String, case, func, literal, tuple_
+from sqlalchemy.orm import Session
+
+from models import User
+from pagination import clamp_limit, decode_cursor, encode_cursor
+
+USER_SEARCH_MIN_QUERY_LENGTH = 2
+USER_SEARCH_PAGE_SIZE = 20
+USER_SEARCH_MAX_PAGE_SIZE = 50
+
+
+def _escape_like(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def _valid_cursor(after) -> bool:
+    # [rank, username_lower, id]; bool je podklasa int-a pa se isključuje
+    if not (isinstance(after, list) and len(after) == 3):
+        return False
+    after_rank, after_username, after_id = after
+    return (
+        type(after_rank) is int and after_rank in (0, 1, 2)
+        and isinstance(after_username, str)
+        and type(after_id) is int
+    )
+
+
+# Indeksi za ovu pretragu: migrations/v0002_user_search_indexes.py
+def find_users(db: Session, search: str, cursor: str = None, limit: int = USER_SEARCH_PAGE_SIZE) -> dict:
+    """Rangirana pretraga korisnika s keyset paginacijom.
+
+    Redoslijed: točan pogodak, pa prefiks, pa podniz; unutar ranga po
+    username-u i id-u. Vraća samo polja koja treba lista za dodavanje prijatelja.
+    """
+    query = (search or "").strip().lower()
+    if len(query) < USER_SEARCH_MIN_QUERY_LENGTH:
+        return {"users": [], "next_cursor": None}
+    limit = clamp_limit(limit, USER_SEARCH_PAGE_SIZE, USER_SEARCH_MAX_PAGE_SIZE)
+
+    escaped = _escape_like(query)
+    username_lower = func.lower(User.username)
+    rank = case(
+        (username_lower == query, 0),
+        (username_lower.like(f"{escaped}%", escape="\\"), 1),
+        else_=2,
+    )
+
+    q = (
+        db.query(User.id, User.username, User.profile_image, rank.label("rank"), username_lower.label("username_lower"))
+        .filter(username_lower.like(f"%{escaped}%", escape="\\"))
+    )
+    after = decode_cursor(cursor)
+    if after is not None:
+        if not _valid_cursor(after):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        after_rank, after_username, after_id = after
+        q = q.filter(
+            tuple_(rank, username_lower, User.id)
+            > tuple_(literal(after_rank, Integer), literal(after_username, String), literal(after_id, Integer))
+        )
+    rows = q.order_by(rank, username_lower, User.id).limit(limit + 1).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor([last.rank, last.username_lower, last.id])
+    return {
+        "users": [{"id": row.id, "username": row.username, "profile_image": row.profile_image} for row in rows],
+        "next_cursor": next_cursor,
+    }
@@ -2,8 +2,9 @@ import pyotp
 import qrcode
 import base64
 from io import BytesIO
-from fastapi_mail import FastMail, MessageSchema, ConnectionConfig
+from fastapi_mail import ConnectionConfig
 from itsdangerous import URLSafeTimedSerializer
+from models import EmailOutbox
 
 # Konfiguracija za FastMail
 conf = ConnectionConfig(
@@ -40,9 +41,14 @@ def decode_verification_token(token: str, expiration=3600) -> str:
         return None
     return email
 
-# Funkcija za slanje verifikacijskog emaila
-async def send_verification_email(email: str):
-    token = generate_verification_token(email)
+# Oznaka u tijelu poruke u outboxu; stvarni token upisuje render_outbox_body
+# tek pri slanju, inače bi ponovljeni pokušaji slali link kojem je istekao rok
+VERIFICATION_TOKEN_PLACEHOLDER = "{{verification_token}}"
+
+# Funkcija za sastavljanje verifikacijskog emaila (subject, html)
+def build_verification_email(email: str, token: str = None):
+    if token is None:
+        token = generate_verification_token(email)
     verification_url = f"http://localhost:3000/verify-email?token={token}"
     html = f"""
     <html>
@@ -61,21 +67,22 @@ async def send_verification_email(email: str):
     </body>
     </html>
     """
+    return "Verify Your Email - TravelApp", html
 
-    message = MessageSchema(
-        subject="Verify Your Email - TravelApp",
-        recipients=[email],
-        body=html,
-        subtype="html"
-    )
-    fm = FastMail(conf)
-    await fm.send_message(message)
-
+# Funkcija za stavljanje verifikacijskog emaila u outbox.
+# Ne radi commit - poziva se u istoj transakciji u kojoj se kreira korisnik,
+# a poruku kasnije šalje email_outbox.OutboxSender.
+def enqueue_verification_email(db, email: str):
+    subject, html = build_verification_email(email, token=VERIFICATION_TOKEN_PLACEHOLDER)
+    message = EmailOutbox(recipient=email, subject=subject, body=html)
+    db.add(message)
+    return message
 
-def hash_password(password: str) -> str:
-    from passlib.context import CryptContext
-    pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-    return pwd_context.hash(password)
+# Tijelo poruke iz outboxa spremno za slanje: svježi token za primatelja
+def render_outbox_body(recipient: str, body: str) -> str:
+    if VERIFICATION_TOKEN_PLACEHOLDER not in body:
+        return body
+    return body.replace(VERIFICATION_TOKEN_PLACEHOLDER, generate_verification_token(recipient))
 
 def generate_otp_secret() -> str:
     return pyotp.random_base32()
@@ -0,0 +1,94 @@
+import hashlib
+
+from fastapi import Request, Response
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from models import Friend, SharedTrip, UserDataVersion
+
+# Opsezi verzija po korisniku:
+#   trips   - vlastiti tripovi, njihova dijeljenja i feedbackovi (My Trips)
+#   shared  - tripovi podijeljeni s korisnikom i feedbackovi na njima
+#   friends - prijatelji i zahtjevi za prijateljstvo
+SCOPE_TRIPS = "trips"
+SCOPE_SHARED = "shared"
+SCOPE_FRIENDS = "friends"
+
+
+def bump_versions(db: Session, scope: str, user_ids):
+    """Povećaj verziju opsega za korisnike; poziva se prije commita iste transakcije."""
+    user_ids = sorted({user_id for user_id in user_ids if user_id is not None})
+    if not user_ids:
+        return
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    else:
+        dialect_insert = None
+
+    if dialect_insert is not None:
+        stmt = dialect_insert(UserDataVersion).values(
+            [{"user_id": user_id, "scope": scope, "version": 1} for user_id in user_ids]
+        )
+        db.execute(stmt.on_conflict_do_update(
+            index_elements=[UserDataVersion.user_id, UserDataVersion.scope],
+            set_={"version": UserDataVersion.version + 1},
+        ))
+        return
+    # Ostali dijalekti: UPDATE pa INSERT za korisnike koji još nemaju redak
+    db.query(UserDataVersion).filter(
+        UserDataVersion.scope == scope, UserDataVersion.user_id.in_(user_ids)
+    ).update({UserDataVersion.version: UserDataVersion.version + 1}, synchronize_session=False)
+    existing = {
+        row.user_id for row in db.query(UserDataVersion.user_id).filter(
+            UserDataVersion.scope == scope, UserDataVersion.user_id.in_(user_ids)
+        )
+    }
+    missing = [user_id for user_id in user_ids if user_id not in existing]
+    if missing:
+        db.execute(insert(UserDataVersion).values(
+            [{"user_id": user_id, "scope": scope, "version": 1} for user_id in missing]
+        ))
+
+
+def bump_profile_versions(db: Session, user_id: int):
+    """Username i slika korisnika su ugrađeni u tuđe odgovore (i njihove ETagove).
+
+    Nakon promjene povećaj verzije svih koji ga prikazuju: prijatelja i
+    zahtjeva (friends), vlasnika koji su s njim dijelili trip (trips:
+    shared-with i feedbackovi) i primatelja njegovih dijeljenja (shared).
+    """
+    friend_rows = db.query(Friend.user_id, Friend.friend_id).filter(
+        (Friend.user_id == user_id) | (Friend.friend_id == user_id)
+    ).all()
+    owners = db.query(SharedTrip.shared_by_id).filter(SharedTrip.shared_with_id == user_id).all()
+    recipients = db.query(SharedTrip.shared_with_id).filter(SharedTrip.shared_by_id == user_id).all()
+    bump_versions(db, SCOPE_FRIENDS, [user_id] + [uid for row in friend_rows for uid in row])
+    bump_versions(db, SCOPE_TRIPS, [user_id] + [row[0] for row in owners])
+    bump_versions(db, SCOPE_SHARED, [user_id] + [row[0] for row in recipients])
+
+
+def not_modified(request: Request, response: Response, db: Session, user_id: int, *scopes):
+    """Postavi slabi ETag iz verzija korisnika; vrati 304 ako ga klijent već ima.
+
+    Jedan upit na user_data_versions, prije čitanja ikakvih podataka. Query
+    string (kursor, limit, fields...) ulazi u ETag jer mijenja sadržaj odgovora.
+    """
+    rows = dict(
+        db.query(UserDataVersion.scope, UserDataVersion.version).filter(
+            UserDataVersion.user_id == user_id, UserDataVersion.scope.in_(scopes)
+        ).all()
+    )
+    versions = ".".join(str(rows.get(scope, 0)) for scope in scopes)
+    query_hash = hashlib.sha1(request.url.query.encode()).hexdigest()[:8]
+    etag = f'W/"{user_id}-{versions}-{query_hash}"'
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache", "Vary": "Authorization"}
+
+    # Slaba usporedba: W/ prefiks se ignorira
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and etag[2:] in [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]:
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return None
@@ -3,6 +3,7 @@ import { useRouter } from 'next/router';
 import Link from 'next/link';
 import { Navbar, Nav, NavDropdown, Image } from 'react-bootstrap';
 import styles from '../styles/navbar.module.css';
+import { profileImageUrl } from '../lib/media';
 import { Plane } from 'lucide-react'	
 
 interface User {
@@ -69,7 +70,7 @@ const AppNavbar = () => {
                   onBlur={handleDropdownClose}
                 >
                   <Image
-                    src={user?.profile_image ? `http://localhost:8000${user.profile_image}` : "/default-profile.png"}
+                    src={profileImageUrl(user?.profile_image, 40)}
                     alt="Profilna slika"
                     width={40}
                     height={40}
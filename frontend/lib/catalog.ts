@@ -0,0 +1,29 @@
+// Katalog (smještaj, letovi, prijevoz) dolazi s backenda, filtriran na serveru
+const CATALOG_API_URL = "http://localhost:8000/api/catalog";
+const CATALOG_PAGE_SIZE = 100;
+
+// Sve stranice rezultata: prati next_cursor dok ga server vraća
+export const fetchCatalog = async <T,>(
+  kind: "accommodation" | "flight" | "transport" | "transport_flight",
+  params: Record<string, string | undefined> = {}
+): Promise<T[]> => {
+  const query = new URLSearchParams({ limit: String(CATALOG_PAGE_SIZE) });
+  Object.entries(params).forEach(([key, value]) => {
+    if (value) query.set(key, value);
+  });
+  const items: T[] = [];
+  try {
+    let cursor: string | null = null;
+    do {
+      if (cursor) query.set("cursor", cursor);
+      const response = await fetch(`${CATALOG_API_URL}/${kind}?${query}`);
+      if (!response.ok) return items;
+      const data = await response.json();
+      items.push(...(data.items as T[]));
+      cursor = data.next_cursor;
+    } while (cursor);
+  } catch {
+    // Što je stiglo do greške
+  }
+  return items;
+};
@@ -0,0 +1,12 @@
+// Slike profila se poslužuju kao smanjene WebP varijante (backend media_variants)
+const MEDIA_BASE_URL = "http://localhost:8000";
+const DEFAULT_PROFILE_IMAGE = "/default-profile.png";
+// Širine koje backend generira (VARIANT_WIDTHS u media_variants.py)
+const VARIANT_WIDTHS = [32, 48, 64, 96, 128, 256, 512];
+
+// Najmanja varijanta koja pokriva prikaznu širinu i na 2x ekranu
+export const profileImageUrl = (path: string | null | undefined, displayWidth: number): string => {
+  if (!path) return DEFAULT_PROFILE_IMAGE;
+  const width = VARIANT_WIDTHS.find(w => w >= displayWidth * 2) ?? VARIANT_WIDTHS[VARIANT_WIDTHS.length - 1];
+  return `${MEDIA_BASE_URL}${path}?w=${width}&fmt=webp`;
+};
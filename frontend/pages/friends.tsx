@@ -2,6 +2,7 @@ import AppNavbar from '../components/Navbar';
 import { useState, useEffect } from 'react';
 import { Container, Form, Button, ListGroup, Alert, Row, Col, Card, Tab, Nav } from 'react-bootstrap';
 import axios from 'axios';
+import { profileImageUrl } from '../lib/media';
 import '../styles/profile-picture.css';
 
 // Komponenta za prikaz rezultata pretrage
@@ -10,14 +11,13 @@ const SearchResultList = ({ results, onAddFriend }) => (
     {results.map(user => (
       <ListGroup.Item key={user.id} className="d-flex align-items-center">
         <img
-          src={user.profile_image ? `http://localhost:8000${user.profile_image}` : "/default-profile.png"}
+          src={profileImageUrl(user.profile_image, 40)}
           alt="Profile"
           className="profile-image-circle"
           style={{ marginRight: 12, width: 40, height: 40 }}
         />
         <div className="flex-grow-1">
           <span className="fw-bold">{user.username}</span>
-          <span className="text-muted ms-2" style={{ fontSize: 13 }}>{user.email}</span>
         </div>
         <Button variant="success" size="sm" onClick={() => onAddFriend(user.id)}>
           Add Friend
@@ -33,7 +33,7 @@ const FriendRequestList = ({ requests, onRespond }) => (
     {requests.map(req => (
       <ListGroup.Item key={req.id} className="d-flex align-items-center">
         <img
-          src={req.profile_image ? `http://localhost:8000${req.profile_image}` : "/default-profile.png"}
+          src={profileImageUrl(req.profile_image, 40)}
           alt="Profile"
           className="profile-image-circle"
           style={{ marginRight: 12, width: 40, height: 40 }}
@@ -59,7 +59,7 @@ const FriendList = ({ friends, onRemoveFriend }) => (
     {friends.map(friend => (
       <ListGroup.Item key={friend.id} className="d-flex align-items-center">
         <img
-          src={friend.profile_image ? `http://localhost:8000${friend.profile_image}` : "/default-profile.png"}
+          src={profileImageUrl(friend.profile_image, 40)}
           alt="Profile"
           className="profile-image-circle"
           style={{ marginRight: 12, width: 40, height: 40 }}
@@ -111,18 +111,30 @@ const FriendsPage = () => {
     }
   };
 
+  // Sve stranice liste; backend vraća next_cursor dok ima još redova
+  const fetchAllPages = async (url, key) => {
+    const items = [];
+    let cursor = null;
+    do {
+      const res = await axios.get(url, { params: cursor ? { cursor } : {} });
+      items.push(...(res.data[key] || []));
+      cursor = res.data.next_cursor;
+    } while (cursor);
+    return items;
+  };
+
   // Učitavanje prijatelja i zahtjeva za prijateljstvo
   useEffect(() => {
     const loadUserData = async () => {
       const userId = await fetchCurrentUserId();
       if (!userId) return;
       try {
-        const [friendsRes, requestsRes] = await Promise.all([
-          axios.get(`http://localhost:8000/api/friends/${userId}`),
-          axios.get(`http://localhost:8000/api/friends/friend-requests/${userId}`),
+        const [allFriends, allRequests] = await Promise.all([
+          fetchAllPages(`http://localhost:8000/api/friends/${userId}`, 'friends'),
+          fetchAllPages(`http://localhost:8000/api/friends/friend-requests/${userId}`, 'friend_requests'),
         ]);
-        setFriends(friendsRes.data.friends || []);
-        setFriendRequests(requestsRes.data.friend_requests || []);
+        setFriends(allFriends);
+        setFriendRequests(allRequests);
       } catch {
         setError('Failed to load friends data.');
       }
@@ -60,26 +60,33 @@ const latestTrips = [
   },
 ];
 
-const stats = [
+interface TravelStats {
+  trip_count: number;
+  total_cost: number;
+  destinations: Record<string, number>;
+}
+
+const buildStats = (travelStats: TravelStats | null) => [
   {
     label: "Number of Trips",
-    value: 12,
+    value: travelStats ? travelStats.trip_count : 0,
     icon: <FiCalendar size={32} color="var(--primary-color)" />,
   },
   {
-    label: "Distance (km)",
-    value: 4820,
+    label: "Destinations",
+    value: travelStats ? Object.keys(travelStats.destinations).length : 0,
     icon: <FiGlobe size={32} color="var(--primary-color)" />,
   },
   {
     label: "Spent (€)",
-    value: 3890,
+    value: travelStats ? Math.round(travelStats.total_cost) : 0,
     icon: <FiTrendingUp size={32} color="var(--primary-color)" />,
   },
 ];
 
 const GlavnaStranica = () => {
   const [user, setUser] = useState<User | null>(null);
+  const [travelStats, setTravelStats] = useState<TravelStats | null>(null);
   const router = useRouter();
 
   useEffect(() => {
@@ -93,6 +100,15 @@ const GlavnaStranica = () => {
           withCredentials: true,
         });
         setUser(response.data);
+
+        // Statistika nije kritična - bez nje stranica prikazuje nule
+        axios
+          .get("http://localhost:8000/api/trips/stats", {
+            headers: { Authorization: `Bearer ${token}` },
+            withCredentials: true,
+          })
+          .then((statsResponse) => setTravelStats(statsResponse.data))
+          .catch(() => setTravelStats(null));
       } catch {
         router.push("/login");
       }
@@ -278,7 +294,7 @@ const GlavnaStranica = () => {
             Your Statistics
           </h2>
           <div className="row g-4 justify-content-center">
-            {stats.map(({ label, value, icon }, idx) => (
+            {buildStats(travelStats).map(({ label, value, icon }, idx) => (
               <div
                 key={idx}
                 className="col-12 col-md-4 d-flex"
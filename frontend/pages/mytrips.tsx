@@ -1,5 +1,6 @@
-import { useEffect, useState } from "react";
+import { useEffect, useRef, useState } from "react";
 import AppNavbar from "../components/Navbar";
+import { profileImageUrl } from "../lib/media";
 import {
   Container,
   Card,
@@ -8,6 +9,7 @@ import {
   Modal,
   Carousel,
   Alert,
+  Form,
 } from "react-bootstrap";
 import "../styles/profile-picture.css";
 import { FiChevronDown, FiChevronUp, FiMapPin } from "react-icons/fi";
@@ -75,6 +77,9 @@ const MyTrips = () => {
   const [showShareModal, setShowShareModal] = useState(false);
   const [selectedTripId, setSelectedTripId] = useState<number | null>(null);
   const [friends, setFriends] = useState<any[]>([]);
+  const [friendSearch, setFriendSearch] = useState("");
+  const [friendsCursor, setFriendsCursor] = useState<string | null>(null);
+  const friendsRequest = useRef(0);
 
   // --- Delete trip modal state ---
   const [showDeleteModal, setShowDeleteModal] = useState(false);
@@ -88,49 +93,45 @@ const MyTrips = () => {
     {}
   );
 
+  const [tripsCursor, setTripsCursor] = useState<string | null>(null);
+  const [loadingMore, setLoadingMore] = useState(false);
+
+  // Jedan endpoint vraća tripove s dijeljenjima i feedbackovima; sljedeća
+  // stranica se učitava tek na zahtjev (next_cursor)
+  const fetchTrips = async (cursor: string | null) => {
+    const token = localStorage.getItem("access_token");
+    const url: string =
+      "http://localhost:8000/api/trips/overview" +
+      (cursor ? `?cursor=${encodeURIComponent(cursor)}` : "");
+    const res = await fetch(url, {
+      headers: { Authorization: `Bearer ${token}` },
+      credentials: "include",
+    });
+    if (!res.ok) return;
+    const data = await res.json();
+    const shared: { [tripId: number]: any[] } = {};
+    const tripFeedbacks: { [tripId: number]: Feedback[] } = {};
+    data.trips.forEach((trip: any) => {
+      shared[trip.id] = trip.shared_with;
+      tripFeedbacks[trip.id] = trip.feedbacks;
+    });
+    setTrips((prev) => (cursor ? [...prev, ...data.trips] : data.trips));
+    setSharedWith((prev) => ({ ...prev, ...shared }));
+    setFeedbacks((prev) => ({ ...prev, ...tripFeedbacks }));
+    setTripsCursor(data.next_cursor);
+  };
+
   useEffect(() => {
-    const fetchTrips = async () => {
-      const token = localStorage.getItem("access_token");
-      const res = await fetch("http://localhost:8000/api/trips/", {
-        headers: { Authorization: `Bearer ${token}` },
-        credentials: "include",
-      });
-      if (res.ok) {
-        const data = await res.json();
-        setTrips(data);
-
-        // Dohvati sharedWith za svaki trip i feedbackove
-        data.forEach(async (trip: Trip) => {
-          const sharedRes = await fetch(
-            `http://localhost:8000/api/trips/shared-with/${trip.id}`,
-            {
-              headers: { Authorization: `Bearer ${token}` },
-              credentials: "include",
-            }
-          );
-          if (sharedRes.ok) {
-            const sharedData = await sharedRes.json();
-            setSharedWith((prev) => ({ ...prev, [trip.id]: sharedData }));
-          }
-          // Dohvati feedbackove
-          const fbRes = await fetch(
-            `http://localhost:8000/api/trips/${trip.id}/feedbacks`,
-            {
-              headers: { Authorization: `Bearer ${token}` },
-              credentials: "include",
-            }
-          );
-          if (fbRes.ok) {
-            const fbData = await fbRes.json();
-            setFeedbacks((prev) => ({ ...prev, [trip.id]: fbData }));
-          }
-        });
-      }
-      setLoading(false);
-    };
-    fetchTrips();
+    fetchTrips(null).finally(() => setLoading(false));
   }, []);
 
+  const loadMoreTrips = async () => {
+    if (!tripsCursor || loadingMore) return;
+    setLoadingMore(true);
+    await fetchTrips(tripsCursor);
+    setLoadingMore(false);
+  };
+
   const toggleExpand = (tripId: number) => {
     setExpanded((prev) => ({ ...prev, [tripId]: !prev[tripId] }));
   };
@@ -156,14 +157,35 @@ const MyTrips = () => {
   };
 
   // --- Share trip logic ---
-  const openShareModal = async (tripId: number) => {
-    setSelectedTripId(tripId);
+  // Prijatelji se traže na serveru (search) i učitavaju stranicu po stranicu
+  const loadFriends = async (search: string, cursor: string | null) => {
+    const requestId = ++friendsRequest.current;
     const token = localStorage.getItem("access_token");
-    const res = await fetch("http://localhost:8000/api/friends/", {
+    const params = new URLSearchParams();
+    if (search) params.set("search", search);
+    if (cursor) params.set("cursor", cursor);
+    const res = await fetch(`http://localhost:8000/api/friends/?${params}`, {
       headers: { Authorization: `Bearer ${token}` },
     });
-    if (res.ok) setFriends(await res.json());
+    // Odgovor na stariji upit (korisnik je u međuvremenu nastavio tipkati)
+    if (!res.ok || requestId !== friendsRequest.current) return;
+    const page = await res.json();
+    setFriends((prev) => (cursor ? [...prev, ...page.friends] : page.friends));
+    setFriendsCursor(page.next_cursor);
+  };
+
+  const openShareModal = async (tripId: number) => {
+    setSelectedTripId(tripId);
+    setFriendSearch("");
+    setFriends([]);
+    setFriendsCursor(null);
     setShowShareModal(true);
+    await loadFriends("", null);
+  };
+
+  const handleFriendSearch = (value: string) => {
+    setFriendSearch(value);
+    loadFriends(value.trim(), null);
   };
 
   const handleShareTrip = async (friendId: number) => {
@@ -630,11 +652,7 @@ const MyTrips = () => {
                             className="mytrips-feedback-alert"
                           >
                             <img
-                              src={
-                                fb.user.profile_image
-                                  ? `http://localhost:8000${fb.user.profile_image}`
-                                  : "/default-profile.png"
-                              }
+                              src={profileImageUrl(fb.user.profile_image, 32)}
                               alt="Profilna slika"
                               className="profile-image-circle-small"
                             />
@@ -671,6 +689,17 @@ const MyTrips = () => {
             </Card>
           ))
         )}
+        {!loading && tripsCursor && (
+          <div className="text-center my-3">
+            <Button
+              className="mytrips-friend-btn"
+              onClick={loadMoreTrips}
+              disabled={loadingMore}
+            >
+              {loadingMore ? "Loading..." : "Load more trips"}
+            </Button>
+          </div>
+        )}
       </Container>
 
       {/* Modal za slike smještaja */}
@@ -713,8 +742,19 @@ const MyTrips = () => {
         </Modal.Header>
         <Modal.Body>
           <p>Select a friend to share with:</p>
+          <Form.Control
+            type="text"
+            placeholder="Search friends"
+            value={friendSearch}
+            onChange={(e) => handleFriendSearch(e.target.value)}
+            className="mb-3"
+          />
           {friends.length === 0 ? (
-            <p>You have no friends to share with.</p>
+            <p>
+              {friendSearch
+                ? "No friends match your search."
+                : "You have no friends to share with."}
+            </p>
           ) : (
             friends.map((friend) => (
               <Button
@@ -726,6 +766,14 @@ const MyTrips = () => {
               </Button>
             ))
           )}
+          {friendsCursor && (
+            <Button
+              variant="link"
+              onClick={() => loadFriends(friendSearch.trim(), friendsCursor)}
+            >
+              Load more
+            </Button>
+          )}
         </Modal.Body>
       </Modal>
 
@@ -1,5 +1,6 @@
 import React, { useEffect, useState } from "react";
 import AppNavbar from '../components/Navbar';
+import { profileImageUrl } from '../lib/media';
 import '../styles/profile-picture.css';
 
 interface User {
@@ -86,7 +87,7 @@ const ProfilePage = () => {
       <div className="profile-container">
         <h1 className="profile-title">Profil</h1>
         <img
-          src={user.profile_image ? `http://localhost:8000${user.profile_image}` : "/default-profile.png"}
+          src={profileImageUrl(user.profile_image, 140)}
           alt="Profilna slika"
           className="profile-image-circle"
         />
@@ -2,7 +2,7 @@ import { useState, useEffect } from 'react';
 import { useRouter } from 'next/router';
 import AppNavbar from '../../../components/Navbar';
 import { Card, Button, Container, Form, Modal, Carousel } from 'react-bootstrap';
-import accommodationData from '../../../data/accommodationData.json';
+import { fetchCatalog } from '../../../lib/catalog';
 
 interface Accommodation {
   id: string;
@@ -33,9 +33,6 @@ const AccommodationPage = () => {
   const [modalAcc, setModalAcc] = useState<Accommodation | null>(null);
 
   useEffect(() => {
-    localStorage.setItem('accommodationData', JSON.stringify(accommodationData));
-    let accs = [...accommodationData];
-
     // Dodaj default opciju na početak
     const defaultAcc: Accommodation = {
       id: 'default',
@@ -47,18 +44,14 @@ const AccommodationPage = () => {
       location: '',
       description: 'You already have your own accommodation for this trip.',
     };
-    accs.unshift(defaultAcc);
 
     const tripDetails = localStorage.getItem('tripDetails');
-    if (tripDetails) {
-      const { destination } = JSON.parse(tripDetails);
-      const filteredAccommodations = accs.filter(
-        (acc) => acc.id === 'default' || acc.destination === destination
-      );
-      setAccommodations(filteredAccommodations);
-    } else {
-      setAccommodations(accs);
-    }
+    const destination = tripDetails ? JSON.parse(tripDetails).destination : undefined;
+    fetchCatalog<Accommodation>('accommodation', { destination }).then((accs) => {
+      // Summary traži odabrani smještaj u ovoj listi
+      localStorage.setItem('accommodationData', JSON.stringify(accs));
+      setAccommodations([defaultAcc, ...accs]);
+    });
   }, []);
 
 
@@ -2,7 +2,7 @@ import { useState, useEffect } from 'react';
 import { useRouter } from 'next/router';
 import AppNavbar from '../../../components/Navbar';
 import { Card, Button, Container, Modal, Carousel } from 'react-bootstrap';
-import flightsData from '../../../data/flightsData.json';
+import { fetchCatalog } from '../../../lib/catalog';
 
 interface Flight {
   id: string;
@@ -32,20 +32,24 @@ const FlightsPage = () => {
   const [showModal, setShowModal] = useState(false);
   const [modalFlight, setModalFlight] = useState<Flight | null>(null);
   const [returnFlight, setReturnFlight] = useState<Flight | null>(null);
-
-  useEffect(() => {
-    localStorage.setItem('flightsData', JSON.stringify(flightsData));
-  }, []);
+  // Letovi u oba smjera (za povratni let), sortirani po cijeni
+  const [flightsData, setFlightsData] = useState<Flight[]>([]);
 
   useEffect(() => {
     const tripDetails = localStorage.getItem('tripDetails');
     if (tripDetails) {
       const { departure, destination, startDate, endDate } = JSON.parse(tripDetails);
       setTripDates({ startDate, endDate });
-      const filteredFlights = flightsData.filter(
-        (flight) => flight.departure === departure && flight.destination === destination
-      );
-      setFlights(filteredFlights);
+      Promise.all([
+        fetchCatalog<Flight>('flight', { origin: departure, destination }),
+        fetchCatalog<Flight>('flight', { origin: destination, destination: departure }),
+      ]).then(([outbound, inbound]) => {
+        const routeFlights = [...outbound, ...inbound];
+        // Summary traži odabrani i povratni let u ovoj listi
+        localStorage.setItem('flightsData', JSON.stringify(routeFlights));
+        setFlightsData(routeFlights);
+        setFlights(outbound);
+      });
     }
   }, []);
 
@@ -2,7 +2,6 @@ import { useEffect, useState } from "react";
 import { useRouter } from "next/router";
 import AppNavbar from "../../../components/Navbar";
 import { Container, Card, Button, Modal, Carousel } from "react-bootstrap";
-import flightsData from "../../../data/flightsData.json";
 
 function getCookie(name: string) {
   const value = `; ${document.cookie}`;
@@ -2,7 +2,7 @@ import { useState, useEffect } from 'react';
 import { useRouter } from 'next/router';
 import AppNavbar from '../../../components/Navbar';
 import { Card, Button, Container, Modal } from 'react-bootstrap';
-import transportData from '../../../data/transportData.json';
+import { fetchCatalog } from '../../../lib/catalog';
 
 // Helper za veliko prvo slovo
 const capitalize = (str: string) =>
@@ -19,14 +19,13 @@ const TransportOptions = () => {
   const [modalOption, setModalOption] = useState<any>(null);
 
   useEffect(() => {
-    localStorage.setItem('transportData', JSON.stringify(transportData));
     const tripDetails = JSON.parse(localStorage.getItem('tripDetails') || '{}');
     const { departure, destination, startDate, endDate } = tripDetails;
     setTripDates({ startDate, endDate });
-    const filtered = transportData.filter(
-      (option) => option.departure === departure && option.destination === destination
-    );
-    setFilteredOptions(filtered);
+    fetchCatalog<any>('transport', { origin: departure, destination }).then((options) => {
+      localStorage.setItem('transportData', JSON.stringify(options));
+      setFilteredOptions(options);
+    });
   }, []);
 
   const handleSelect = (optionId: string) => {
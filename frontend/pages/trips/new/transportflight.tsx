@@ -2,7 +2,7 @@ import { useState, useEffect } from 'react';
 import { useRouter } from 'next/router';
 import AppNavbar from '../../../components/Navbar';
 import { Card, Button, Container, Modal } from 'react-bootstrap';
-import transportFlightData from '../../../data/transportFlightData.json';
+import { fetchCatalog } from '../../../lib/catalog';
 
 interface TransportOption {
   id: string;
@@ -27,13 +27,8 @@ const TransportFlight = () => {
   const [showModal, setShowModal] = useState(false);
   const [modalOption, setModalOption] = useState<TransportOption | null>(null);
 
-  useEffect(() => {
-    localStorage.setItem('transportFlightData', JSON.stringify(transportFlightData));
-  }, []);
-
   useEffect(() => {
     const tripDetails = localStorage.getItem('tripDetails');
-    let options = [...transportFlightData];
 
     const defaultOption: TransportOption = {
       id: 'default',
@@ -45,20 +40,18 @@ const TransportFlight = () => {
       arrival_time: '',
       image: '/images/ride.jpg'
     };
-    options.unshift(defaultOption);
 
+    const { departure, currLocation, startDate, endDate } = tripDetails ? JSON.parse(tripDetails) : ({} as any);
     if (tripDetails) {
-      const { departure, currLocation, startDate, endDate } = JSON.parse(tripDetails);
       setTripDates({ startDate, endDate });
-      const filteredOptions = options.filter(
-        (option) =>
-          option.id === 'default' ||
-          (option.currLocation === currLocation && option.departure === departure)
-      );
-      setTransportOptions(filteredOptions);
-    } else {
-      setTransportOptions(options);
     }
+    // Za prijevoz do aerodroma: origin = trenutna lokacija, destination = aerodrom polaska
+    fetchCatalog<TransportOption>('transport_flight', { origin: currLocation, destination: departure }).then(
+      (options) => {
+        localStorage.setItem('transportFlightData', JSON.stringify(options));
+        setTransportOptions([defaultOption, ...options]);
+      }
+    );
   }, []);
 
   const handleSelect = (optionId: string) => {